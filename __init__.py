@@ -10,7 +10,14 @@ from python_utils.sublime_text_utils import events
 
 # NOTE: Import last.
 from .st_plugins import SublimePythonJediForkToggleLoggingLevelCommand    # noqa
+from .st_plugins.buffers import *                                         # noqa
+from .st_plugins.cache_stats import *                                     # noqa
+from .st_plugins.cache_warmup import *                                    # noqa
 from .st_plugins.completion import *                                      # noqa
+from .st_plugins.latency import *                                         # noqa
+from .st_plugins.name_index import *                                      # noqa
+from .st_plugins.prewarm import *                                         # noqa
+from .st_plugins.references import *                                      # noqa
 
 
 def plugin_loaded():
@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""Startup benchmark of the parso grammars: generated from BNF vs. loaded from the cache.
+
+    python benchmarks/grammar_startup.py [--repeat N]
+
+Each grammar version bundled with parso is generated from its BNF text, then loaded from
+the precompiled tables of a temporary cache directory. The best time of ``--repeat`` runs
+is reported.
+"""
+import argparse
+import glob
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+root_folder = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                            os.pardir))
+sys.path.insert(0, os.path.join(root_folder, "dependencies"))
+
+from parso import cache  # noqa: E402
+from parso.pgen2 import dump_grammar_tables  # noqa: E402
+from parso.pgen2 import generate_grammar  # noqa: E402
+from parso.pgen2 import load_grammar_tables  # noqa: E402
+from parso.pgen2.generator import _TABLES_VERSION  # noqa: E402
+from parso.python.token import PythonTokenTypes  # noqa: E402
+
+
+def _best_of(repeat, func):
+    best = None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best * 1000
+
+
+def measure(path, cache_path, repeat=5):
+    """Time the generation and the cached load of a grammar.
+
+    Parameters
+    ----------
+    path : str
+        Path to a BNF grammar file.
+    cache_path : str
+        The parso cache directory.
+    repeat : int, optional
+        The number of runs.
+
+    Returns
+    -------
+    tuple
+        The generation and load times in milliseconds.
+    """
+    with open(path) as grammar_file:
+        text = grammar_file.read()
+
+    hashed = os.path.basename(path)
+    cache.save_grammar_tables(hashed, _TABLES_VERSION,
+                              dump_grammar_tables(generate_grammar(text, PythonTokenTypes)),
+                              cache_path=cache_path)
+
+    def _load():
+        tables = cache.load_grammar_tables(hashed, _TABLES_VERSION, cache_path=cache_path)
+        load_grammar_tables(tables, PythonTokenTypes)
+
+    return (_best_of(repeat, lambda: generate_grammar(text, PythonTokenTypes)),
+            _best_of(repeat, _load))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per grammar")
+    args = parser.parse_args()
+
+    paths = glob.glob(os.path.join(root_folder, "dependencies", "parso", "python",
+                                   "grammar*.txt"))
+    paths.sort(key=lambda p: [int(n) for n in re.findall(r"\d", os.path.basename(p))])
+    cache_path = tempfile.mkdtemp()
+
+    print("{0:<10}{1:>14}{2:>14}{3:>10}".format("grammar", "generate ms", "cached ms",
+                                                "speedup"))
+
+    try:
+        for path in paths:
+            generate, load = measure(path, cache_path, args.repeat)
+            version = ".".join(re.findall(r"\d", os.path.basename(path)))
+            print("{0:<10}{1:>14.2f}{2:>14.2f}{3:>9.1f}x".format(version, generate, load,
+                                                                 generate / load))
+    finally:
+        shutil.rmtree(cache_path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""Check the inference results of the vendored Jedi against annotated cases.
+
+    python benchmarks/inference_cases.py [--cases FILE ...]
+
+Like the integration tests of Jedi, a ``#? int() str()`` comment gives the expected
+instance types of the expression on the next line. Each case is inferred by a fresh
+``jedi.Script`` and by a ``JediSession`` that reuses its inference state for all of
+them, like the completion server does. Exits with 1 if any result differs.
+
+The built-in cases are array modifications (``list.append`` and friends), which are
+found by searching the module and get lost if storing a memoized result infers. Case files
+of Jedi's test suite (``test/completion/*.py``) can be given as well, their other kinds
+of annotations (completions, ``#!`` goto, ``#<`` references) are skipped. Types are
+compared by name, qualified expectations (``#? datetime.datetime()``) never match.
+"""
+import argparse
+import os
+import sys
+
+import sublime_stubs
+
+root_folder = sublime_stubs.root_folder
+
+CASES = """\
+arr = []
+for a in [1,2]:
+    arr.append(a);
+
+arr.append  # should not cause an exception
+arr.append()  # should not cause an exception
+
+#? int()
+arr[10]
+
+arr = [tuple()]
+for a in [1,2]:
+    arr.append(a);
+
+#? int() tuple()
+arr[10]
+#? int()
+arr[10].index()
+
+arr = list([])
+arr.append(1)
+#? int()
+arr[0]
+
+arr = [""]
+arr.insert(0, 1.0)
+
+#? float() str()
+arr[10]
+
+for a in arr:
+    #? float() str()
+    a
+
+#? float() str()
+list(arr)[10]
+
+arr = [1.0]
+arr.extend([1,2,3])
+arr.extend([])
+arr.extend("")
+arr.extend(list)  # should ignore
+
+#? float() int() str()
+arr[100]
+
+a = set(arr)
+a.update(list(["", 1]))
+
+#? float() int() str()
+list(a)[0]
+
+st = set()
+st.add(1)
+
+#? int()
+for s in st: s
+
+x = []
+x.append(1.0)
+#? float()
+x.pop()
+
+def blub():
+    a = []
+    a.append(1)
+    return a
+
+#? int()
+blub()[0]
+"""
+
+
+def parse_cases(source):
+    """Find the annotated expressions of a case file.
+
+    Parameters
+    ----------
+    source : str
+        The source code with ``#?`` annotations.
+
+    Returns
+    -------
+    list
+        ``(line, column, expected)`` tuples: the end of the annotated line (1 based line,
+        0 based column) and the sorted expected type names. Completion annotations
+        (``#? ['name']``) are skipped.
+    """
+    cases = []
+    lines = source.splitlines()
+
+    for index, line in enumerate(lines[:-1]):
+        stripped = line.strip()
+
+        if not stripped.startswith("#?"):
+            continue
+
+        annotation = stripped[2:].strip()
+
+        if annotation.startswith("[") or not all(t.endswith("()") for t in annotation.split()):
+            continue
+
+        # Like Jedi's integration tests, an optional column follows ``#?``.
+        column = len(lines[index + 1].rstrip())
+        words = annotation.split()
+
+        if words and words[0].isdigit():
+            column = int(words.pop(0))
+
+        cases.append((index + 2, column, sorted(words)))
+
+    return cases
+
+
+def _describe(definitions):
+    return sorted(d.name + "()" for d in definitions if d.type == "instance")
+
+
+def check(source, path, session):
+    """Infer the cases of a file with fresh scripts and with a session.
+
+    Parameters
+    ----------
+    source : str
+        The source code with ``#?`` annotations.
+    path : str
+        The path used for the scripts.
+    session : st_plugins.session.JediSession
+        The session, it is reused for all the files.
+
+    Returns
+    -------
+    list
+        ``(line, mode, expected, inferred)`` tuples of the wrong results.
+    """
+    failures = []
+
+    for line, column, expected in parse_cases(source):
+        fresh = jedi.Script(source, path=path).infer(line, column)
+        script = session.script(source, line, column, filename=path)
+
+        with session.lock:
+            reused = script.infer(line, column)
+
+        for mode, definitions in (("fresh", fresh), ("session", reused)):
+            inferred = _describe(definitions)
+
+            if inferred != expected:
+                failures.append((line, mode, expected, inferred))
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", nargs="*", default=[],
+                        help="case files with #? annotations, e.g. from Jedi's test suite")
+    args = parser.parse_args()
+
+    sublime_stubs.install({"completion_server": False})
+    _import_plugin()
+
+    session = JediSession(InterpreterEnvironment(), sys.path)
+    files = [(os.path.join(root_folder, "inference_cases.py"), CASES)]
+
+    for path in args.cases:
+        with open(path) as f:
+            files.append((os.path.abspath(path), f.read()))
+
+    failed = False
+
+    for path, source in files:
+        failures = check(source, path, session)
+        print("{0}: {1} cases, {2} wrong".format(
+            os.path.basename(path), len(parse_cases(source)), len(failures)))
+
+        for line, mode, expected, inferred in failures:
+            failed = True
+            print("  line {0} ({1}): expected {2}, got {3}".format(
+                line, mode, " ".join(expected), " ".join(inferred)))
+
+    sys.exit(1 if failed else 0)
+
+
+def _import_plugin():
+    global InterpreterEnvironment, JediSession, jedi
+
+    import jedi
+    from jedi.api.environment import InterpreterEnvironment
+    from st_plugins.session import JediSession
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""Benchmark of the line differs of the parso diff parser.
+
+    python benchmarks/line_diff.py [--repeat N] [--module MODULE ...]
+
+Each file is edited like a keystroke would (one line changed, a line inserted, a line
+deleted) and like a paste would (a block moved). The line opcodes are computed by
+``difflib.SequenceMatcher``, by the prefix/suffix trimming patience differ and from the
+changed range hint. ``DiffParser.update`` is timed with each of them as well.
+
+Generated files contain many repeated lines (blank lines, ``pass``, ``)``), real-world
+files are standard library modules.
+"""
+import argparse
+import difflib
+import os
+import sys
+import sysconfig
+import time
+
+root_folder = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                            os.pardir))
+sys.path.insert(0, os.path.join(root_folder, "dependencies"))
+
+import parso  # noqa: E402
+from parso.python import diff  # noqa: E402
+from parso.utils import split_lines  # noqa: E402
+
+# Standard library modules, relative to the stdlib directory.
+MODULES = (
+    "argparse.py",
+    "typing.py",
+    "tkinter/__init__.py",
+    "_pydecimal.py",
+)
+
+
+def generate_module(classes=400):
+    """Create a module with a lot of repeated lines.
+
+    Parameters
+    ----------
+    classes : int, optional
+        The number of classes.
+
+    Returns
+    -------
+    str
+        The source code.
+    """
+    parts = []
+
+    for index in range(classes):
+        parts.append(
+            "class Generated{0}(object):\n"
+            "\n"
+            "    def method(self, value=(\n"
+            "        1,\n"
+            "    )):\n"
+            "        pass\n"
+            "\n"
+            "    def other(self):\n"
+            "        return (\n"
+            "            self.method()\n"
+            "        )\n"
+            "\n"
+            "\n".format(index)
+        )
+
+    return "".join(parts)
+
+
+def get_edits(lines):
+    """Create edited versions of lines.
+
+    Parameters
+    ----------
+    lines : list
+        The lines, with line endings.
+
+    Returns
+    -------
+    list
+        ``(name, new_lines, changed_range)`` tuples, ``changed_range`` is ``None`` when a
+        single range does not describe the edit.
+    """
+    middle = len(lines) // 2
+    edits = []
+
+    new = list(lines)
+    new[middle] = new[middle].rstrip("\r\n") + "x\n"
+    edits.append(("change line", new, (middle, middle + 1, middle + 1)))
+
+    new = list(lines)
+    new.insert(middle, "        pass\n")
+    edits.append(("insert line", new, (middle, middle, middle + 1)))
+
+    new = list(lines)
+    del new[middle]
+    edits.append(("delete line", new, (middle, middle + 1, middle)))
+
+    block = len(lines) // 10
+    new = lines[:block] + lines[middle:middle + block] + lines[block:middle] + \
+        lines[middle + block:]
+    edits.append(("move block", new, None))
+
+    return edits
+
+
+def _best_of(repeat, func):
+    best = None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best * 1000
+
+
+def _get_difflib_opcodes(old_lines, new_lines):
+    return difflib.SequenceMatcher(None, old_lines, new_lines).get_opcodes()
+
+
+def _time_update(grammar, code, new_lines, repeat, get_opcodes=None, **kwargs):
+    lines = split_lines(code, keepends=True)
+    new_code = "".join(new_lines)
+    original = diff._get_opcodes
+    best = None
+
+    if get_opcodes is not None:
+        diff._get_opcodes = get_opcodes
+
+    try:
+        for _ in range(repeat):
+            module = grammar.parse(code)
+            differ = diff.DiffParser(grammar._pgen_grammar, grammar._tokenizer, module)
+            start = time.perf_counter()
+            differ.update(lines, split_lines(new_code, keepends=True), **kwargs)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        diff._get_opcodes = original
+
+    return best * 1000
+
+
+def measure(name, code, repeat=5):
+    """Time the differs on the edits of a file.
+
+    Parameters
+    ----------
+    name : str
+        The file name, for the report.
+    code : str
+        The source code.
+    repeat : int, optional
+        The number of runs.
+
+    Returns
+    -------
+    list
+        The report lines.
+    """
+    grammar = parso.load_grammar()
+    lines = split_lines(code, keepends=True)
+    report = []
+
+    for edit, new_lines, changed_range in get_edits(lines):
+        timings = [
+            _best_of(repeat, lambda: _get_difflib_opcodes(lines, new_lines)),
+            _best_of(repeat, lambda: diff._get_opcodes(lines, new_lines)),
+        ]
+
+        if changed_range is None:
+            timings.append(float("nan"))
+        else:
+            timings.append(_best_of(repeat, lambda: diff._get_opcodes_for_range(
+                len(lines), len(new_lines), *changed_range)))
+
+        timings.append(_time_update(grammar, code, new_lines, repeat,
+                                    get_opcodes=_get_difflib_opcodes))
+        timings.append(_time_update(grammar, code, new_lines, repeat))
+
+        if changed_range is None:
+            timings.append(float("nan"))
+        else:
+            timings.append(_time_update(grammar, code, new_lines, repeat,
+                                        changed_range=changed_range))
+
+        report.append("{0:<22}{1:>7}  {2:<13}{3:>9.2f}{4:>9.2f}{5:>9.3f}{6:>9.2f}{7:>9.2f}"
+                      "{8:>9.2f}".format(name, len(lines), edit, *timings))
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measure")
+    parser.add_argument("--module", nargs="*", default=list(MODULES),
+                        help="real-world modules (stdlib relative)")
+    args = parser.parse_args()
+
+    files = [("generated", generate_module())]
+    stdlib = sysconfig.get_paths()["stdlib"]
+
+    for module in args.module:
+        with open(os.path.join(stdlib, module), encoding="utf-8") as module_file:
+            files.append((module, module_file.read()))
+
+    print("Milliseconds. The update columns time DiffParser.update with each differ.\n")
+    print("{0:<22}{1:>7}  {2:<13}{3:>9}{4:>9}{5:>9}{6:>9}{7:>9}{8:>9}".format(
+        "file", "lines", "edit", "difflib", "patience", "hint", "update", "update", "update"))
+    print("{0:<71}{1:>9}{2:>9}{3:>9}".format("", "difflib", "patience", "hint"))
+
+    for name, code in files:
+        for line in measure(name, code, args.repeat):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""Headless keystroke-replay benchmark of the Jedi request path.
+
+Editing sessions are replayed against ``daemon.Daemon`` (and so ``facade.JediFacade``)
+through ``daemon.ask_daemon_sync``, with the Sublime Text API replaced by
+``sublime_stubs``. Run it with an interpreter supported by the vendored Jedi::
+
+    python benchmarks/replay.py run [--sessions FILE] [--corpus MODULE ...] [--out FILE]
+    python benchmarks/replay.py compare BASE.json HEAD.json [--threshold PERCENT]
+
+A session is a JSON object::
+
+    {"name": str, "filename": str, "text": str,
+     "steps": [{"edit": [begin, end, text] | "text": str, "location": int,
+                "request": "autocomplete" | "funcargs" | null}, ...]}
+
+Each step changes the buffer (``edit`` replaces ``text[begin:end]``, ``text`` replaces the
+whole buffer), moves the cursor to ``location`` and sends ``request``, if any. Without
+``--sessions``, sessions are synthesized from the corpus: lines of the corpus modules are
+erased and typed again one character at a time.
+
+``compare`` exits with status 1 if a latency percentile of HEAD is more than ``threshold``
+percent slower than BASE, or if HEAD invokes Jedi more often.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import sysconfig
+import time
+
+import sublime_stubs
+
+# Bundled corpus: standard library modules, relative to the stdlib directory.
+CORPUS = (
+    "json/decoder.py",
+    "argparse.py",
+    "collections/__init__.py",
+    "email/message.py",
+    "http/client.py",
+)
+PERCENTILES = (50, 95, 99)
+
+
+def synthesize_session(path, lines=5, seed=0):
+    """Create a typing session from a module.
+
+    Parameters
+    ----------
+    path : str
+        Path to a Python module.
+    lines : int, optional
+        The number of lines typed again.
+    seed : int, optional
+        Random seed choosing the lines.
+
+    Returns
+    -------
+    dict
+        The session.
+    """
+    with open(path, encoding="utf-8") as module:
+        text = module.read()
+
+    offsets = []
+    position = 0
+
+    for line in text.splitlines(True):
+        content = line.strip()
+
+        if (line.startswith((" ", "\t")) and 10 <= len(content) <= 80 and
+                not content.startswith(("#", '"', "'"))):
+            offsets.append((position + len(line) - len(line.lstrip()), content))
+
+        position += len(line)
+
+    steps = []
+
+    for begin, content in sorted(random.Random(seed).sample(offsets, min(lines, len(offsets)))):
+        # Erase the line, then type it again.
+        steps.append({"edit": [begin, begin + len(content), ""], "location": begin,
+                      "request": None})
+
+        for index, char in enumerate(content):
+            if char == "(":
+                request = "funcargs"
+            elif char.isalnum() or char in "_.":
+                request = "autocomplete"
+            else:
+                request = None
+
+            steps.append({"edit": [begin + index, begin + index, char],
+                          "location": begin + index + 1, "request": request})
+
+    return {"name": os.path.basename(path), "filename": path, "text": text, "steps": steps}
+
+
+def _stats(samples):
+    samples = sorted(samples)
+
+    if not samples:
+        return {"count": 0}
+
+    stats = {"count": len(samples),
+             "mean": round(sum(samples) / len(samples), 3),
+             "max": round(samples[-1], 3)}
+
+    for p in PERCENTILES:
+        stats["p{0}".format(p)] = round(metrics.percentile(samples, p), 3)
+
+    return stats
+
+
+def get_peak_rss():
+    """Get the peak resident memory of the process.
+
+    Returns
+    -------
+    int
+        Bytes. 0 if unknown.
+    """
+    try:
+        import resource
+    except ImportError:
+        return 0
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class _InvocationCounter():
+    def __init__(self, names):
+        from jedi.api import Script
+
+        self.counts = dict.fromkeys(names, 0)
+
+        for name in names:
+            setattr(Script, name, self._wrap(name, getattr(Script, name)))
+
+    def _wrap(self, name, method):
+        def _counted(*args, **kwargs):
+            self.counts[name] += 1
+            return method(*args, **kwargs)
+
+        return _counted
+
+
+def _refine(view, cache):
+    # Like SublimePythonJediForkCompletions: the best ranked of the refined completions
+    # get their type if they don't have one yet, with one request per identifier.
+    completions = cache.refine()
+    precise_types = daemon.settings.get("precise_completion_types", -1)
+
+    if precise_types >= 0:
+        names = cache.get_untyped(completions[:precise_types])
+
+        if names:
+            cache.set_types(cache.start, daemon.ask_daemon_sync(
+                view, "completion_types", {"names": names}, cache.start))
+
+
+def replay(sessions, refine=True, prewarm=False):
+    """Replay editing sessions.
+
+    Parameters
+    ----------
+    sessions : list
+        The sessions.
+    refine : bool, optional
+        Refine cached completions while an identifier is typed, like the completion
+        listener does, instead of requesting each keystroke.
+    prewarm : bool, optional
+        Pre-warm each session before replaying it.
+
+    Returns
+    -------
+    dict
+        The results.
+    """
+    counter = _InvocationCounter(("complete", "call_signatures"))
+    latencies = {}
+    window = sublime_stubs.Window()
+
+    for session in sessions:
+        view = sublime_stubs.View(window, session["text"], session.get("filename") or None)
+        cache = CompletionCache()
+
+        if prewarm:
+            daemon.ask_daemon_sync(view, "prewarm", {}, 0)
+
+        for step in session["steps"]:
+            if "text" in step:
+                view.set_text(step["text"])
+            else:
+                begin, end, text = step["edit"]
+                view.replace(begin, end, text)
+
+            location = step["location"]
+            view.set_cursor(location)
+            request = step.get("request")
+
+            if request is None:
+                continue
+
+            start = time.perf_counter()
+
+            if request == "autocomplete" and refine:
+                if not (cache.match(view, location) and cache.candidates is not None):
+                    identifier_start = cache.reset(view, location)
+                    cache.set_candidates(identifier_start, daemon.ask_daemon_sync(
+                        view, request, {"prefix": cache.prefix}, identifier_start) or [])
+
+                _refine(view, cache)
+            else:
+                daemon.ask_daemon_sync(view, request, {}, location)
+
+            latencies.setdefault(request, []).append((time.perf_counter() - start) * 1000)
+
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "refine": refine,
+            "prewarm": prewarm,
+            "sessions": [session["name"] for session in sessions],
+        },
+        "keystrokes": sum(len(samples) for samples in latencies.values()),
+        "latency": {request: _stats(samples) for request, samples in latencies.items()},
+        "stages": metrics.METRICS.get_histograms(),
+        "jedi_invocations": counter.counts,
+        "peak_rss": get_peak_rss(),
+    }
+
+
+def compare(base, head, threshold):
+    """Compare two runs.
+
+    Parameters
+    ----------
+    base : dict
+        The reference results.
+    head : dict
+        The results to check.
+    threshold : float
+        Tolerated slowdown, in percent.
+
+    Returns
+    -------
+    tuple
+        The report lines and whether HEAD regressed.
+    """
+    lines = ["{0:<14}{1:<18}{2:>12}{3:>12}{4:>10}".format("request", "metric", "base",
+                                                           "head", "change")]
+    regressed = False
+
+    def _line(label, metric, old, new, gate):
+        nonlocal regressed
+
+        change = (new - old) * 100.0 / old if old else 0.0
+        flag = ""
+
+        if gate and change > threshold:
+            regressed = True
+            flag = "  REGRESSION"
+
+        lines.append("{0:<14}{1:<18}{2:>12.1f}{3:>12.1f}{4:>9.1f}%{5}".format(
+            label, metric, old, new, change, flag))
+
+    for request in sorted(set(base["latency"]) | set(head["latency"])):
+        old = base["latency"].get(request, {})
+        new = head["latency"].get(request, {})
+
+        for metric in ["p{0}".format(p) for p in PERCENTILES] + ["mean"]:
+            if metric in old and metric in new:
+                _line(request, metric, old[metric], new[metric], metric != "mean")
+
+    for name in sorted(head["jedi_invocations"]):
+        old = base["jedi_invocations"].get(name, 0)
+        new = head["jedi_invocations"][name]
+        _line("jedi", name, old, new, False)
+
+        if new > old:
+            regressed = True
+            lines[-1] += "  REGRESSION"
+
+    _line("process", "rss MB", base["peak_rss"] / 1048576.0, head["peak_rss"] / 1048576.0,
+          False)
+
+    return lines, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command")
+
+    run_parser = commands.add_parser("run", help="replay sessions")
+    run_parser.add_argument("--sessions", help="JSON file with a list of sessions")
+    run_parser.add_argument("--corpus", nargs="*", default=list(CORPUS),
+                            help="modules to synthesize sessions from (stdlib relative)")
+    run_parser.add_argument("--lines", type=int, default=5, help="lines typed per module")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--no-refine", action="store_true",
+                            help="request completions on every keystroke")
+    run_parser.add_argument("--prewarm", action="store_true")
+    run_parser.add_argument("--settings", default="{}", help="plugin settings as JSON")
+    run_parser.add_argument("--out", help="write the results to this JSON file")
+
+    compare_parser = commands.add_parser("compare", help="compare two runs")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument("--threshold", type=float, default=10.0,
+                                help="tolerated slowdown in percent")
+
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.base) as base, open(args.head) as head:
+            lines, regressed = compare(json.load(base), json.load(head), args.threshold)
+
+        print("\n".join(lines))
+        sys.exit(1 if regressed else 0)
+
+    if args.command != "run":
+        parser.print_help()
+        sys.exit(2)
+
+    settings = json.loads(args.settings)
+    # The completion server runs Jedi in another process, out of reach of the counters.
+    settings["completion_server"] = False
+    sublime_stubs.install(settings)
+    _import_plugin()
+
+    if args.sessions:
+        with open(args.sessions) as sessions_file:
+            sessions = json.load(sessions_file)
+    else:
+        stdlib = sysconfig.get_paths()["stdlib"]
+        sessions = [synthesize_session(os.path.join(stdlib, module), args.lines, args.seed)
+                    for module in args.corpus]
+
+    results = replay(sessions, refine=not args.no_refine, prewarm=args.prewarm)
+    output = json.dumps(results, indent=2, sort_keys=True)
+
+    if args.out:
+        with open(args.out, "w") as out:
+            out.write(output)
+
+    print(output)
+
+
+def _import_plugin():
+    global CompletionCache, daemon, metrics
+
+    from st_plugins import daemon
+    from st_plugins import metrics
+    from st_plugins.completion_cache import CompletionCache
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""Parse time and memory of library modules: full trees vs. skeletons.
+
+    python benchmarks/skeleton_parse.py [--path DIR] [--limit N]
+
+The modules of ``--path`` (the standard library by default) are parsed once with full trees
+and once as skeletons, the function bodies of the latter are not parsed. The memory is the
+size of the trees allocated while parsing, measured with ``tracemalloc``.
+"""
+import argparse
+import glob
+import os
+import sys
+import sysconfig
+import time
+import tracemalloc
+
+root_folder = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                            os.pardir))
+sys.path.insert(0, os.path.join(root_folder, "dependencies"))
+
+import parso  # noqa: E402
+
+
+def measure(grammar, sources, skeleton):
+    """Parse all the sources and keep the trees.
+
+    Parameters
+    ----------
+    grammar : parso.Grammar
+        The grammar to parse with.
+    sources : list
+        The source code of the modules.
+    skeleton : bool
+        Whether function bodies are skipped.
+
+    Returns
+    -------
+    tuple
+        The time in seconds and the memory of the trees in bytes.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    modules = [grammar.parse(source, skeleton=skeleton) for source in sources]
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del modules
+
+    # tracemalloc slows down the parser, time it again without.
+    start = time.perf_counter()
+    for source in sources:
+        grammar.parse(source, skeleton=skeleton)
+
+    return min(elapsed, time.perf_counter() - start), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default=sysconfig.get_paths()["stdlib"],
+                        help="directory of the modules")
+    parser.add_argument("--limit", type=int, default=200, help="number of modules")
+    args = parser.parse_args()
+
+    sources = []
+
+    for path in sorted(glob.glob(os.path.join(args.path, "*.py")))[:args.limit]:
+        with open(path, "rb") as source_file:
+            sources.append(source_file.read())
+
+    grammar = parso.load_grammar()
+    full_time, full_size = measure(grammar, sources, skeleton=False)
+    skeleton_time, skeleton_size = measure(grammar, sources, skeleton=True)
+
+    print("{0} modules, {1:.1f} MB of source".format(
+        len(sources), sum(len(s) for s in sources) / (1024.0 * 1024.0)))
+    print("{0:<10}{1:>10}{2:>12}".format("", "time s", "memory MB"))
+
+    for name, elapsed, size in (("full", full_time, full_size),
+                                ("skeleton", skeleton_time, skeleton_size)):
+        print("{0:<10}{1:>10.2f}{2:>12.1f}".format(name, elapsed, size / (1024.0 * 1024.0)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""Stand-ins for the Sublime Text API, enough to run the Jedi request path headless.
+
+:py:func:`install` must be called before importing anything from ``st_plugins``.
+"""
+import bisect
+import itertools
+import json
+import logging
+import os
+import re
+import sys
+import types
+
+root_folder = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                            os.pardir))
+
+_view_ids = itertools.count(1)
+_window_ids = itertools.count(1)
+
+
+class Region():
+    def __init__(self, a, b=None):
+        self.a = a
+        self.b = a if b is None else b
+
+    def begin(self):
+        return min(self.a, self.b)
+
+    def end(self):
+        return max(self.a, self.b)
+
+    def size(self):
+        return self.end() - self.begin()
+
+
+class _Position():
+    def __init__(self, row, col):
+        self.row = row
+        self.col = col
+
+
+class _TextChange():
+    def __init__(self, a, b, text):
+        self.a = a
+        self.b = b
+        self.str = text
+
+
+class _Buffer():
+    def __init__(self, view):
+        self._view = view
+
+    def id(self):
+        return self._view.buffer_id()
+
+    def primary_view(self):
+        return self._view
+
+
+class Window():
+    def __init__(self):
+        self._id = next(_window_ids)
+        self.views = []
+
+    def id(self):
+        return self._id
+
+    def active_view(self):
+        return self.views[-1] if self.views else None
+
+
+class View():
+    """A view holding a buffer that is edited programmatically.
+
+    Edits are reported to the ``TextChangeListener`` classes defined by the plugin, like
+    Sublime Text 4 does.
+    """
+
+    def __init__(self, window, text="", filename=None):
+        self._id = next(_view_ids)
+        self._window = window
+        self._filename = filename
+        self._text = ""
+        self._line_starts = [0]
+        self._change_count = 0
+        self._selection = [Region(0)]
+        self._settings = {}
+        self._listeners = [cls() for cls in _text_change_listeners]
+
+        for listener in self._listeners:
+            listener.buffer = _Buffer(self)
+
+        window.views.append(self)
+        self.replace(0, 0, text)
+
+    def id(self):
+        return self._id
+
+    def buffer_id(self):
+        return self._id
+
+    def window(self):
+        return self._window
+
+    def file_name(self):
+        return self._filename
+
+    def settings(self):
+        return self._settings
+
+    def change_count(self):
+        return self._change_count
+
+    def size(self):
+        return len(self._text)
+
+    def sel(self):
+        return self._selection
+
+    def set_cursor(self, point):
+        self._selection = [Region(point)]
+
+    def substr(self, x):
+        if isinstance(x, Region):
+            return self._text[x.begin():x.end()]
+
+        return self._text[x:x + 1] if 0 <= x < len(self._text) else "\x00"
+
+    def rowcol(self, point):
+        row = bisect.bisect_right(self._line_starts, point) - 1
+        return row, point - self._line_starts[row]
+
+    def text_point(self, row, col):
+        if row >= len(self._line_starts):
+            return len(self._text)
+
+        return min(self._line_starts[row] + col, len(self._text))
+
+    def line(self, x):
+        point = x.begin() if isinstance(x, Region) else x
+        row, _ = self.rowcol(point)
+        end = self._text.find("\n", self._line_starts[row])
+
+        return Region(self._line_starts[row], len(self._text) if end < 0 else end)
+
+    def full_line(self, x):
+        line = self.line(x)
+        return Region(line.begin(), min(line.end() + 1, len(self._text)))
+
+    def score_selector(self, point, selector):
+        return 1
+
+    def match_selector(self, point, selector):
+        return True
+
+    def set_status(self, key, value):
+        pass
+
+    def erase_status(self, key):
+        pass
+
+    def is_auto_complete_visible(self):
+        return False
+
+    def run_command(self, name, args=None):
+        pass
+
+    def replace(self, begin, end, text):
+        """Replace the text between two points, as typing or pasting would.
+
+        Parameters
+        ----------
+        begin : int
+            Start point.
+        end : int
+            End point.
+        text : str
+            The new text.
+        """
+        change = _TextChange(_Position(*self.rowcol(begin)), _Position(*self.rowcol(end)), text)
+        self._text = self._text[:begin] + text + self._text[end:]
+        self._line_starts = [0] + [m.end() for m in re.finditer("\n", self._text)]
+        self._change_count += 1
+
+        for listener in self._listeners:
+            listener.on_text_changed([change])
+
+    def set_text(self, text):
+        """Replace the buffer with a new state, as the smallest single edit.
+
+        Parameters
+        ----------
+        text : str
+            The new buffer text.
+        """
+        old = self._text
+
+        if old == text:
+            return
+
+        prefix = 0
+        limit = min(len(old), len(text))
+
+        while prefix < limit and old[prefix] == text[prefix]:
+            prefix += 1
+
+        suffix = 0
+
+        while (suffix < limit - prefix and
+               old[len(old) - suffix - 1] == text[len(text) - suffix - 1]):
+            suffix += 1
+
+        self.replace(prefix, len(old) - suffix, text[prefix:len(text) - suffix])
+
+
+class _Settings(dict):
+    def has_changed(self, key):
+        return False
+
+
+_text_change_listeners = []
+
+
+def _load_default_settings():
+    path = os.path.join(root_folder, "SublimePythonJediFork.sublime-settings")
+
+    with open(path) as settings_file:
+        content = settings_file.read()
+
+    # Drop the comments and trailing commas the settings file format allows.
+    content = re.sub(r"^\s*//.*$", "", content, flags=re.MULTILINE)
+    content = re.sub(r",(\s*[}\]])", r"\1", content)
+
+    return json.loads(content)
+
+
+def install(settings=None):
+    """Register the stand-in modules.
+
+    Parameters
+    ----------
+    settings : dict, None, optional
+        Plugin settings overriding the defaults.
+
+    Returns
+    -------
+    dict
+        The plugin settings in use.
+    """
+    sys.path.insert(0, os.path.join(root_folder, "dependencies"))
+
+    sublime = types.ModuleType("sublime")
+    sublime.Region = Region
+    sublime.INHIBIT_WORD_COMPLETIONS = 8
+    sublime.INHIBIT_EXPLICIT_COMPLETIONS = 16
+    sublime.platform = lambda: {"darwin": "osx", "win32": "windows"}.get(sys.platform, "linux")
+    sublime.windows = lambda: []
+    sublime.active_window = lambda: None
+    sublime.set_timeout = lambda callback, delay=0: callback()
+    sublime.set_timeout_async = lambda callback, delay=0: callback()
+    sys.modules["sublime"] = sublime
+
+    sublime_plugin = types.ModuleType("sublime_plugin")
+
+    class TextChangeListener():
+        def __init_subclass__(cls, **kwargs):
+            super().__init_subclass__(**kwargs)
+            _text_change_listeners.append(cls)
+
+    sublime_plugin.TextChangeListener = TextChangeListener
+    sublime_plugin.EventListener = object
+    sublime_plugin.ViewEventListener = object
+    sublime_plugin.TextCommand = object
+    sublime_plugin.WindowCommand = object
+    sys.modules["sublime_plugin"] = sublime_plugin
+
+    events = types.ModuleType("python_utils.sublime_text_utils.events")
+    events.on = lambda event: (lambda func: func)
+    events.off = lambda func: None
+    events.broadcast = lambda event, **kwargs: None
+    queue = types.ModuleType("python_utils.sublime_text_utils.queue")
+    queue.debounce = lambda callback, delay=0, key=None: callback()
+    utils = types.ModuleType("python_utils.sublime_text_utils.utils")
+    utils.get_view_context = lambda view: {}
+    utils.substitute_variables = lambda context, value: value
+
+    for name, module in (("python_utils", types.ModuleType("python_utils")),
+                         ("python_utils.sublime_text_utils",
+                          types.ModuleType("python_utils.sublime_text_utils")),
+                         ("python_utils.sublime_text_utils.events", events),
+                         ("python_utils.sublime_text_utils.queue", queue),
+                         ("python_utils.sublime_text_utils.utils", utils)):
+        module.__path__ = []
+        sys.modules[name] = module
+
+    plugin_settings = _Settings(_load_default_settings())
+    plugin_settings.update(settings or {})
+
+    package = types.ModuleType("st_plugins")
+    package.__path__ = [os.path.join(root_folder, "st_plugins")]
+    package.root_folder = root_folder
+    package.logger = logging.getLogger("SublimePythonJediFork")
+    package.settings = plugin_settings
+    package.is_repl = lambda view: False
+    package.is_desired_scope = lambda view: True
+    sys.modules["st_plugins"] = package
+
+    return plugin_settings
+
+
+if __name__ == "__main__":
+    pass
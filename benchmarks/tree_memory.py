@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""Memory of the parso trees of the standard library.
+
+    python benchmarks/tree_memory.py [--path DIR] [--limit N]
+
+The modules of ``--path`` (the standard library by default) are parsed and kept, like in
+the parser cache. The trees are measured with ``tracemalloc``, once as parsed and once
+loaded from their pickles (the on-disk cache). The leaf strings are counted to show how
+many of them are shared.
+"""
+import argparse
+import glob
+import os
+import pickle
+import sys
+import sysconfig
+import tracemalloc
+
+root_folder = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                            os.pardir))
+sys.path.insert(0, os.path.join(root_folder, "dependencies"))
+
+import parso  # noqa: E402
+
+
+def _iter_leaves(node):
+    try:
+        children = node.children
+    except AttributeError:
+        yield node
+    else:
+        for child in children:
+            for leaf in _iter_leaves(child):
+                yield leaf
+
+
+def _traced(func):
+    tracemalloc.start()
+    result = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def count_strings(modules):
+    """Count the leaves and the string objects they refer to.
+
+    Parameters
+    ----------
+    modules : list
+        The parsed modules.
+
+    Returns
+    -------
+    tuple
+        The number of leaves, of distinct string objects and of distinct strings, for the
+        values and prefixes together.
+    """
+    leaves = 0
+    objects = set()
+    strings = set()
+
+    for module in modules:
+        for leaf in _iter_leaves(module):
+            leaves += 1
+
+            for string in (leaf.value, leaf.prefix):
+                objects.add(id(string))
+                strings.add(string)
+
+    return leaves, len(objects), len(strings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default=sysconfig.get_paths()["stdlib"],
+                        help="directory of the modules")
+    parser.add_argument("--limit", type=int, default=200, help="number of modules")
+    args = parser.parse_args()
+
+    sources = []
+
+    for path in sorted(glob.glob(os.path.join(args.path, "*.py")))[:args.limit]:
+        with open(path, "rb") as source_file:
+            sources.append(source_file.read())
+
+    grammar = parso.load_grammar()
+    modules, parsed_size = _traced(lambda: [grammar.parse(source) for source in sources])
+    pickles = [pickle.dumps(module, pickle.HIGHEST_PROTOCOL) for module in modules]
+    loaded, loaded_size = _traced(lambda: [pickle.loads(data) for data in pickles])
+    leaves, objects, strings = count_strings(modules)
+
+    megabyte = 1024.0 * 1024.0
+    print("{0} modules, {1:.1f} MB of source, {2} leaves".format(
+        len(sources), sum(len(s) for s in sources) / megabyte, leaves))
+    print("parsed:   {0:.1f} MB, {1:.0f} bytes per leaf".format(
+        parsed_size / megabyte, float(parsed_size) / leaves))
+    print("unpickled: {0:.1f} MB, {1:.0f} bytes per leaf".format(
+        loaded_size / megabyte, float(loaded_size) / leaves))
+    print("leaf strings: {0} objects for {1} distinct values and prefixes".format(
+        objects, strings))
+
+
+if __name__ == "__main__":
+    main()
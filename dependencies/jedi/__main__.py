@@ -52,6 +52,21 @@ def _complete():
         pdb.post_mortem()
 
 
+def _typeshed_index():
+    """
+    Writes the typeshed stub index, or only checks it with ``--check``.
+    """
+    from jedi.inference.gradual import typeshed
+
+    if '--check' in sys.argv:
+        if not typeshed.check_stub_index():
+            print('%s is out of date, run "python -m jedi typeshed-index"'
+                  % typeshed.STUB_INDEX_PATH)
+            sys.exit(1)
+    else:
+        typeshed.write_stub_index()
+
+
 if len(sys.argv) == 2 and sys.argv[1] == 'repl':
     # don't want to use __main__ only for repl yet, maybe we want to use it for
     # something else. So just use the keyword ``repl`` for now.
@@ -60,3 +75,5 @@ elif len(sys.argv) > 1 and sys.argv[1] == 'linter':
     _start_linter()
 elif len(sys.argv) > 1 and sys.argv[1] == '_complete':
     _complete()
+elif len(sys.argv) > 1 and sys.argv[1] == 'typeshed-index':
+    _typeshed_index()
@@ -32,7 +32,7 @@ from jedi.api.environment import InterpreterEnvironment
 from jedi.api.project import get_default_project, Project
 from jedi.inference import InferenceState
 from jedi.inference import imports
-from jedi.inference.references import find_references
+from jedi.inference.references import iter_references
 from jedi.inference.arguments import try_iter_content
 from jedi.inference.helpers import get_module_names, infer_call_of_leaf
 from jedi.inference.sys_path import transform_path_to_dotted
@@ -87,12 +87,13 @@ class Script(object):
     """
     def __init__(self, source=None, line=None, column=None, path=None,
                  encoding='utf-8', sys_path=None, environment=None,
-                 _project=None):
+                 _project=None, _inference_state=None, _code_lines=None,
+                 _diff_hint=None, _document_id=None):
         self._orig_path = path
         # An empty path (also empty string) should always result in no path.
         self.path = os.path.abspath(path) if path else None
 
-        if source is None:
+        if source is None and _code_lines is None:
             # TODO add a better warning than the traceback!
             with open(path, 'rb') as f:
                 source = f.read()
@@ -103,18 +104,24 @@ class Script(object):
         if sys_path is not None and not is_py3:
             sys_path = list(map(force_unicode, sys_path))
 
-        project = _project
-        if project is None:
-            # Load the Python grammar of the current interpreter.
-            project = get_default_project(
-                os.path.dirname(self.path)if path else os.getcwd()
+        if _inference_state is not None:
+            # Reuse an inference state of a previous script (editors keep one
+            # per project). Its project, environment and sys path win.
+            _inference_state.prepare_for_script(self.path)
+            self._inference_state = _inference_state
+        else:
+            project = _project
+            if project is None:
+                # Load the Python grammar of the current interpreter.
+                project = get_default_project(
+                    os.path.dirname(self.path)if path else os.getcwd()
+                )
+            # TODO deprecate and remove sys_path from the Script API.
+            if sys_path is not None:
+                project._sys_path = sys_path
+            self._inference_state = InferenceState(
+                project, environment=environment, script_path=self.path
             )
-        # TODO deprecate and remove sys_path from the Script API.
-        if sys_path is not None:
-            project._sys_path = sys_path
-        self._inference_state = InferenceState(
-            project, environment=environment, script_path=self.path
-        )
         debug.speed('init')
         self._module_node, source = self._inference_state.parse_and_get_code(
             code=source,
@@ -124,9 +131,15 @@ class Script(object):
             cache=False,  # No disk cache, because the current script often changes.
             diff_cache=settings.fast_parser,
             cache_path=settings.cache_directory,
+            lines=_code_lines,
+            diff_hint=_diff_hint,
+            # Editors identify their buffers, untitled ones don't have a path.
+            document_id=_document_id,
         )
         debug.speed('parsed')
-        self._code_lines = parso.split_lines(source, keepends=True)
+        if _code_lines is None or len(source) >= settings._cropped_file_size:
+            _code_lines = parso.split_lines(source, keepends=True)
+        self._code_lines = _code_lines
         self._code = source
         self._pos = line, column
 
@@ -359,19 +372,44 @@ class Script(object):
             builtin (e.g. ``sys``) and in that case does not return it.
         :rtype: list of :class:`classes.Definition`
         """
+        definitions = [
+            d
+            for definitions in self.iter_references(line, column, **kwargs)
+            for d in definitions
+        ]
+        return helpers.sorted_definitions(definitions)
+
+    @validate_line_column
+    def iter_references(self, line=None, column=None, **kwargs):
+        """
+        Like :meth:`get_references`, but yields the references as soon as they
+        are found, by sorted lists: first the definitions and the references
+        in this file, then the new references of each module searched in.
+        Closing the generator stops the search.
+
+        :param include_builtins: Default True, see :meth:`get_references`.
+        :param limit: Default None, stops after yielding this many references.
+        :rtype: iterator of lists of :class:`classes.Definition`
+        """
 
-        def _references(include_builtins=True):
+        def _references(include_builtins=True, limit=None):
             tree_name = self._module_node.get_name_of_position((line, column))
             if tree_name is None:
                 # Must be syntax
-                return []
-
-            names = find_references(self._get_module_context(), tree_name)
-
-            definitions = [classes.Definition(self._inference_state, n) for n in names]
-            if not include_builtins:
-                definitions = [d for d in definitions if not d.in_builtin_module()]
-            return helpers.sorted_definitions(definitions)
+                return
+
+            count = 0
+            for names in iter_references(self._get_module_context(), tree_name):
+                definitions = [classes.Definition(self._inference_state, n) for n in names]
+                if not include_builtins:
+                    definitions = [d for d in definitions if not d.in_builtin_module()]
+                if limit is not None:
+                    definitions = definitions[:limit - count]
+                if definitions:
+                    count += len(definitions)
+                    yield helpers.sorted_definitions(definitions)
+                if limit is not None and count >= limit:
+                    return
         return _references(**kwargs)
 
     def call_signatures(self):
@@ -1,4 +1,17 @@
+import os
+import time
+from collections import OrderedDict
+
 _cache = {}
+# Types of the completions of compiled modules and of files other than the
+# script, by (environment executable, path, modification time, qualified
+# names). The least recently used ones are dropped beyond _MAX_TYPES.
+_types = OrderedDict()
+_MAX_TYPES = 10000
+# Modification times of the files of these completions, checked at most every
+# _MTIME_VALIDITY seconds: the completions of a module share them.
+_mtimes = {}  # Path -> (time checked, modification time)
+_MTIME_VALIDITY = 1.0
 
 
 def save_entry(module_name, name, cache):
@@ -20,6 +33,45 @@ def _create_get_from_cache(number):
     return _get_from_cache
 
 
+def get_known_type(key):
+    try:
+        type_ = _types.pop(key)
+    except KeyError:
+        return None
+    _types[key] = type_
+    return type_
+
+
+def save_type(key, type_):
+    _types.pop(key, None)
+    _types[key] = type_
+    while len(_types) > _MAX_TYPES:
+        _types.popitem(last=False)
+
+
+def get_modification_time(path):
+    """
+    Returns the modification time of a file, None if it doesn't exist.
+    """
+    now = time.time()
+    try:
+        checked, mtime = _mtimes[path]
+    except KeyError:
+        pass
+    else:
+        if now - checked < _MTIME_VALIDITY:
+            return mtime
+
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+    if len(_mtimes) > _MAX_TYPES:
+        _mtimes.clear()
+    _mtimes[path] = now, mtime
+    return mtime
+
+
 get_type = _create_get_from_cache(0)
 get_docstring_signature = _create_get_from_cache(1)
 get_docstring = _create_get_from_cache(2)
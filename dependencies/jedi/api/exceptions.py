@@ -8,3 +8,10 @@ class InternalError(_JediError):
 
 class WrongVersion(_JediError):
     pass
+
+
+class InferenceCancelled(_JediError):
+    """
+    Raised at a cancellation checkpoint of the inference, when the check set
+    with :attr:`InferenceState.cancellation_check` returns True.
+    """
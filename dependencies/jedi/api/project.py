@@ -95,10 +95,14 @@ class Project(object):
 
     @inference_state_as_method_param_cache()
     def _get_sys_path(self, inference_state, environment=None,
-                      add_parent_paths=True, add_init_paths=False):
+                      add_parent_paths=True, add_init_paths=False,
+                      script_path=None):
         """
         Keep this method private for all users of jedi. However internally this
         one is used like a public method.
+
+        ``script_path`` is part of the signature (and therefore of the cache
+        key), because an inference state can be reused for different scripts.
         """
         suffixed = []
         prefixed = []
@@ -107,15 +111,15 @@ class Project(object):
         if self._smart_sys_path:
             prefixed.append(self._path)
 
-            if inference_state.script_path is not None:
-                suffixed += discover_buildout_paths(inference_state, inference_state.script_path)
+            if script_path is not None:
+                suffixed += discover_buildout_paths(inference_state, script_path)
 
                 if add_parent_paths:
                     # Collect directories in upward search by:
                     #   1. Skipping directories with __init__.py
                     #   2. Stopping immediately when above self._path
                     traversed = []
-                    for parent_path in traverse_parents(inference_state.script_path):
+                    for parent_path in traverse_parents(script_path):
                         if not parent_path.startswith(self._path):
                             break
                         if not add_init_paths \
@@ -64,17 +64,19 @@ that are not used are just being ignored.
 """
 import parso
 from parso import python_bytes_to_unicode
+from parso.tree import NodeOrLeaf
 from jedi.file_io import FileIO
 
 from jedi import debug
 from jedi import settings
+from jedi.api.exceptions import InferenceCancelled
 from jedi.inference import imports
 from jedi.inference import recursion
 from jedi.inference.cache import inference_state_function_cache
 from jedi.inference import helpers
 from jedi.inference.names import TreeNameDefinition
 from jedi.inference.base_value import ContextualizedNode, \
-    ValueSet, iterate_values
+    ValueSet, iterate_values, BaseValueSet
 from jedi.inference.value import ClassValue, FunctionValue
 from jedi.inference.syntax_tree import infer_expr_stmt, \
     check_tuple_assignments, tree_name_to_values
@@ -93,6 +95,9 @@ class InferenceState(object):
 
         self.latest_grammar = parso.load_grammar(version='3.7')
         self.memoize_cache = {}  # for memoize decorators
+        self._memo_index = {}  # id(module node) -> set of (function, memo key)
+        self._memo_modules = {}  # (function, memo key) -> set of id(module node)
+        self._memo_stack = []  # modules used by the memoized calls in progress
         self.module_cache = imports.ModuleCache()  # does the job of `sys.modules`.
         self.stub_module_cache = {}  # Dict[Tuple[str, ...], Optional[ModuleValue]]
         self.compiled_cache = {}  # see `inference.compiled.create()`
@@ -105,6 +110,8 @@ class InferenceState(object):
         self.access_cache = {}
         self.allow_descriptor_getattr = False
         self.flow_analysis_enabled = True
+        # A callable that returns True if the current request is obsolete.
+        self.cancellation_check = None
 
         self.reset_recursion_limitations()
 
@@ -115,6 +122,7 @@ class InferenceState(object):
     @staticmethod
     @plugin_manager.decorate()
     def execute(value, arguments):
+        value.inference_state.check_cancellation()
         debug.dbg('execute: %s %s', value, arguments)
         with debug.increase_indent_cm():
             value_set = value.py__call__(arguments=arguments)
@@ -136,15 +144,130 @@ class InferenceState(object):
         typing_module, = self.import_module((u'typing',))
         return typing_module
 
+    def check_cancellation(self):
+        """
+        A cooperative cancellation checkpoint. Raises
+        :class:`jedi.api.exceptions.InferenceCancelled` if the inference is not
+        needed anymore.
+        """
+        if self.cancellation_check is not None and self.cancellation_check():
+            debug.dbg('Inference cancelled')
+            raise InferenceCancelled()
+
     def reset_recursion_limitations(self):
         self.recursion_detector = recursion.RecursionDetector()
         self.execution_recursion_detector = recursion.ExecutionRecursionDetector(self)
 
+    def prepare_for_script(self, script_path):
+        """
+        Resets the per-script state, so that an inference state can be reused
+        for a new :class:`jedi.Script` (e.g. for the next keystroke in an
+        editor). Everything that was inferred about other modules is kept.
+        """
+        self.script_path = script_path
+        self.inferred_element_counts = {}
+        self.analysis = []
+        self.dynamic_params_depth = 0
+        self.is_analysis = False
+        self.cancellation_check = None
+        self.reset_recursion_limitations()
+
+    def start_memo(self):
+        """
+        Starts a memoized call. Returns the set that collects the modules of
+        the memoized results it uses, pass it to :meth:`index_memo`.
+        """
+        used_modules = set()
+        self._memo_stack.append(used_modules)
+        return used_modules
+
+    def end_memo(self):
+        """Ends the memoized call of the last :meth:`start_memo`."""
+        self._memo_stack.pop()
+
+    def use_memo(self, function, key):
+        """
+        Records that the memoized call in progress uses a cached result, it
+        then depends on the same modules.
+        """
+        if self._memo_stack:
+            module_ids = self._memo_modules.get((function, key))
+            if module_ids:
+                self._memo_stack[-1].update(module_ids)
+
+    def index_memo(self, function, key, value, used_modules=()):
+        """
+        Remembers which modules a memoized result was inferred from, i.e. the
+        modules of its key, of its value and of the memoized results used to
+        infer it (``used_modules``), so that :meth:`invalidate_module` only
+        has to look at these entries. Results that depend on a module through
+        others are therefore forgotten with it as well. It can be called again
+        for the same entry, e.g. for each element of a memoized generator.
+        """
+        entry = function, key
+        try:
+            known_ids = self._memo_modules[entry]
+        except KeyError:
+            known_ids = self._memo_modules[entry] = set()
+            _collect_module_ids(key, known_ids)
+            new_ids = set(known_ids)
+        else:
+            new_ids = set()
+        _collect_module_ids(value, new_ids)
+        new_ids.update(used_modules)
+        for module_id in new_ids:
+            known_ids.add(module_id)
+            try:
+                self._memo_index[module_id].add(entry)
+            except KeyError:
+                self._memo_index[module_id] = {entry}
+        if self._memo_stack:
+            # The calling memoized call depends on the same modules.
+            self._memo_stack[-1].update(known_ids)
+
+    def invalidate_changed_modules(self):
+        """
+        Forgets the modules whose files changed on disk since they were loaded
+        and everything that was inferred from them, see
+        :meth:`invalidate_module`.
+        """
+        for module_node in self.module_cache.get_changed_module_nodes():
+            self.invalidate_module(module_node)
+
+    def invalidate_module(self, module_node):
+        """
+        Forgets everything that was inferred from the tree of ``module_node``,
+        i.e. the module itself and all the memoized results that either were
+        keyed on or returned values of that module. Use this if the code of a
+        module has changed, while the rest of the inference state is reused.
+        """
+        module_nodes = {id(module_node)}
+        self.module_cache.invalidate(module_nodes)
+        for names, module in list(self.stub_module_cache.items()):
+            if module is not None:
+                module_ids = set()
+                _collect_module_ids(module, module_ids)
+                if module_ids & module_nodes:
+                    del self.stub_module_cache[names]
+
+        for entry in self._memo_index.pop(id(module_node), ()):
+            function, key = entry
+            memo = self.memoize_cache.get(function)
+            if memo is not None:
+                memo.pop(key, None)
+            # The entry is also indexed with its other modules.
+            for other_id in self._memo_modules.pop(entry, ()):
+                entries = self._memo_index.get(other_id)
+                if entries is not None:
+                    entries.discard(entry)
+
     def get_sys_path(self, **kwargs):
         """Convenience function"""
-        return self.project._get_sys_path(self, environment=self.environment, **kwargs)
+        return self.project._get_sys_path(self, environment=self.environment,
+                                          script_path=self.script_path, **kwargs)
 
     def infer(self, context, name):
+        self.check_cancellation()
         def_ = name.get_definition(import_name_always=True)
         if def_ is not None:
             type_ = def_.type
@@ -180,7 +303,11 @@ class InferenceState(object):
         return helpers.infer_call_of_leaf(context, name)
 
     def parse_and_get_code(self, code=None, path=None, encoding='utf-8',
-                           use_latest_grammar=False, file_io=None, **kwargs):
+                           use_latest_grammar=False, file_io=None, lines=None,
+                           **kwargs):
+        if lines is not None:
+            # Already split unicode lines, e.g. mirrored by an editor.
+            code = ''.join(lines)
         if code is None:
             if file_io is None:
                 file_io = FileIO(path)
@@ -190,9 +317,65 @@ class InferenceState(object):
 
         if len(code) > settings._cropped_file_size:
             code = code[:settings._cropped_file_size]
+            lines = None
+            kwargs.pop('diff_hint', None)
 
         grammar = self.latest_grammar if use_latest_grammar else self.grammar
-        return grammar.parse(code=code, path=path, file_io=file_io, **kwargs), code
+        return grammar.parse(code=code, path=path, file_io=file_io, lines=lines,
+                             **kwargs), code
 
     def parse(self, *args, **kwargs):
         return self.parse_and_get_code(*args, **kwargs)[0]
+
+
+_INFERENCE_MODULES = ('jedi.inference.', 'jedi.plugins.', 'jedi.api.')
+_SUBPROCESS_MODULE = 'jedi.inference.compiled.subprocess'
+_SKIPPED_ATTRIBUTES = frozenset([
+    'inference_state', '_inference_state', 'access_handle',
+    '_memoize_method_dct', '_predefined_names',
+])
+
+
+def _collect_module_ids(obj, module_ids, seen=None):
+    """
+    Adds the ``id()`` of the module nodes an object of the inference (a value,
+    context, name, tree node or a container of those) was created from.
+
+    This only reads the instance dictionaries: lazy values resolve themselves
+    on attribute access, which would infer (and memoize) things in the middle
+    of storing another result.
+    """
+    if seen is None:
+        seen = set()
+    if isinstance(obj, NodeOrLeaf):
+        module_ids.add(id(obj.get_root_node()))
+        return
+    if isinstance(obj, BaseValueSet):
+        obj = obj._set
+    if isinstance(obj, (tuple, list, set, frozenset)):
+        for o in obj:
+            _collect_module_ids(o, module_ids, seen)
+        return
+    module_name = type(obj).__module__
+    if isinstance(obj, type) or module_name == _SUBPROCESS_MODULE \
+            or not module_name.startswith(_INFERENCE_MODULES):
+        # Strings, numbers, classes, compiled objects and everything else that
+        # isn't created by the inference.
+        return
+    try:
+        dct = obj.__dict__
+    except AttributeError:
+        return
+
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+
+    tree_node = dct.get('tree_node')
+    if tree_node is not None:
+        # Tree values and contexts are fully described by their node.
+        module_ids.add(id(tree_node.get_root_node()))
+        return
+    for name, attribute in dct.items():
+        if name not in _SKIPPED_ATTRIBUTES and not isinstance(attribute, dict):
+            _collect_module_ids(attribute, module_ids, seen)
@@ -83,6 +83,7 @@ class HelperValueMixin(object):
         """
         :param position: Position of the last statement -> tuple of line, column
         """
+        self.inference_state.check_cancellation()
         if name_context is None:
             name_context = self
         names = self.goto(name_or_str, name_context, analysis_errors)
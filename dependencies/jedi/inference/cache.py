@@ -23,11 +23,12 @@ def _memoize_default(default=_NO_DEFAULT, inference_state_is_first_arg=False,
         def wrapper(obj, *args, **kwargs):
             # TODO These checks are kind of ugly and slow.
             if inference_state_is_first_arg:
-                cache = obj.memoize_cache
+                inference_state = obj
             elif second_arg_is_inference_state:
-                cache = args[0].memoize_cache  # needed for meta classes
+                inference_state = args[0]  # needed for meta classes
             else:
-                cache = obj.inference_state.memoize_cache
+                inference_state = obj.inference_state
+            cache = inference_state.memoize_cache
 
             try:
                 memo = cache[function]
@@ -36,12 +37,23 @@ def _memoize_default(default=_NO_DEFAULT, inference_state_is_first_arg=False,
 
             key = (obj, args, frozenset(kwargs.items()))
             if key in memo:
+                inference_state.use_memo(function, key)
                 return memo[key]
             else:
                 if default is not _NO_DEFAULT:
                     memo[key] = default
-                rv = function(obj, *args, **kwargs)
+                used_modules = inference_state.start_memo()
+                try:
+                    rv = function(obj, *args, **kwargs)
+                except Exception:
+                    # Don't keep the recursion default of an aborted call (e.g.
+                    # a cancelled inference), the cache might be reused.
+                    memo.pop(key, None)
+                    raise
+                finally:
+                    inference_state.end_memo()
                 memo[key] = rv
+                inference_state.index_memo(function, key, rv, used_modules)
                 return rv
         return wrapper
 
@@ -87,7 +99,8 @@ def inference_state_method_generator_cache():
     """
     def func(function):
         def wrapper(obj, *args, **kwargs):
-            cache = obj.inference_state.memoize_cache
+            inference_state = obj.inference_state
+            cache = inference_state.memoize_cache
             try:
                 memo = cache[function]
             except KeyError:
@@ -97,10 +110,12 @@ def inference_state_method_generator_cache():
 
             if key in memo:
                 actual_generator, cached_lst = memo[key]
+                inference_state.use_memo(function, key)
             else:
                 actual_generator = function(obj, *args, **kwargs)
                 cached_lst = []
                 memo[key] = actual_generator, cached_lst
+                inference_state.index_memo(function, key, None)
 
             i = 0
             while True:
@@ -112,11 +127,21 @@ def inference_state_method_generator_cache():
                         return
                 except IndexError:
                     cached_lst.append(_RECURSION_SENTINEL)
-                    next_element = next(actual_generator, None)
+                    used_modules = inference_state.start_memo()
+                    try:
+                        next_element = next(actual_generator, None)
+                    except Exception:
+                        # The generator is dead now, start again next time.
+                        memo.pop(key, None)
+                        raise
+                    finally:
+                        inference_state.end_memo()
                     if next_element is None:
                         cached_lst.pop()
+                        inference_state.index_memo(function, key, None, used_modules)
                         return
                     cached_lst[-1] = next_element
+                    inference_state.index_memo(function, key, next_element, used_modules)
                 yield next_element
                 i += 1
         return wrapper
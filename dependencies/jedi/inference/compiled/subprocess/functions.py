@@ -3,7 +3,7 @@ import sys
 import os
 
 from jedi._compatibility import find_module, cast_path, force_unicode, \
-    iter_modules, all_suffixes
+    iter_modules, all_suffixes, is_py3
 from jedi.inference.compiled import access
 from jedi import parser_utils
 
@@ -40,6 +40,50 @@ def get_module_info(inference_state, sys_path=None, full_name=None, **kwargs):
             sys.path = temp
 
 
+def get_module_finder_info(inference_state):
+    """
+    Returns the suffixes of the module files (extension modules, source files
+    and bytecode, in the order the path finder looks for them), the ones of
+    the source files, and the names of the modules imported by the finders
+    that come before the path finder (builtins, ...). The names are None if
+    one of these finders is unknown, and it's all None on Python 2.
+    """
+    if not is_py3:
+        return None
+
+    import importlib.machinery
+    machinery = importlib.machinery
+    claimed_names = set(sys.builtin_module_names)
+    try:
+        import _imp
+        claimed_names.update(_imp._frozen_module_names())
+    except (ImportError, AttributeError):
+        # Python < 3.11
+        pass
+
+    for finder in sys.meta_path:
+        if finder is machinery.PathFinder:
+            break
+        if finder in (machinery.BuiltinImporter, machinery.FrozenImporter):
+            continue
+        if type(finder).__name__ == 'DistutilsMetaFinder':
+            # The shim of setuptools, it only imports the modules it has a
+            # ``spec_for_`` method for.
+            claimed_names.update(
+                name[len('spec_for_'):] for name in dir(finder) if name.startswith('spec_for_')
+            )
+            continue
+        claimed_names = None
+        break
+
+    suffixes = (
+        machinery.EXTENSION_SUFFIXES
+        + machinery.SOURCE_SUFFIXES
+        + machinery.BYTECODE_SUFFIXES
+    )
+    return suffixes, machinery.SOURCE_SUFFIXES, claimed_names
+
+
 def list_module_names(inference_state, search_path):
     return [
         force_unicode(name)
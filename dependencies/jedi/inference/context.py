@@ -38,6 +38,7 @@ class AbstractContext(object):
         """
         :param position: Position of the last statement -> tuple of line, column
         """
+        self.inference_state.check_cancellation()
         if name_context is None:
             name_context = self
         names = self.goto(name_or_str, position)
@@ -0,0 +1,155 @@
+"""
+A cache of directory listings, shared by all the inference states, to find
+modules and list module names without asking the file system each time.
+
+A listing is revalidated with the modification time of its directory, at
+most every :data:`_VALIDITY` seconds. Only the names of the entries and
+whether they are directories are cached.
+"""
+import os
+import re
+import stat
+import time
+
+from jedi._compatibility import scandir, ImplicitNSInfo
+from jedi.file_io import FileIO
+from jedi.inference.cache import inference_state_function_cache
+
+_VALIDITY = 1.0
+"""
+Listings checked less than this many seconds ago are used without a
+``stat``. Modules created meanwhile are still found by the environment
+(see :func:`find_module`).
+"""
+
+_listings = {}  # Path -> _Listing
+
+
+class _Listing(object):
+    __slots__ = ('checked', 'mtime', 'entries')
+
+    def __init__(self, checked, mtime, entries):
+        self.checked = checked
+        self.mtime = mtime
+        self.entries = entries
+
+
+def _scan(path):
+    try:
+        return dict((entry.name, entry.is_dir()) for entry in scandir(path))
+    except OSError:
+        return {}
+
+
+def get_entries(path):
+    """
+    Returns a dict of the names in a directory, mapped to True for the
+    directories. A missing path is empty, like for the import system. Returns
+    None if the path is not a directory (e.g. a zip file).
+    """
+    now = time.time()
+    listing = _listings.get(path)
+    if listing is not None and now - listing.checked < _VALIDITY:
+        return listing.entries
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        mtime = None
+        entries = {}
+    else:
+        mtime = st.st_mtime
+        if not stat.S_ISDIR(st.st_mode):
+            entries = None
+        elif listing is not None and listing.mtime == mtime and listing.entries is not None:
+            entries = listing.entries
+        else:
+            entries = _scan(path)
+    _listings[path] = _Listing(now, mtime, entries)
+    return entries
+
+
+@inference_state_function_cache()
+def get_module_finder_info(inference_state):
+    """
+    See :func:`jedi.inference.compiled.subprocess.functions.get_module_finder_info`.
+    """
+    return inference_state.compiled_subprocess.get_module_finder_info()
+
+
+def _get_module_name(file_name, suffixes):
+    # The same as inspect.getmodulename with the suffixes of the environment.
+    for suffix in sorted(suffixes, key=len, reverse=True):
+        if file_name.endswith(suffix):
+            return file_name[:-len(suffix)]
+    return None
+
+
+def iter_module_names(paths, suffixes):
+    """
+    Yields the names of the modules, packages and stubs in directories. The
+    paths that are not directories (e.g. zip files) are skipped.
+
+    :param suffixes: The suffixes of the module files of the environment.
+    """
+    for path in paths:
+        entries = get_entries(path) or {}
+        for name, is_dir in entries.items():
+            if is_dir:
+                # pycache is obviously not an interestin namespace. Also the
+                # name must be a valid identifier.
+                if name != '__pycache__' and not re.search(r'\W|^\d', name):
+                    yield name
+            elif name.endswith('.pyi'):
+                if name != '__init__.pyi':
+                    yield name[:-4]
+            else:
+                module_name = _get_module_name(name, suffixes)
+                if module_name and module_name != '__init__' and '.' not in module_name:
+                    yield module_name
+
+
+def _find_file(entries, name, suffixes):
+    for suffix in suffixes:
+        if entries.get(name + suffix) is False:
+            return name + suffix, suffix
+    return None, None
+
+
+def find_module(string, full_name, paths, suffixes, source_suffixes):
+    """
+    Finds a module in the listings of directories like the path finder of
+    importlib, see :meth:`CompiledSubprocess.get_module_info`.
+
+    :param suffixes: The suffixes of the module files, in the order they are
+        looked for (extension modules, source files, bytecode).
+    :param source_suffixes: The ones of the source files, other modules are
+        loaded by the environment.
+    :return: ``(file_io or implicit namespace info or None, is_package)``, or
+        None if the listings can't tell, e.g. for zip files or modules that
+        are not found.
+    """
+    namespace_paths = []
+    for path in paths:
+        entries = get_entries(path)
+        if entries is None:
+            return None
+
+        if entries.get(string):
+            package_path = os.path.join(path, string)
+            init_name, suffix = _find_file(get_entries(package_path) or {}, '__init__', suffixes)
+            if init_name is not None:
+                if suffix not in source_suffixes:
+                    return None, True
+                return FileIO(os.path.join(package_path, init_name)), True
+            namespace_paths.append(package_path)
+
+        file_name, suffix = _find_file(entries, string, suffixes)
+        if file_name is not None:
+            if suffix not in source_suffixes:
+                return None, False
+            return FileIO(os.path.join(path, file_name)), False
+
+    if namespace_paths:
+        return ImplicitNSInfo(full_name, namespace_paths), True
+    return None
@@ -11,7 +11,7 @@ from jedi._compatibility import use_metaclass
 from jedi.inference import flow_analysis
 from jedi.inference.base_value import ValueSet, ValueWrapper, \
     LazyValueWrapper
-from jedi.parser_utils import get_cached_parent_scope
+from jedi.parser_utils import get_cached_parent_scope, get_scope_used_names
 from jedi.inference.utils import to_list
 from jedi.inference.names import TreeNameDefinition, ParamName, \
     AnonymousParamName, AbstractNameDefinition
@@ -74,7 +74,7 @@ class AbstractUsedNamesFilter(AbstractFilter):
     def __init__(self, parent_context, parser_scope):
         self._parser_scope = parser_scope
         self._module_node = self._parser_scope.get_root_node()
-        self._used_names = self._module_node.get_used_names()
+        self._used_names = get_scope_used_names(self._parser_scope)
         self.parent_context = parent_context
 
     def get(self, name, **filter_kwargs):
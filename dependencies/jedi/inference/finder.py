@@ -22,7 +22,7 @@ from jedi import settings
 from jedi.inference.arguments import TreeArguments
 from jedi.inference.value import iterable
 from jedi.inference.base_value import NO_VALUES
-from jedi.parser_utils import is_scope
+from jedi.parser_utils import is_scope, get_scope_used_names
 
 
 def filter_name(filters, name_or_str):
@@ -65,9 +65,8 @@ def check_flow_information(value, flow, search_name, pos):
     result = None
     if is_scope(flow):
         # Check for asserts.
-        module_node = flow.get_root_node()
         try:
-            names = module_node.get_used_names()[search_name.value]
+            names = get_scope_used_names(flow)[search_name.value]
         except KeyError:
             return None
         names = reversed([
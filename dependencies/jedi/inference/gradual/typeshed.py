@@ -1,16 +1,31 @@
+import json
 import os
 import re
 from functools import wraps
 
+from jedi import debug
 from jedi.file_io import FileIO
-from jedi._compatibility import FileNotFoundError, cast_path
+from jedi._compatibility import cast_path
 from jedi.parser_utils import get_cached_code_lines
+from jedi.inference import directory_cache
 from jedi.inference.base_value import ValueSet, NO_VALUES
 from jedi.inference.gradual.stub_value import TypingModuleWrapper, StubModuleValue
 from jedi.inference.value import ModuleValue
 
 _jedi_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 TYPESHED_PATH = os.path.join(_jedi_path, 'third_party', 'typeshed')
+STUB_INDEX_PATH = os.path.join(_jedi_path, 'third_party', 'typeshed_index.json')
+"""
+The prebuilt map of the stubs of each typeshed version directory, see
+:func:`write_stub_index`. Typeshed is scanned if it's missing.
+"""
+
+_STUB_INDEX_VERSION = 1
+"""
+Increment this number when the format of the stub index changes.
+"""
+
+_TYPESHED_BASES = ['stdlib', 'third_party']
 
 _IMPORT_MAP = dict(
     _collections='collections',
@@ -30,20 +45,18 @@ def _create_stub_map(directory):
     Create a mapping of an importable name in Python to a stub file.
     """
     def generate():
-        try:
-            listed = os.listdir(directory)
-        except (FileNotFoundError, OSError):
-            # OSError is Python 2
+        listed = directory_cache.get_entries(directory)
+        if not listed:
             return
 
-        for entry in listed:
+        for entry, is_dir in listed.items():
             entry = cast_path(entry)
             path = os.path.join(directory, entry)
-            if os.path.isdir(path):
+            if is_dir:
                 init = os.path.join(path, '__init__.pyi')
-                if os.path.isfile(init):
+                if _is_file(init):
                     yield entry, init
-            elif entry.endswith('.pyi') and os.path.isfile(path):
+            elif entry.endswith('.pyi'):
                 name = entry[:-4]
                 if name != '__init__':
                     yield name, path
@@ -52,20 +65,120 @@ def _create_stub_map(directory):
     return dict(generate())
 
 
-def _get_typeshed_directories(version_info):
+def _is_file(path):
+    """
+    Checks if a file exists with the cached listing of its directory, which
+    saves a stat or a failing open for each probed stub.
+    """
+    directory, name = os.path.split(path)
+    listed = directory_cache.get_entries(directory)
+    if listed is None:
+        # Not a directory, e.g. a zip file on sys.path.
+        return os.path.isfile(path)
+    return listed.get(name) is False
+
+
+def _iter_version_directories(version_info, listings):
+    """
+    Yields ``(base, directory name)`` of the stubs of a Python version, in the
+    order they override each other.
+
+    :param listings: The names in the ``stdlib`` and ``third_party``
+        directories.
+    """
     check_version_list = ['2and3', str(version_info.major)]
-    for base in ['stdlib', 'third_party']:
-        base = os.path.join(TYPESHED_PATH, base)
-        base_list = os.listdir(base)
-        for base_list_entry in base_list:
+    for base in _TYPESHED_BASES:
+        matches = []
+        for base_list_entry in listings[base]:
             match = re.match(r'(\d+)\.(\d+)$', base_list_entry)
             if match is not None:
                 if int(match.group(1)) == version_info.major \
                         and int(match.group(2)) <= version_info.minor:
-                    check_version_list.append(base_list_entry)
+                    matches.append((int(match.group(2)), base_list_entry))
+        check_version_list += [entry for _, entry in sorted(matches)]
 
         for check_version in check_version_list:
-            yield os.path.join(base, check_version)
+            yield base, check_version
+
+
+def _get_typeshed_directories(version_info):
+    listings = dict(
+        (base, os.listdir(os.path.join(TYPESHED_PATH, base)))
+        for base in _TYPESHED_BASES
+    )
+    for base, check_version in _iter_version_directories(version_info, listings):
+        yield os.path.join(TYPESHED_PATH, base, check_version)
+
+
+def create_stub_index():
+    """
+    Scans the typeshed tree for :func:`write_stub_index`. The stubs of each
+    version directory are mapped to their paths relative to ``stdlib`` or
+    ``third_party``, with ``/`` as separator.
+    """
+    stubs = {}
+    for base in _TYPESHED_BASES:
+        base_path = os.path.join(TYPESHED_PATH, base)
+        stubs[base] = directories = {}
+        for entry in os.listdir(base_path):
+            directory = os.path.join(base_path, entry)
+            if os.path.isdir(directory):
+                directories[cast_path(entry)] = dict(
+                    (name, os.path.relpath(path, base_path).replace(os.sep, '/'))
+                    for name, path in _create_stub_map(directory).items()
+                )
+    return {'version': _STUB_INDEX_VERSION, 'stubs': stubs}
+
+
+def _read_stub_index():
+    try:
+        with open(STUB_INDEX_PATH) as f:
+            index = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get('version') != _STUB_INDEX_VERSION:
+        return None
+    return index
+
+
+def write_stub_index():
+    """
+    Writes the stub index of the typeshed tree to :data:`STUB_INDEX_PATH`.
+    It's part of the package, so it has to be written again when typeshed is
+    upgraded.
+    """
+    with open(STUB_INDEX_PATH, 'w') as f:
+        json.dump(create_stub_index(), f, indent=1, separators=(',', ': '),
+                  sort_keys=True)
+        f.write('\n')
+
+
+def check_stub_index():
+    """
+    Returns True if the stub index matches the typeshed tree.
+    """
+    return _read_stub_index() == create_stub_index()
+
+
+_stub_index = []
+
+
+def _load_stub_index():
+    if not _stub_index:
+        _stub_index.append(_read_stub_index())
+        if _stub_index[0] is None:
+            debug.warning('The typeshed stub index %s is missing, scanning typeshed',
+                          STUB_INDEX_PATH)
+    return _stub_index[0]
+
+
+def _get_indexed_stub_file_map(index, version_info):
+    stubs = index['stubs']
+    map_ = {}
+    for base, check_version in _iter_version_directories(version_info, stubs):
+        for name, path in stubs[base].get(check_version, {}).items():
+            map_[name] = os.path.join(TYPESHED_PATH, base, *path.split('/'))
+    return map_
 
 
 _version_cache = {}
@@ -74,6 +187,9 @@ _version_cache = {}
 def _cache_stub_file_map(version_info):
     """
     Returns a map of an importable name in Python to a stub file.
+
+    The map is created from the stub index if there's one, without looking at
+    the typeshed directories.
     """
     # TODO this caches the stub files indefinitely, maybe use a time cache
     # for that?
@@ -83,8 +199,12 @@ def _cache_stub_file_map(version_info):
     except KeyError:
         pass
 
-    _version_cache[version] = file_set = \
-        _merge_create_stub_map(_get_typeshed_directories(version_info))
+    index = _load_stub_index()
+    if index is None:
+        file_set = _merge_create_stub_map(_get_typeshed_directories(version_info))
+    else:
+        file_set = _get_indexed_stub_file_map(index, version_info)
+    _version_cache[version] = file_set
     return file_set
 
 
@@ -163,7 +283,14 @@ def _try_to_load_stub(inference_state, import_names, python_value_set,
         # foo-stubs
         for p in sys_path:
             p = cast_path(p)
+            # The listing of p is usually cached by the module finder
+            # already, which saves a lookup of a missing foo-stubs folder.
+            listed = directory_cache.get_entries(p)
+            if listed is not None and not listed.get(import_names[0] + '-stubs'):
+                continue
             init = os.path.join(p, *import_names) + '-stubs' + os.path.sep + '__init__.pyi'
+            if not _is_file(init):
+                continue
             m = _try_to_load_stub_from_file(
                 inference_state,
                 python_value_set,
@@ -188,6 +315,8 @@ def _try_to_load_stub(inference_state, import_names, python_value_set,
                 file_paths = [file_path + 'i']
 
             for file_path in file_paths:
+                if not _is_file(file_path):
+                    continue
                 m = _try_to_load_stub_from_file(
                     inference_state,
                     python_value_set,
@@ -214,10 +343,13 @@ def _try_to_load_stub(inference_state, import_names, python_value_set,
             names_for_path = import_names
 
         for p in check_path:
+            file_path = os.path.join(p, *names_for_path) + '.pyi'
+            if not _is_file(file_path):
+                continue
             m = _try_to_load_stub_from_file(
                 inference_state,
                 python_value_set,
-                file_io=FileIO(os.path.join(p, *names_for_path) + '.pyi'),
+                file_io=FileIO(file_path),
                 import_names=import_names,
             )
             if m is not None:
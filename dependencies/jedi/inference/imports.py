@@ -19,11 +19,13 @@ from parso.tree import search_ancestor
 from jedi._compatibility import ImplicitNSInfo, force_unicode
 from jedi import debug
 from jedi import settings
+from jedi.file_io import KnownContentFileIO
 from jedi.parser_utils import get_cached_code_lines
 from jedi.inference import sys_path
 from jedi.inference import helpers
 from jedi.inference import compiled
 from jedi.inference import analysis
+from jedi.inference import directory_cache
 from jedi.inference.utils import unite
 from jedi.inference.cache import inference_state_method_cache
 from jedi.inference.names import ImportName, SubModuleName
@@ -36,14 +38,44 @@ from jedi.plugins import plugin_manager
 class ModuleCache(object):
     def __init__(self):
         self._name_cache = {}
+        # String names -> list of (module node, file io, modification time)
+        self._file_modules = {}
 
     def add(self, string_names, value_set):
         if string_names is not None:
             self._name_cache[string_names] = value_set
+            self._file_modules[string_names] = [
+                (v.tree_node, v.file_io, v.file_io.get_last_modified())
+                for v in value_set
+                if getattr(v, 'file_io', None) is not None
+                # The code of buffers is known, it's not read from the file.
+                and not isinstance(v.file_io, KnownContentFileIO)
+            ]
 
     def get(self, string_names):
         return self._name_cache.get(string_names)
 
+    def get_changed_module_nodes(self):
+        """
+        Returns the module nodes of the cached modules whose files were
+        modified (or removed) since they were loaded.
+        """
+        return [module_node
+                for modules in self._file_modules.values()
+                for module_node, file_io, modified in modules
+                if file_io.get_last_modified() != modified]
+
+    def invalidate(self, module_nodes):
+        """
+        Removes all the modules that were created from one of the module nodes
+        (a set of ``id()`` of module nodes).
+        """
+        for string_names, value_set in list(self._name_cache.items()):
+            if any(id(getattr(v, 'tree_node', None)) in module_nodes
+                   for v in value_set):
+                del self._name_cache[string_names]
+                self._file_modules.pop(string_names, None)
+
 
 # This memoization is needed, because otherwise we will infinitely loop on
 # certain imports.
@@ -379,7 +411,8 @@ def import_module(inference_state, import_names, parent_module_value, sys_path):
     if parent_module_value is None:
         # Override the sys.path. It works only good that way.
         # Injecting the path directly into `find_module` did not work.
-        file_io_or_ns, is_pkg = inference_state.compiled_subprocess.get_module_info(
+        file_io_or_ns, is_pkg = _get_module_info(
+            inference_state,
             string=import_names[-1],
             full_name=module_name,
             sys_path=sys_path,
@@ -398,7 +431,8 @@ def import_module(inference_state, import_names, parent_module_value, sys_path):
             # not important to be correct.
             if not isinstance(path, list):
                 path = [path]
-            file_io_or_ns, is_pkg = inference_state.compiled_subprocess.get_module_info(
+            file_io_or_ns, is_pkg = _get_module_info(
+                inference_state,
                 string=import_names[-1],
                 path=path,
                 full_name=module_name,
@@ -434,13 +468,42 @@ def import_module(inference_state, import_names, parent_module_value, sys_path):
     return ValueSet([module])
 
 
+def _get_module_info(inference_state, string, full_name, is_global_search,
+                     sys_path=None, path=None):
+    """
+    Looks for the module in the cached directory listings first, the
+    environment is only asked if they can't tell.
+    """
+    finder_info = directory_cache.get_module_finder_info(inference_state)
+    if finder_info is not None:
+        suffixes, source_suffixes, claimed_names = finder_info
+        if claimed_names is not None \
+                and not (is_global_search and string in claimed_names):
+            result = directory_cache.find_module(
+                string, full_name,
+                sys_path if is_global_search else path,
+                suffixes, source_suffixes,
+            )
+            if result is not None:
+                return result
+
+    kwargs = dict(sys_path=sys_path) if is_global_search else dict(path=path)
+    return inference_state.compiled_subprocess.get_module_info(
+        string=string,
+        full_name=full_name,
+        is_global_search=is_global_search,
+        **kwargs
+    )
+
+
 def _load_python_module(inference_state, file_io,
                         import_names=None, is_package=False):
     module_node = inference_state.parse(
         file_io=file_io,
         cache=True,
         diff_cache=settings.fast_parser,
-        cache_path=settings.cache_directory
+        cache_path=settings.cache_directory,
+        skeleton=settings.skeleton_parser,
     )
 
     from jedi.inference.value import ModuleValue
@@ -0,0 +1,242 @@
+"""
+An inverted index of the identifiers of Python files, used to find the
+modules that may contain a name (see :mod:`jedi.inference.references`)
+without reading all the files again.
+
+There is one index per project, pickled to the cache directory with its own
+suffix: parso only counts and prunes the ``.pkl`` and ``.tmp`` files there
+(see :func:`parso.cache.prune_cache`). The entries are kept fresh with the
+modification time and the size of the files: a file is only read again if
+they changed.
+
+A file contains a name if the name is one of the words of its code, the
+same as matching ``\\bname\\b``. Names in comments and strings count.
+"""
+import errno
+import hashlib
+import os
+import re
+
+from parso import python_bytes_to_unicode
+
+from jedi import debug
+from jedi import settings
+from jedi._compatibility import pickle, FileNotFoundError
+
+_INDEX_VERSION = 1
+"""
+Increment this number when the pickled data changes.
+"""
+
+_WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+_indexes = {}  # Pickle path -> NameIndex
+
+
+class NameIndex(object):
+    """
+    Maps the identifiers to the files that contain them.
+
+    Each file gets a new ID when it's indexed. The IDs of the files that
+    changed or were removed stay in the lists of the names until the index is
+    compacted.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.changed = False
+        self._files = {}  # Path -> (file ID, modification time, size)
+        self._paths = {}  # File ID -> path, for the current IDs only
+        self._names = {}  # Name -> list of file IDs
+        self._next_id = 0
+
+    @classmethod
+    def load(cls, path):
+        index = cls(path)
+        try:
+            with open(path, 'rb') as f:
+                version, files, names, next_id = pickle.load(f)
+        except (IOError, OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return index
+        if version == _INDEX_VERSION:
+            index._files = files
+            index._paths = dict((file_id, p) for p, (file_id, _, _) in files.items())
+            index._names = names
+            index._next_id = next_id
+        return index
+
+    def save(self):
+        if len(self._paths) * 2 < self._next_id:
+            self._compact()
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+        temp_path = '%s.%s.part' % (self.path, os.getpid())
+        with open(temp_path, 'wb') as f:
+            pickle.dump(
+                (_INDEX_VERSION, self._files, self._names, self._next_id),
+                f, pickle.HIGHEST_PROTOCOL
+            )
+        try:
+            os.replace(temp_path, self.path)
+        except AttributeError:
+            # Python 2, os.rename doesn't replace files on Windows.
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            os.rename(temp_path, self.path)
+        self.changed = False
+
+    def _compact(self):
+        # Renumber the files, the IDs of the old contents are dropped.
+        new_ids = {}
+        files = {}
+        for new_id, (path, (file_id, mtime, size)) in enumerate(self._files.items()):
+            new_ids[file_id] = new_id
+            files[path] = new_id, mtime, size
+
+        names = {}
+        for name, file_ids in self._names.items():
+            file_ids = [new_ids[i] for i in file_ids if i in new_ids]
+            if file_ids:
+                names[name] = file_ids
+        self._files = files
+        self._paths = dict((file_id, p) for p, (file_id, _, _) in files.items())
+        self._names = names
+        self._next_id = len(files)
+
+    def is_fresh(self, path):
+        """
+        Returns False if the file changed since it was indexed or if it was
+        never indexed.
+        """
+        try:
+            _, mtime, size = self._files[path]
+            stat = os.stat(path)
+        except (KeyError, OSError):
+            return False
+        return stat.st_mtime == mtime and stat.st_size == size
+
+    def update(self, file_io):
+        """
+        Indexes a file and returns the set of its names. Returns None if it
+        can't be read, it's removed from the index then.
+        """
+        path = file_io.path
+        self.remove(path)
+        try:
+            stat = os.stat(path)
+            code = file_io.read()
+        except (FileNotFoundError, IOError, OSError):
+            return None
+        names = _get_names(code)
+        self.add(path, stat.st_mtime, stat.st_size, names)
+        return names
+
+    def add(self, path, mtime, size, names):
+        """
+        Indexes the names of a file, e.g. the result of :func:`scan_file`.
+        """
+        self.remove(path)
+        file_id = self._next_id
+        self._next_id += 1
+        self._files[path] = file_id, mtime, size
+        self._paths[file_id] = path
+        for name in names:
+            self._names.setdefault(name, []).append(file_id)
+        self.changed = True
+
+    def remove(self, path):
+        try:
+            file_id, _, _ = self._files.pop(path)
+        except KeyError:
+            return
+        del self._paths[file_id]
+        self.changed = True
+
+    def get_paths(self, name):
+        """
+        Returns the set of the indexed files that contain a name. They may
+        have changed since they were indexed, see :meth:`is_fresh`.
+        """
+        paths = self._paths
+        return set(paths[i] for i in self._names.get(name, ()) if i in paths)
+
+    def get_statistics(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        return {
+            'path': self.path,
+            'files': len(self._files),
+            'names': len(self._names),
+            'size': size,
+        }
+
+
+def _get_names(code):
+    try:
+        code = python_bytes_to_unicode(code, errors='replace')
+    except LookupError:
+        # An unknown encoding in the coding comment.
+        code = code.decode('utf-8', 'replace')
+    return set(word for word in _WORD_PATTERN.findall(code) if not word[0].isdigit())
+
+
+def scan_file(path):
+    """
+    Reads the names of a file, to be indexed with :meth:`NameIndex.add`.
+    Returns ``(path, (mtime, size, names))``, or ``(path, None)`` if the file
+    can't be read.
+
+    It doesn't touch the index, so it can run in another process.
+    """
+    try:
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            code = f.read()
+    except (IOError, OSError):
+        return path, None
+    return path, (stat.st_mtime, stat.st_size, _get_names(code))
+
+
+def _get_index_path(project_path):
+    project_hash = hashlib.sha256(project_path.encode('utf-8')).hexdigest()
+    return os.path.join(settings.cache_directory, 'name_index', '%s.index' % project_hash)
+
+
+def get_name_index(inference_state):
+    """
+    Returns the :class:`NameIndex` of the project of an inference state.
+    """
+    path = _get_index_path(inference_state.project._path)
+    try:
+        return _indexes[path]
+    except KeyError:
+        index = _indexes[path] = NameIndex.load(path)
+        return index
+
+
+def save_name_index(index):
+    if not index.changed:
+        return
+    try:
+        index.save()
+    except (IOError, OSError) as e:
+        debug.warning('Unable to save the name index %s: %s', index.path, e)
+
+
+def clear_name_index(inference_state):
+    """
+    Drops the index of the project of an inference state, also from the
+    disk.
+    """
+    path = _get_index_path(inference_state.project._path)
+    _indexes.pop(path, None)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
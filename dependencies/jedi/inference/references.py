@@ -1,10 +1,14 @@
 import os
-import re
+from itertools import islice
 
-from parso import python_bytes_to_unicode
+from parso.cache import parser_cache, cache_file, get_content_validation, \
+    set_content_validation
 
-from jedi.file_io import KnownContentFileIO
+from jedi import settings
+from jedi.file_io import FolderIO
 from jedi.inference.imports import SubModuleName, load_module_from_path
+from jedi.inference.name_index import get_name_index, save_name_index, \
+    clear_name_index, scan_file
 from jedi.inference.filters import ParserTreeFilter
 from jedi.inference.gradual.conversion import convert_names
 
@@ -16,12 +20,27 @@ Stats from a 2016 Lenovo Notebook running Linux:
 With os.walk, it takes about 10s to scan 11'000 files (without filesystem
 caching). Once cached it only takes 5s. So it is expected that reading all
 those files might take a few seconds, but not a lot more.
+
+Only the files that are new or changed since they were added to the name
+index are read, see :mod:`jedi.inference.name_index`.
+"""
+_SCANNED_FILE_LIMIT = 50000
+"""
+The files known by the name index only cost a ``stat``.
 """
 _PARSED_FILE_LIMIT = 30
 """
 For now we keep the amount of parsed files really low, since parsing might take
 easily 100ms for bigger files.
 """
+_SCAN_BATCH_SIZE = 256
+_MIN_POOL_FILES = 64
+"""
+Starting the processes takes longer than reading a few files, they are only
+started once that many files need to be read.
+"""
+
+_scan_pool = None  # (processes setting, multiprocessing pool)
 
 
 def _resolve_names(definition_names, avoid_names=()):
@@ -113,6 +132,15 @@ def _find_global_variables(names, search_name):
 
 
 def find_references(module_context, tree_name):
+    return [name for names in iter_references(module_context, tree_name) for name in names]
+
+
+def iter_references(module_context, tree_name):
+    """
+    Like :func:`find_references`, but yields the names as soon as they are
+    found, by lists: first the definitions with the references in the module
+    of ``tree_name``, then the new references of each module searched.
+    """
     inf = module_context.inference_state
     search_name = tree_name.value
 
@@ -138,6 +166,7 @@ def find_references(module_context, tree_name):
             search_name,
         )
 
+    yielded_names = set()
     non_matching_reference_maps = {}
     for module_context in potential_modules:
         for name_leaf in module_context.tree_node.get_used_names().get(search_name, []):
@@ -156,24 +185,128 @@ def find_references(module_context, tree_name):
             else:
                 for name in new:
                     non_matching_reference_maps.setdefault(name, []).append(new)
-    return found_names_dct.values()
 
+        names = [n for tree_name, n in found_names_dct.items() if tree_name not in yielded_names]
+        if names:
+            yielded_names.update(found_names_dct)
+            yield names
 
-def _check_fs(inference_state, file_io, regex):
-    try:
-        code = file_io.read()
-    except FileNotFoundError:
-        return None
-    code = python_bytes_to_unicode(code, errors='replace')
-    if not regex.search(code):
-        return None
-    new_file_io = KnownContentFileIO(file_io.path, code)
-    m = load_module_from_path(inference_state, new_file_io)
+    names = [n for tree_name, n in found_names_dct.items() if tree_name not in yielded_names]
+    if names:
+        yield names
+
+
+def _load_module_context(inference_state, file_io):
+    m = load_module_from_path(inference_state, file_io)
     if m.is_compiled():
         return None
     return m.as_context()
 
 
+def _get_scan_pool(start):
+    """
+    Returns the processes of :data:`jedi.settings.reference_search_processes`,
+    None if the files are read in this process. They are only started if
+    ``start`` is True, and are kept for the next searches.
+    """
+    global _scan_pool
+    processes = settings.reference_search_processes
+    if _scan_pool is not None and _scan_pool[0] != processes:
+        _scan_pool[1].terminate()
+        _scan_pool = None
+
+    if _scan_pool is None:
+        if processes == 0 or not start:
+            return None
+        import multiprocessing
+        try:
+            # Forked processes get a copy of the locks held by the other
+            # threads, and may wait for them forever.
+            context = multiprocessing.get_context('spawn')
+        except AttributeError:
+            # Python 2
+            context = multiprocessing
+        _scan_pool = processes, context.Pool(processes)
+    return _scan_pool[1]
+
+
+def _scan_files(index, file_ios):
+    """
+    Indexes the names of files. Yields the file ios with their names, None if
+    a file can't be read.
+    """
+    pool = _get_scan_pool(start=len(file_ios) >= _MIN_POOL_FILES)
+    if pool is None:
+        for file_io in file_ios:
+            yield file_io, index.update(file_io)
+        return
+
+    file_ios = dict((file_io.path, file_io) for file_io in file_ios)
+    for path, result in pool.imap(scan_file, list(file_ios), chunksize=16):
+        if result is None:
+            index.remove(path)
+            names = None
+        else:
+            mtime, size, names = result
+            index.add(path, mtime, size, names)
+        yield file_ios[path], names
+
+
+def _find_files_containing_name(index, file_ios, name, open_limit, scan_limit):
+    indexed_paths = index.get_paths(name)
+    opened_file_count = 0
+    stale_file_ios = []
+    for file_io_count, file_io in enumerate(file_ios, 1):
+        if index.is_fresh(file_io.path):
+            if file_io.path in indexed_paths:
+                yield file_io
+        elif opened_file_count < open_limit:
+            opened_file_count += 1
+            stale_file_ios.append(file_io)
+            if len(stale_file_ios) >= _SCAN_BATCH_SIZE:
+                for f, names in _scan_files(index, stale_file_ios):
+                    if names and name in names:
+                        yield f
+                stale_file_ios = []
+
+        if file_io_count >= scan_limit:
+            break
+
+    for f, names in _scan_files(index, stale_file_ios):
+        if names and name in names:
+            yield f
+
+
+def _parse_file(task):
+    path, version, cache_path, content_validation, skeleton = task
+    # The pool processes don't share the settings of the parent.
+    set_content_validation(content_validation)
+    return cache_file(path, version, cache_path, skeleton)
+
+
+def _cache_modules(inference_state, file_ios):
+    """
+    Parses the files that are not in RAM to the cache directory in the scan
+    processes, if they run. Loading the modules only unpickles them then.
+    """
+    pool = _get_scan_pool(start=False)
+    if pool is None:
+        return
+
+    version_info = inference_state.environment.version_info
+    version = '%s.%s' % (version_info.major, version_info.minor)
+    in_memory = parser_cache.get(inference_state.grammar._hashed, {})
+    tasks = [
+        (file_io.path, version, settings.cache_directory,
+         get_content_validation(), settings.skeleton_parser)
+        for file_io in file_ios
+        if file_io.path not in in_memory
+    ]
+    if len(tasks) > 1:
+        for _ in pool.imap_unordered(_parse_file, tasks):
+            pass
+
+
 def gitignored_lines(folder_io, file_io):
     ignored_paths = set()
     ignored_names = set()
@@ -254,19 +387,47 @@ def get_module_contexts_containing_name(inference_state, module_contexts, name,
     if len(name) <= 2:
         return
 
-    parse_limit = _PARSED_FILE_LIMIT / limit_reduction
+    parse_limit = _PARSED_FILE_LIMIT // limit_reduction
     open_limit = _OPENED_FILE_LIMIT / limit_reduction
-    file_io_count = 0
+    scan_limit = _SCANNED_FILE_LIMIT / limit_reduction
     parsed_file_count = 0
-    regex = re.compile(r'\b' + re.escape(name) + r'\b')
-    for file_io in _find_python_files_in_sys_path(inference_state, module_contexts):
-        file_io_count += 1
-        m = _check_fs(inference_state, file_io, regex)
-        if m is not None:
-            parsed_file_count += 1
-            yield m
-            if parsed_file_count >= parse_limit:
+    index = get_name_index(inference_state)
+    matches = _find_files_containing_name(
+        index,
+        _find_python_files_in_sys_path(inference_state, module_contexts),
+        name, open_limit, scan_limit
+    )
+    try:
+        while parsed_file_count < parse_limit:
+            # The files are parsed in parallel by batches of the files that
+            # may still be needed.
+            file_ios = list(islice(matches, parse_limit - parsed_file_count))
+            if not file_ios:
                 break
+            _cache_modules(inference_state, file_ios)
+            for file_io in file_ios:
+                m = _load_module_context(inference_state, file_io)
+                if m is not None:
+                    parsed_file_count += 1
+                    yield m
+    finally:
+        matches.close()
+        save_name_index(index)
+
 
-        if file_io_count >= open_limit:
+def rebuild_name_index(inference_state):
+    """
+    Indexes all the Python files of the project of an inference state from
+    scratch. Returns the statistics of the new index.
+    """
+    clear_name_index(inference_state)
+    index = get_name_index(inference_state)
+    file_ios = _recurse_find_python_files(FolderIO(inference_state.project._path), set())
+    while True:
+        batch = list(islice(file_ios, _SCAN_BATCH_SIZE))
+        if not batch:
             break
+        for _ in _scan_files(index, batch):
+            pass
+    save_name_index(index)
+    return index.get_statistics()
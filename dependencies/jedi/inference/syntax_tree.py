@@ -653,8 +653,9 @@ def tree_name_to_values(inference_state, context, tree_name):
     value_set = NO_VALUES
     module_node = context.get_root_context().tree_node
     # First check for annotations, like: `foo: int = 3`
-    if module_node is not None:
-        names = module_node.get_used_names().get(tree_name.value, [])
+    if module_node is not None and context.tree_node is not None:
+        used_names = parser_utils.get_scope_used_names(context.tree_node)
+        names = used_names.get(tree_name.value, [])
         for name in names:
             expr_stmt = name.parent
 
@@ -564,6 +564,10 @@ class SelfAttributeFilter(ClassFilter):
     This class basically filters all the use cases where `self.*` was assigned.
     """
     def __init__(self, instance, instance_class, node_context, origin_scope):
+        class_node = node_context.tree_node
+        if class_node.type == 'classdef':
+            # The attributes are assigned in the bodies of the methods.
+            class_node.parse_deferred_bodies()
         super(SelfAttributeFilter, self).__init__(
             class_value=instance_class,
             node_context=node_context,
@@ -12,6 +12,7 @@ from jedi.inference.helpers import values_from_qualified_names
 from jedi.inference.compiled import create_simple_object
 from jedi.inference.base_value import ValueSet
 from jedi.inference.context import ModuleContext
+from jedi.inference import directory_cache
 
 
 class _ModuleAttributeName(AbstractNameDefinition):
@@ -38,6 +39,19 @@ class _ModuleAttributeName(AbstractNameDefinition):
 
 
 def iter_module_names(inference_state, paths):
+    finder_info = directory_cache.get_module_finder_info(inference_state)
+    if finder_info is not None:
+        suffixes = finder_info[0]
+        for n in directory_cache.iter_module_names(paths, suffixes):
+            yield n
+        # Zip files and other paths that are not directories are listed by
+        # the environment, like by find_module.
+        other_paths = [p for p in paths if directory_cache.get_entries(p) is None]
+        if other_paths:
+            for n in inference_state.compiled_subprocess.list_module_names(other_paths):
+                yield n
+        return
+
     # Python modules/packages
     for n in inference_state.compiled_subprocess.list_module_names(paths):
         yield n
@@ -273,6 +273,18 @@ def get_parent_scope(node, include_flows=False):
 get_cached_parent_scope = _get_parent_scope_cache(get_parent_scope)
 
 
+def get_scope_used_names(scope):
+    """
+    Returns the used names of the module of a scope. The skipped function
+    bodies of a skeleton parse (see ``settings.skeleton_parser``) are only
+    parsed for the given function, the names of the other bodies are
+    missing.
+    """
+    if scope.type == 'funcdef':
+        scope.parse_deferred_bodies()
+    return scope.get_root_node().get_used_names(include_deferred=False)
+
+
 def get_cached_code_lines(grammar, path):
     """
     Basically access the cached code lines in parso. This is not the nicest way
@@ -29,6 +29,7 @@ Parser
 ~~~~~~
 
 .. autodata:: fast_parser
+.. autodata:: skeleton_parser
 
 
 Dynamic stuff
@@ -37,6 +38,7 @@ Dynamic stuff
 .. autodata:: dynamic_array_additions
 .. autodata:: dynamic_params
 .. autodata:: dynamic_params_for_other_modules
+.. autodata:: reference_search_processes
 .. autodata:: auto_import_modules
 
 
@@ -98,6 +100,12 @@ something has been changed e.g. to a function. If this happens, only the
 function is being reparsed.
 """
 
+skeleton_parser = True
+"""
+Parse imported modules without their function bodies. A body is only parsed
+once it is needed to infer something, most of them never are.
+"""
+
 _cropped_file_size = 10e6  # 1 Megabyte
 """
 Jedi gets extremely slow if the file size exceed a few thousand lines.
@@ -126,6 +134,16 @@ dynamic_params_for_other_modules = True
 Do the same for other modules.
 """
 
+reference_search_processes = 0
+"""
+The number of processes that read the files searched for references and
+dynamic params, and parse the files that contain the name to the cache
+directory. ``None`` means one process per CPU, ``0`` that it's all done in this
+process. The processes are started with the ``spawn`` method: the main module
+of the program is imported by them, it must be guarded with
+``if __name__ == '__main__'``.
+"""
+
 dynamic_flow_information = True
 """
 Check for `isinstance` and other information to infer a type.
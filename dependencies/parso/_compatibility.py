@@ -43,6 +43,15 @@ def u(string):
     return string
 
 
+try:
+    from sys import intern
+except ImportError:
+    # Python 2 only interns byte strings, the values of the leaves are
+    # unicode.
+    def intern(string):
+        return string
+
+
 try:
     # Python 2.7
     FileNotFoundError = FileNotFoundError
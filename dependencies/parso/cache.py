@@ -7,6 +7,7 @@ import shutil
 import platform
 import errno
 import logging
+import threading
 
 try:
     import cPickle as pickle
@@ -17,23 +18,53 @@ from parso._compatibility import FileNotFoundError
 
 LOG = logging.getLogger(__name__)
 
-_CACHED_FILE_MINIMUM_SURVIVAL = 60 * 10  # 10 minutes
+_memory_budget = 500 * 1024 * 1024
 """
-Cached files should survive at least a few minutes.
+Approximate number of bytes the parsed modules in ``parser_cache`` may use.
+The least recently used modules are evicted beyond it. See
+:func:`set_memory_budget`.
+
+Numpy, Pandas, Matplotlib and Tensorflow together use about 500 files. This
+makes Jedi use ~500mb of memory.
 """
-_CACHED_SIZE_TRIGGER = 600
+
+_disk_budget = 500 * 1024 * 1024
+"""
+Approximate number of bytes the pickle files in the cache directory may use.
+The least recently used ones are removed beyond it, see :func:`prune_cache`.
 """
-This setting limits the amount of cached files. It's basically a way to start
-garbage collection.
 
-The reasoning for this limit being as big as it is, is the following:
+_PRUNE_INTERVAL = 60 * 10  # 10 minutes
+"""
+Minimum time between two automatic prunings of the cache directory by a
+process.
+"""
 
-Numpy, Pandas, Matplotlib and Tensorflow together use about 500 files. This
-makes Jedi use ~500mb of memory. Since we might want a bit more than those few
-libraries, we just increase it a bit.
+_STALE_TEMP_FILE_AGE = 60 * 60
+"""
+Temporary files older than this were left by crashed processes.
+"""
+
+_content_validation = False
+"""
+Validate the pickles with a hash of the file contents instead of the
+modification time of the files, see :func:`set_content_validation`.
+"""
+
+_AVERAGE_LEAF_LENGTH = 8
+"""
+Average number of characters per leaf (including the prefix) in Python code.
+"""
+_AVERAGE_LEAF_SIZE = 200
+"""
+Average number of bytes per leaf, including its share of the inner nodes.
+"""
+_LINE_OVERHEAD = 57
+"""
+Bytes used by a line string (without its characters) and its list slot.
 """
 
-_PICKLE_VERSION = 33
+_PICKLE_VERSION = 36
 """
 Version number (integer) for file system cache.
 
@@ -82,16 +113,107 @@ On Linux, if environment variable ``$XDG_CACHE_HOME`` is set,
 """
 
 parser_cache = {}
+_memory_size = 0
+"""
+The sum of the sizes of the items of ``parser_cache``, kept up to date when
+they are set, replaced and removed.
+"""
+
+_statistics = {'hits': 0, 'disk_hits': 0, 'disk_misses': 0, 'misses': 0, 'evictions': 0}
+_last_prune_time = 0
+_prune_lock = threading.Lock()
 
 
 class _NodeCacheItem(object):
-    def __init__(self, node, lines, change_time=None):
+    def __init__(self, node, lines, change_time=None, pinned=False, content=None):
         self.node = node
         self.lines = lines
         if change_time is None:
             change_time = time.time()
         self.change_time = change_time
         self.last_used = change_time
+        self.pinned = pinned
+        self.size = _estimate_size(lines)
+        self.content_hash = None
+        self.content_size = None
+        if content is not None:
+            if not isinstance(content, bytes):
+                content = content.encode('utf-8')
+            self.content_hash = _hash_content(content)
+            self.content_size = len(content)
+
+
+def _hash_content(content):
+    # Only used to recognize files, a fast hash is good enough. File IOs with
+    # a known content may hold unicode.
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+    return hashlib.sha1(content).hexdigest()
+
+
+def _estimate_size(lines):
+    """
+    Approximates the bytes used by a module and its lines without walking the
+    tree: the number of leaves is guessed from the length of the code.
+    """
+    length = sum(len(line) for line in lines)
+    return (length // _AVERAGE_LEAF_LENGTH * _AVERAGE_LEAF_SIZE
+            + length + len(lines) * _LINE_OVERHEAD)
+
+
+def set_memory_budget(size):
+    """
+    Sets the approximate number of bytes the parsed modules kept in RAM may
+    use. The least recently used ones are evicted beyond it, except the
+    documents (see :func:`save_document`), which are pinned until they are
+    forgotten.
+    """
+    global _memory_budget
+    _memory_budget = size
+    _evict()
+
+
+def set_content_validation(enabled):
+    """
+    Validates the pickles with a hash of the file contents instead of the
+    modification time of the files. Checkouts and virtualenv rebuilds that
+    touch files without changing them keep their pickles valid, and identical
+    files share them (e.g. the same library installed in several
+    virtualenvs).
+
+    The hash is only computed if the size of a file is unchanged, or if the
+    module is not in RAM.
+    """
+    global _content_validation
+    _content_validation = enabled
+
+
+def get_content_validation():
+    """
+    Returns True if the pickles are validated with a hash of the file
+    contents, see :py:func:`set_content_validation`.
+    """
+    return _content_validation
+
+
+def get_statistics():
+    """
+    Returns a dict with the RAM cache statistics: ``hits``, ``disk_hits``
+    (modules loaded from pickles), ``disk_misses`` (no usable pickle),
+    ``misses``, ``evictions``, ``entries``,
+    ``pinned`` (number of pinned entries), ``size`` (approximate bytes used)
+    and ``budget``.
+    """
+    items = [item for path_to_item_map in parser_cache.values()
+             for item in path_to_item_map.values()]
+    statistics = dict(_statistics)
+    statistics.update(
+        entries=len(items),
+        pinned=sum(1 for item in items if item.pinned),
+        size=sum(item.size for item in items),
+        budget=_memory_budget,
+    )
+    return statistics
 
 
 def load_module(hashed_grammar, file_io, cache_path=None):
@@ -102,25 +224,63 @@ def load_module(hashed_grammar, file_io, cache_path=None):
     if p_time is None:
         return None
 
-    try:
-        module_cache_item = parser_cache[hashed_grammar][file_io.path]
-        if p_time <= module_cache_item.change_time:
-            module_cache_item.last_used = time.time()
-            return module_cache_item.node
-    except KeyError:
-        return _load_from_file_system(
+    module_cache_item = parser_cache.get(hashed_grammar, {}).get(file_io.path)
+    if module_cache_item is not None and (
+            p_time <= module_cache_item.change_time
+            or _has_same_content(module_cache_item, file_io, p_time)):
+        module_cache_item.last_used = time.time()
+        _statistics['hits'] += 1
+        return module_cache_item.node
+
+    if module_cache_item is None or _content_validation:
+        # The contents of a changed file may still match another pickle.
+        node = _load_from_file_system(
             hashed_grammar,
-            file_io.path,
+            file_io,
             p_time,
             cache_path=cache_path
         )
+        if node is None:
+            _statistics['misses'] += 1
+            _statistics['disk_misses'] += 1
+        else:
+            _statistics['disk_hits'] += 1
+        return node
+    _statistics['misses'] += 1
 
 
-def _load_from_file_system(hashed_grammar, path, p_time, cache_path=None):
-    cache_path = _get_hashed_path(hashed_grammar, path, cache_path=cache_path)
+def _has_same_content(module_cache_item, file_io, p_time):
+    """
+    Checks whether a file whose modification time changed still has the
+    contents a module was parsed from. The size is compared before hashing.
+    """
+    if not _content_validation or module_cache_item.content_hash is None:
+        return False
     try:
+        if os.path.getsize(file_io.path) != module_cache_item.content_size:
+            return False
+        content = file_io.read()
+    except (IOError, OSError):
+        return False
+    if _hash_content(content) != module_cache_item.content_hash:
+        return False
+    module_cache_item.change_time = p_time
+    return True
+
+
+def _load_from_file_system(hashed_grammar, file_io, p_time, cache_path=None):
+    path = file_io.path
+    if _content_validation:
         try:
-            if p_time > os.path.getmtime(cache_path):
+            content_hash = _hash_content(file_io.read())
+        except (IOError, OSError):
+            return None
+        cache_path = _get_content_path(hashed_grammar, content_hash, cache_path=cache_path)
+    else:
+        cache_path = _get_hashed_path(hashed_grammar, path, cache_path=cache_path)
+    try:
+        try:
+            if not _content_validation and p_time > os.path.getmtime(cache_path):
                 # Cache is outdated
                 return None
         except OSError as e:
@@ -139,28 +299,85 @@ def _load_from_file_system(hashed_grammar, path, p_time, cache_path=None):
     except FileNotFoundError:
         return None
     else:
+        try:
+            # The modification time of the pickles records their last use,
+            # access times are often not updated. It stays newer than the
+            # source file.
+            os.utime(cache_path, None)
+        except OSError:
+            pass
+        if _content_validation:
+            # The pickle may have been saved for another file.
+            module_cache_item.change_time = p_time
         _set_cache_item(hashed_grammar, path, module_cache_item)
         LOG.debug('pickle loaded: %s', path)
         return module_cache_item.node
 
 
 def _set_cache_item(hashed_grammar, path, module_cache_item):
-    if sum(len(v) for v in parser_cache.values()) >= _CACHED_SIZE_TRIGGER:
-        # Garbage collection of old cache files.
-        # We are basically throwing everything away that hasn't been accessed
-        # in 10 minutes.
-        cutoff_time = time.time() - _CACHED_FILE_MINIMUM_SURVIVAL
-        for key, path_to_item_map in parser_cache.items():
-            parser_cache[key] = {
-                path: node_item
-                for path, node_item in path_to_item_map.items()
-                if node_item.last_used > cutoff_time
-            }
-
-    parser_cache.setdefault(hashed_grammar, {})[path] = module_cache_item
-
-
-def save_module(hashed_grammar, file_io, module, lines, pickling=True, cache_path=None):
+    global _memory_size
+    path_to_item_map = parser_cache.setdefault(hashed_grammar, {})
+    old_item = path_to_item_map.get(path)
+    if old_item is not None:
+        _memory_size -= old_item.size
+    path_to_item_map[path] = module_cache_item
+    _memory_size += module_cache_item.size
+    _evict(keep=module_cache_item)
+
+
+def set_lines(module_cache_item, lines):
+    """
+    Replaces the lines of a cached module whose tree didn't change, e.g. after
+    typing in a comment.
+    """
+    global _memory_size
+    size = _estimate_size(lines)
+    _memory_size += size - module_cache_item.size
+    module_cache_item.size = size
+    module_cache_item.lines = lines
+
+
+def _evict(keep=None):
+    """
+    Evicts the least recently used modules until the cache fits the memory
+    budget. Pinned items and ``keep`` stay.
+    """
+    global _memory_size
+    if _memory_size <= _memory_budget:
+        return
+
+    # Items may have been removed from parser_cache directly (e.g. by clearing
+    # it), count them again before evicting anything.
+    _memory_size = sum(item.size for path_to_item_map in parser_cache.values()
+                       for item in path_to_item_map.values())
+    if _memory_size <= _memory_budget:
+        return
+
+    items = sorted(
+        (
+            (item.last_used, hashed_grammar, path, item)
+            for hashed_grammar, path_to_item_map in parser_cache.items()
+            for path, item in path_to_item_map.items()
+        ),
+        key=lambda i: i[0]
+    )
+    for _, hashed_grammar, path, item in items:
+        if _memory_size <= _memory_budget:
+            break
+        if item.pinned or item is keep:
+            continue
+        del parser_cache[hashed_grammar][path]
+        _memory_size -= item.size
+        _statistics['evictions'] += 1
+
+
+def save_module(hashed_grammar, file_io, module, lines, pickling=True, cache_path=None,
+                content=None):
+    """
+    ``content`` is the code (bytes or unicode) the module was parsed from,
+    only pickled modules with a known content are reused if content
+    validation is enabled.
+    """
     path = file_io.path
     try:
         p_time = None if path is None else file_io.get_last_modified()
@@ -168,22 +385,351 @@ def save_module(hashed_grammar, file_io, module, lines, pickling=True, cache_pat
         p_time = None
         pickling = False
 
-    item = _NodeCacheItem(module, lines, p_time)
+    if not _content_validation:
+        content = None
+    elif content is None:
+        pickling = False
+    item = _NodeCacheItem(module, lines, p_time, content=content)
     _set_cache_item(hashed_grammar, path, item)
     if pickling and path is not None:
         _save_to_file_system(hashed_grammar, path, item, cache_path=cache_path)
 
 
+def _get_document_key(document_id):
+    # Documents are identified by the caller, keep them apart from the paths.
+    return ('document', document_id)
+
+
+def load_document(hashed_grammar, document_id):
+    """
+    Returns the cache item of a document or None.
+    """
+    try:
+        item = parser_cache[hashed_grammar][_get_document_key(document_id)]
+    except KeyError:
+        _statistics['misses'] += 1
+        return None
+    item.last_used = time.time()
+    _statistics['hits'] += 1
+    return item
+
+
+def save_document(hashed_grammar, document_id, module, lines):
+    """
+    Keeps a module in RAM for diff parsing, keyed by a document ID (e.g. the ID
+    of an editor buffer) instead of a path. Documents are never pickled and
+    never evicted, until :func:`forget_document` is called.
+    """
+    item = _NodeCacheItem(module, lines, pinned=True)
+    _set_cache_item(hashed_grammar, _get_document_key(document_id), item)
+
+
+def forget_document(document_id):
+    """
+    Removes a document from the cache, e.g. once the editor closed it.
+    """
+    global _memory_size
+    key = _get_document_key(document_id)
+    for path_to_item_map in parser_cache.values():
+        item = path_to_item_map.pop(key, None)
+        if item is not None:
+            _memory_size -= item.size
+
+
 def _save_to_file_system(hashed_grammar, path, item, cache_path=None):
-    with open(_get_hashed_path(hashed_grammar, path, cache_path=cache_path), 'wb') as f:
-        pickle.dump(item, f, pickle.HIGHEST_PROTOCOL)
+    if item.content_hash is None:
+        pickle_path = _get_hashed_path(hashed_grammar, path, cache_path=cache_path)
+    else:
+        pickle_path = _get_content_path(hashed_grammar, item.content_hash,
+                                        cache_path=cache_path)
+    _write_atomically(pickle_path, item)
+    _prune_in_background(cache_path)
+
+
+def _write_atomically(path, obj):
+    """
+    Pickles an object to a temporary file that is renamed, so that other
+    processes sharing the cache never load a partially written file.
+    """
+    temp_path = '%s.%s.tmp' % (path, os.getpid())
+    try:
+        with open(temp_path, 'wb') as f:
+            pickle.dump(obj, f, pickle.HIGHEST_PROTOCOL)
+        try:
+            os.replace(temp_path, path)
+        except AttributeError:
+            # Python 2, os.rename doesn't replace files on Windows.
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def set_disk_budget(size):
+    """
+    Sets the approximate number of bytes the pickle files in the cache
+    directory may use. Applied by the next pruning.
+    """
+    global _disk_budget
+    _disk_budget = size
+
+
+def _iter_cache_files(cache_path=None):
+    """
+    Yields ``(path, size, modification time)`` of the module pickles and
+    temporary files of all Python versions in the cache directory.
+    """
+    if cache_path is None:
+        cache_path = _default_cache_path
+    try:
+        directories = os.listdir(cache_path)
+    except OSError:
+        return
+    for directory in directories:
+        directory = os.path.join(cache_path, directory)
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        for name in names:
+            if name.startswith('grammar-') or not name.endswith(('.pkl', '.tmp')):
+                # Grammar tables are small and loaded on every start.
+                continue
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            yield path, stat.st_size, stat.st_mtime
+
+
+def prune_cache(cache_path=None, max_size=None):
+    """
+    Removes the least recently used module pickles until the cache directory
+    fits ``max_size`` bytes (defaults to the budget set with
+    :func:`set_disk_budget`), and temporary files left by crashed processes.
+
+    Returns the number of removed files and their size.
+    """
+    if max_size is None:
+        max_size = _disk_budget
+    files = []
+    removed = []
+    stale_time = time.time() - _STALE_TEMP_FILE_AGE
+    for path, size, mtime in _iter_cache_files(cache_path):
+        if path.endswith('.tmp'):
+            if mtime < stale_time:
+                removed.append((path, size))
+        else:
+            files.append((mtime, path, size))
+
+    total = sum(size for _, _, size in files)
+    files.sort()
+    for _, path, size in files:
+        if total <= max_size:
+            break
+        removed.append((path, size))
+        total -= size
+
+    removed_size = 0
+    for path, size in removed:
+        try:
+            os.remove(path)
+        except OSError:
+            # Removed by another process in the meantime.
+            continue
+        removed_size += size
+    if removed:
+        LOG.debug('pruned %s files (%s bytes) from the cache', len(removed), removed_size)
+    return len(removed), removed_size
+
+
+def _prune_in_background(cache_path=None):
+    global _last_prune_time
+    now = time.time()
+    if now - _last_prune_time < _PRUNE_INTERVAL:
+        return
+    _last_prune_time = now
+
+    def prune():
+        if not _prune_lock.acquire(False):
+            return
+        try:
+            prune_cache(cache_path)
+        except Exception:
+            LOG.warning('Unable to prune the cache', exc_info=True)
+        finally:
+            _prune_lock.release()
+
+    thread = threading.Thread(target=prune)
+    thread.daemon = True
+    thread.start()
+
+
+def get_disk_statistics(cache_path=None):
+    """
+    Returns a dict with the statistics of the cache directory: ``entries``
+    (module pickles), ``size`` (bytes), ``budget``, and the ``disk_hits``,
+    ``disk_misses`` and ``hit_rate`` of this process.
+    """
+    entries = size = 0
+    for path, file_size, _ in _iter_cache_files(cache_path):
+        if path.endswith('.pkl'):
+            entries += 1
+            size += file_size
+    lookups = _statistics['disk_hits'] + _statistics['disk_misses']
+    return {
+        'entries': entries,
+        'size': size,
+        'budget': _disk_budget,
+        'disk_hits': _statistics['disk_hits'],
+        'disk_misses': _statistics['disk_misses'],
+        'hit_rate': float(_statistics['disk_hits']) / lookups if lookups else 0.0,
+    }
+
+
+def warm_up(paths, version=None, cache_path=None, processes=None, skeleton=False):
+    """
+    Parses files in a process pool and pickles them to the cache directory,
+    e.g. the modules of a new virtualenv. Files with a valid pickle are
+    skipped. The modules are not kept in RAM.
+
+    A generator of ``(path, status)`` tuples in the order the files are
+    done, ``status`` being ``'parsed'``, ``'cached'`` or ``'error'``.
+    Closing the generator stops the processes.
+
+    :param version: The grammar version, see :py:func:`parso.load_grammar`.
+    :param processes: The number of processes, the number of CPUs by
+        default. The files are parsed in this process if it's 0.
+    :param skeleton: Skips the function bodies, see
+        :py:meth:`parso.Grammar.parse`.
+    """
+    import multiprocessing
+
+    tasks = [(path, version, cache_path, _content_validation, skeleton) for path in paths]
+    if processes == 0:
+        for task in tasks:
+            yield _warm_up_file(task)
+    else:
+        try:
+            # Forked processes get a copy of the locks held by the other
+            # threads, and may wait for them forever.
+            context = multiprocessing.get_context('spawn')
+        except AttributeError:
+            # Python 2
+            context = multiprocessing
+        pool = context.Pool(processes)
+        try:
+            for result in pool.imap_unordered(_warm_up_file, tasks, chunksize=8):
+                yield result
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+    prune_cache(cache_path)
+
+
+def _warm_up_file(task):
+    path, version, cache_path, content_validation, skeleton = task
+    # The pool processes don't share the settings of the parent.
+    set_content_validation(content_validation)
+    return path, cache_file(path, version, cache_path, skeleton)
+
+
+def cache_file(path, version=None, cache_path=None, skeleton=False):
+    """
+    Parses a file and pickles it to the cache directory, like
+    :py:func:`warm_up` but in this process. Returns ``'parsed'``, or
+    ``'cached'`` if the file has a valid pickle, or ``'error'``.
+    """
+    from parso.grammar import load_grammar
+    from parso.utils import python_bytes_to_unicode, split_lines
+
+    grammar = load_grammar(version=version)
+    hashed_grammar = grammar._hashed
+    content_validation = _content_validation
+    try:
+        p_time = os.path.getmtime(path)
+        content = None
+        if content_validation:
+            with open(path, 'rb') as f:
+                content = f.read()
+            pickle_path = _get_content_path(hashed_grammar, _hash_content(content),
+                                            cache_path=cache_path)
+            if os.path.exists(pickle_path):
+                return 'cached'
+        else:
+            pickle_path = _get_hashed_path(hashed_grammar, path, cache_path=cache_path)
+            try:
+                if p_time <= os.path.getmtime(pickle_path):
+                    return 'cached'
+            except OSError:
+                pass
+            with open(path, 'rb') as f:
+                content = f.read()
+
+        # Jedi doesn't fail on badly encoded files either.
+        code = python_bytes_to_unicode(content, errors='replace')
+        module = grammar.parse(code, skeleton=skeleton)
+        lines = split_lines(code, keepends=True)
+        item = _NodeCacheItem(module, lines, p_time,
+                              content=content if content_validation else None)
+        _write_atomically(pickle_path, item)
+    except Exception:
+        LOG.debug('Unable to cache %s', path, exc_info=True)
+        return 'error'
+    return 'parsed'
+
+
+def load_grammar_tables(hashed_grammar, tables_version, cache_path=None):
+    """
+    Returns the grammar tables pickled by :func:`save_grammar_tables` or None,
+    if there are none.
+    """
+    try:
+        path = _get_grammar_path(hashed_grammar, tables_version, cache_path=cache_path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        gc.disable()
+        try:
+            tables = pickle.loads(data)
+        finally:
+            gc.enable()
+    except (IOError, OSError):
+        return None
+    except Exception:
+        LOG.warning('Unable to load the grammar tables', exc_info=True)
+        return None
+    LOG.debug('grammar tables loaded: %s', path)
+    return tables
+
+
+def save_grammar_tables(hashed_grammar, tables_version, tables, cache_path=None):
+    """
+    Pickles grammar tables. Failures are ignored, the grammar is generated
+    again next time.
+    """
+    try:
+        path = _get_grammar_path(hashed_grammar, tables_version, cache_path=cache_path)
+        _write_atomically(path, tables)
+    except (IOError, OSError):
+        LOG.debug('Unable to save the grammar tables', exc_info=True)
 
 
 def clear_cache(cache_path=None):
+    global _memory_size
     if cache_path is None:
         cache_path = _default_cache_path
     shutil.rmtree(cache_path)
     parser_cache.clear()
+    _memory_size = 0
+    for key in _statistics:
+        _statistics[key] = 0
 
 
 def _get_hashed_path(hashed_grammar, path, cache_path=None):
@@ -193,6 +739,16 @@ def _get_hashed_path(hashed_grammar, path, cache_path=None):
     return os.path.join(directory, '%s-%s.pkl' % (hashed_grammar, file_hash))
 
 
+def _get_content_path(hashed_grammar, content_hash, cache_path=None):
+    directory = _get_cache_directory_path(cache_path=cache_path)
+    return os.path.join(directory, '%s-content-%s.pkl' % (hashed_grammar, content_hash))
+
+
+def _get_grammar_path(hashed_grammar, tables_version, cache_path=None):
+    directory = _get_cache_directory_path(cache_path=cache_path)
+    return os.path.join(directory, 'grammar-%s-%s.pkl' % (hashed_grammar, tables_version))
+
+
 def _get_cache_directory_path(cache_path=None):
     if cache_path is None:
         cache_path = _default_cache_path
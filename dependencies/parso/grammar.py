@@ -2,14 +2,18 @@ import hashlib
 import os
 
 from parso._compatibility import FileNotFoundError, is_pypy
-from parso.pgen2 import generate_grammar
+from parso.pgen2 import generate_grammar, dump_grammar_tables, load_grammar_tables
+from parso.pgen2.generator import _TABLES_VERSION
 from parso.utils import split_lines, python_bytes_to_unicode, parse_version_string
 from parso.python.diff import DiffParser
 from parso.python.tokenize import tokenize_lines, tokenize
 from parso.python.token import PythonTokenTypes
-from parso.cache import parser_cache, load_module, save_module
+from parso import cache
+from parso.cache import parser_cache, load_module, save_module, \
+    load_document, save_document, set_lines, get_content_validation
 from parso.parser import BaseParser
 from parso.python.parser import Parser as PythonParser
+from parso.python.skeleton import SkeletonParser
 from parso.python.errors import ErrorFinderConfig
 from parso.python import pep8
 from parso.file_io import FileIO, KnownContentFileIO
@@ -28,15 +32,35 @@ class Grammar(object):
     _token_namespace = None
     _default_normalizer_config = pep8.PEP8NormalizerConfig()
 
-    def __init__(self, text, tokenizer, parser=BaseParser, diff_parser=None):
-        self._pgen_grammar = generate_grammar(
-            text,
-            token_namespace=self._get_token_namespace()
-        )
+    def __init__(self, text, tokenizer, parser=BaseParser, diff_parser=None,
+                 skeleton_parser=None):
+        self._hashed = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self._pgen_grammar = self._load_pgen_grammar(text)
         self._parser = parser
         self._tokenizer = tokenizer
         self._diff_parser = diff_parser
-        self._hashed = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self._skeleton_parser = skeleton_parser
+
+    def _load_pgen_grammar(self, text):
+        """
+        Generating the grammar tables from the BNF text takes a lot of the
+        startup time, so they are cached on disk, keyed by the hash of the
+        text.
+        """
+        token_namespace = self._get_token_namespace()
+        tables = cache.load_grammar_tables(self._hashed, _TABLES_VERSION)
+        if tables is not None:
+            try:
+                return load_grammar_tables(tables, token_namespace)
+            except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+                # A broken cache file, generate the grammar again.
+                pass
+
+        pgen_grammar = generate_grammar(text, token_namespace=token_namespace)
+        cache.save_grammar_tables(
+            self._hashed, _TABLES_VERSION, dump_grammar_tables(pgen_grammar)
+        )
+        return pgen_grammar
 
     def parse(self, code=None, **kwargs):
         """
@@ -69,6 +93,23 @@ class Grammar(object):
         :param bool cache_path: If given saves the parso cache in this
             directory. If not given, defaults to the default cache places on
             each platform.
+        :param list lines: The code already split with
+            ``split_lines(code, keepends=True)``. If given, ``code`` is
+            ignored.
+        :param tuple diff_hint: Used with ``diff_cache``. A tuple
+            ``(old_lines, start, old_end, new_end)`` for callers that know what
+            changed (e.g. editors): ``old_lines[start:old_end]`` was replaced by
+            ``lines[start:new_end]``, everything else is unchanged. Only
+            trusted if ``old_lines`` is the list the cached module was parsed
+            from, which saves diffing all the lines.
+        :param document_id: Used with ``diff_cache`` instead of ``path`` to
+            find the cached module, e.g. the ID of an editor buffer. Unsaved
+            documents don't have a path and documents may be renamed. Use
+            :py:func:`parso.cache.forget_document` once the document is closed.
+        :param bool skeleton: Skips the function bodies, they are parsed once
+            they are accessed (see :py:mod:`parso.python.skeleton`). Useful
+            for modules that are mostly used from the outside, like imported
+            libraries.
 
         :return: A subclass of :py:class:`parso.tree.NodeOrLeaf`. Typically a
             :py:class:`parso.python.tree.Module`.
@@ -79,13 +120,16 @@ class Grammar(object):
 
     def _parse(self, code=None, error_recovery=True, path=None,
                start_symbol=None, cache=False, diff_cache=False,
-               cache_path=None, file_io=None, start_pos=(1, 0)):
+               cache_path=None, file_io=None, start_pos=(1, 0), lines=None,
+               diff_hint=None, document_id=None, skeleton=False):
         """
         Wanted python3.5 * operator and keyword only arguments. Therefore just
         wrap it all.
         start_pos here is just a parameter internally used. Might be public
         sometime in the future.
         """
+        if lines is not None:
+            code = ''.join(lines)
         if code is None and path is None and file_io is None:
             raise TypeError("Please provide either code or a path.")
 
@@ -95,6 +139,7 @@ class Grammar(object):
         if error_recovery and start_symbol != 'file_input':
             raise NotImplementedError("This is currently not implemented.")
 
+        given_file_io = file_io is not None
         if file_io is None:
             if code is None:
                 file_io = FileIO(path)
@@ -106,53 +151,92 @@ class Grammar(object):
             if module_node is not None:
                 return module_node
 
-        if code is None:
-            code = file_io.read()
-        code = python_bytes_to_unicode(code)
+        # What the file holds, the cache may be validated with its hash.
+        content = code
+        if code is None and lines is None:
+            code = content = file_io.read()
+        elif given_file_io and cache and get_content_validation():
+            # The code may differ from the bytes of the file (e.g. decoded with
+            # replacements or cropped by the caller), which are hashed when
+            # the module is loaded.
+            try:
+                content = file_io.read()
+            except (IOError, OSError):
+                content = None
+        if lines is None:
+            code = python_bytes_to_unicode(code)
 
-        lines = split_lines(code, keepends=True)
+            lines = split_lines(code, keepends=True)
         if diff_cache:
             if self._diff_parser is None:
                 raise TypeError("You have to define a diff parser to be able "
                                 "to use this option.")
-            try:
-                module_cache_item = parser_cache[self._hashed][file_io.path]
-            except KeyError:
-                pass
+            if document_id is None:
+                module_cache_item = parser_cache.get(self._hashed, {}).get(file_io.path)
             else:
+                module_cache_item = load_document(self._hashed, document_id)
+            if module_cache_item is not None:
                 module_node = module_cache_item.node
                 old_lines = module_cache_item.lines
-                if old_lines == lines:
+                changed_range = None
+                if diff_hint is not None and diff_hint[0] is old_lines:
+                    changed_range = diff_hint[1:]
+                    if changed_range[0] == changed_range[1] == changed_range[2]:
+                        set_lines(module_cache_item, lines)
+                        return module_node
+                elif old_lines == lines:
                     return module_node
 
+                # The diff parser works on complete trees.
+                module_node.parse_deferred_bodies()
                 new_node = self._diff_parser(
                     self._pgen_grammar, self._tokenizer, module_node
                 ).update(
                     old_lines=old_lines,
-                    new_lines=lines
+                    new_lines=lines,
+                    changed_range=changed_range,
                 )
-                save_module(self._hashed, file_io, new_node, lines,
-                            # Never pickle in pypy, it's slow as hell.
-                            pickling=cache and not is_pypy,
-                            cache_path=cache_path)
+                self._save_module(file_io, new_node, lines, cache, cache_path,
+                                  document_id, content)
                 return new_node
 
         tokens = self._tokenizer(lines, start_pos)
 
-        p = self._parser(
-            self._pgen_grammar,
-            error_recovery=error_recovery,
-            start_nonterminal=start_symbol
-        )
+        if skeleton:
+            if self._skeleton_parser is None:
+                raise TypeError("You have to define a skeleton parser to be able "
+                                "to use this option.")
+            p = self._skeleton_parser(
+                self._pgen_grammar,
+                lines,
+                error_recovery=error_recovery,
+                start_nonterminal=start_symbol
+            )
+        else:
+            p = self._parser(
+                self._pgen_grammar,
+                error_recovery=error_recovery,
+                start_nonterminal=start_symbol
+            )
         root_node = p.parse(tokens=tokens)
 
         if cache or diff_cache:
-            save_module(self._hashed, file_io, root_node, lines,
-                        # Never pickle in pypy, it's slow as hell.
-                        pickling=cache and not is_pypy,
-                        cache_path=cache_path)
+            self._save_module(file_io, root_node, lines, cache, cache_path,
+                              document_id if diff_cache else None, content)
         return root_node
 
+    def _save_module(self, file_io, module_node, lines, cache, cache_path, document_id,
+                     content):
+        if document_id is not None:
+            save_document(self._hashed, document_id, module_node, lines)
+            if not cache:
+                return
+        save_module(self._hashed, file_io, module_node, lines,
+                    # Never pickle in pypy, it's slow as hell.
+                    pickling=cache and not is_pypy,
+                    cache_path=cache_path,
+                    content=content)
+
     def _get_token_namespace(self):
         ns = self._token_namespace
         if ns is None:
@@ -207,13 +291,17 @@ class PythonGrammar(Grammar):
             bnf_text,
             tokenizer=self._tokenize_lines,
             parser=PythonParser,
-            diff_parser=DiffParser
+            diff_parser=DiffParser,
+            skeleton_parser=self._create_skeleton_parser
         )
         self.version_info = version_info
 
     def _tokenize_lines(self, lines, start_pos):
         return tokenize_lines(lines, self.version_info, start_pos=start_pos)
 
+    def _create_skeleton_parser(self, pgen_grammar, lines, **kwargs):
+        return SkeletonParser(pgen_grammar, self.version_info, lines, **kwargs)
+
     def _tokenize(self, code):
         # Used by Jedi.
         return tokenize(code, self.version_info)
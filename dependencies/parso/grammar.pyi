@@ -1,4 +1,4 @@
-from typing import Any, Callable, Generic, Optional, Sequence, TypeVar, Union
+from typing import Any, Callable, Generic, Hashable, Optional, Sequence, Tuple, TypeVar, Union
 from typing_extensions import Literal
 
 from parso.utils import PythonVersionInfo
@@ -17,6 +17,7 @@ class Grammar(Generic[_NodeT]):
         tokenizer: Callable[[Sequence[str], int], Sequence[_Token]],
         parser: Any = ...,
         diff_parser: Any = ...,
+        skeleton_parser: Any = ...,
     ) -> None: ...
     def parse(
         self,
@@ -27,6 +28,10 @@ class Grammar(Generic[_NodeT]):
         cache: bool = ...,
         diff_cache: bool = ...,
         cache_path: Optional[str] = ...,
+        lines: Optional[Sequence[str]] = ...,
+        diff_hint: Optional[Tuple[Sequence[str], int, int, int]] = ...,
+        document_id: Optional[Hashable] = ...,
+        skeleton: bool = ...,
     ) -> _NodeT: ...
 
 class PythonGrammar(Grammar):
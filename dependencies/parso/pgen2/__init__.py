@@ -7,4 +7,5 @@
 # Copyright 2014 David Halter and Contributors
 # Modifications are dual-licensed: MIT and PSF.
 
-from parso.pgen2.generator import generate_grammar
+from parso.pgen2.generator import generate_grammar, dump_grammar_tables, \
+    load_grammar_tables
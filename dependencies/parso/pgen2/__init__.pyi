@@ -1 +1,3 @@
 from parso.pgen2.generator import generate_grammar as generate_grammar
+from parso.pgen2.generator import dump_grammar_tables as dump_grammar_tables
+from parso.pgen2.generator import load_grammar_tables as load_grammar_tables
@@ -30,6 +30,12 @@ from ast import literal_eval
 
 from parso.pgen2.grammar_parser import GrammarParser, NFAState
 
+_TABLES_VERSION = 1
+"""
+Version number of the format of :func:`dump_grammar_tables`. Increment it when
+the format changes.
+"""
+
 
 class Grammar(object):
     """
@@ -274,6 +280,108 @@ def generate_grammar(bnf_grammar, token_namespace):
     return Grammar(start_nonterminal, rule_to_dfas, reserved_strings)
 
 
+def dump_grammar_tables(grammar):
+    """
+    Converts a generated grammar to plain data (lists, tuples, strings, ints
+    and bools) that can be pickled and loaded with :func:`load_grammar_tables`,
+    which is much faster than generating the grammar again.
+
+    DFA states are referenced by their index in the ``states`` list. The NFA
+    sets are not kept, they are only needed to generate the grammar.
+    """
+    states = []
+    indexes = {}
+    rules = []
+    for nonterminal, dfas in grammar.nonterminal_to_dfas.items():
+        for dfa_state in dfas:
+            indexes[id(dfa_state)] = len(states)
+            states.append(dfa_state)
+        rules.append((nonterminal, [indexes[id(d)] for d in dfas]))
+
+    def ref(dfa_state):
+        return indexes[id(dfa_state)]
+
+    def transition_key(transition):
+        if isinstance(transition, ReservedString):
+            return True, transition.value
+        return False, transition.name
+
+    return {
+        'version': _TABLES_VERSION,
+        'start_nonterminal': grammar.start_nonterminal,
+        'rules': rules,
+        'states': [
+            (
+                dfa_state.from_rule,
+                dfa_state.is_final,
+                [(label, ref(next_)) for label, next_ in dfa_state.arcs.items()],
+                [(nonterminal, ref(next_))
+                 for nonterminal, next_ in dfa_state.nonterminal_arcs.items()],
+                [(transition_key(transition), ref(plan.next_dfa),
+                  [ref(push) for push in plan.dfa_pushes])
+                 for transition, plan in dfa_state.transitions.items()],
+            )
+            for dfa_state in states
+        ],
+    }
+
+
+def load_grammar_tables(tables, token_namespace):
+    """
+    Recreates a grammar from the output of :func:`dump_grammar_tables`.
+
+    Raises a ``ValueError`` if the tables were created by another version of
+    this module.
+    """
+    if tables.get('version') != _TABLES_VERSION:
+        raise ValueError("Unsupported grammar tables version.")
+
+    reserved_strings = {}
+    token_types = {}
+    states = []
+    for from_rule, is_final, _, _, _ in tables['states']:
+        # Bypass __init__, the NFA sets are gone.
+        dfa_state = DFAState.__new__(DFAState)
+        dfa_state.from_rule = from_rule
+        dfa_state.nfa_set = None
+        dfa_state.is_final = is_final
+        dfa_state.arcs = {}
+        dfa_state.nonterminal_arcs = {}
+        dfa_state.transitions = {}
+        states.append(dfa_state)
+
+    def get_transition(key):
+        is_reserved, value = key
+        cache = reserved_strings if is_reserved else token_types
+        try:
+            return cache[value]
+        except KeyError:
+            if is_reserved:
+                transition = ReservedString(value)
+            else:
+                transition = getattr(token_namespace, value)
+            cache[value] = transition
+            return transition
+
+    for dfa_state, (_, _, arcs, nonterminal_arcs, transitions) \
+            in zip(states, tables['states']):
+        for label, index in arcs:
+            dfa_state.arcs[label] = states[index]
+        for nonterminal, index in nonterminal_arcs:
+            dfa_state.nonterminal_arcs[nonterminal] = states[index]
+        for key, next_index, pushes in transitions:
+            dfa_state.transitions[get_transition(key)] = DFAPlan(
+                states[next_index],
+                [states[index] for index in pushes]
+            )
+
+    rule_to_dfas = dict(
+        (nonterminal, [states[index] for index in indexes])
+        for nonterminal, indexes in tables['rules']
+    )
+    return Grammar(tables['start_nonterminal'], rule_to_dfas, reserved_strings)
+
+
 def _make_transition(token_namespace, reserved_syntax_strings, label):
     """
     Creates a reserved string ("if", "for", "*", ...) or returns the token type
@@ -36,3 +36,5 @@ class ReservedString:
     def __repr__(self) -> str: ...
 
 def generate_grammar(bnf_grammar: str, token_namespace: Any) -> Grammar[Any]: ...
+def dump_grammar_tables(grammar: Grammar[Any]) -> Mapping[str, Any]: ...
+def load_grammar_tables(tables: Mapping[str, Any], token_namespace: Any) -> Grammar[Any]: ...
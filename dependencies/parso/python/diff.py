@@ -7,12 +7,13 @@ fragments.
 """
 import re
 import difflib
+from bisect import bisect_left
 from collections import namedtuple
 import logging
 
 from parso.utils import split_lines
 from parso.python.parser import Parser
-from parso.python.tree import EndMarker
+from parso.python.tree import EndMarker, UsedNamesMapping
 from parso.python.tokenize import PythonToken
 from parso.python.token import PythonTokenTypes
 
@@ -36,6 +37,153 @@ def _get_next_leaf_if_indentation(leaf):
     return leaf
 
 
+def _get_opcodes_for_range(old_length, new_length, start, old_end, new_end):
+    """
+    Returns ``difflib.SequenceMatcher.get_opcodes`` compatible opcodes for a
+    single changed range of lines.
+    """
+    opcodes = []
+    if start > 0:
+        opcodes.append(('equal', 0, start, 0, start))
+    if start < old_end and start < new_end:
+        opcodes.append(('replace', start, old_end, start, new_end))
+    elif start < new_end:
+        opcodes.append(('insert', start, start, start, new_end))
+    elif start < old_end:
+        opcodes.append(('delete', start, old_end, start, start))
+    if old_end < old_length:
+        opcodes.append(('equal', old_end, old_length, new_end, new_length))
+    return opcodes
+
+
+def _get_unique_matches(old_lines, new_lines, alo, ahi, blo, bhi):
+    """
+    Returns the ``(old_index, new_index)`` pairs of the lines that appear
+    exactly once in both windows, in the order of the longest increasing
+    subsequence (patience diff).
+    """
+    counts = {}
+    for i in range(alo, ahi):
+        line = old_lines[i]
+        try:
+            counts[line][0] += 1
+        except KeyError:
+            counts[line] = [1, 0, i, None]
+    for j in range(blo, bhi):
+        try:
+            entry = counts[new_lines[j]]
+        except KeyError:
+            continue
+        entry[1] += 1
+        entry[3] = j
+
+    matches = sorted(
+        (old_index, new_index)
+        for old_count, new_count, old_index, new_index in counts.values()
+        if old_count == 1 and new_count == 1
+    )
+
+    # Patience sorting: the longest subsequence of matches that is increasing
+    # in the new lines as well.
+    tails = []
+    tail_indexes = []
+    predecessors = []
+    for index, (_, new_index) in enumerate(matches):
+        position = bisect_left(tails, new_index)
+        predecessors.append(tail_indexes[position - 1] if position else None)
+        if position == len(tails):
+            tails.append(new_index)
+            tail_indexes.append(index)
+        else:
+            tails[position] = new_index
+            tail_indexes[position] = index
+
+    result = []
+    index = tail_indexes[-1] if tail_indexes else None
+    while index is not None:
+        result.append(matches[index])
+        index = predecessors[index]
+    result.reverse()
+    return result
+
+
+def _get_matching_blocks(old_lines, new_lines):
+    """
+    Returns sorted ``(old_index, new_index, size)`` blocks of equal lines.
+    """
+    blocks = []
+    # Refining windows without end (e.g. a reversed file) would be quadratic,
+    # the remaining windows are just replaced once the budget is used up.
+    budget = 4 * (len(old_lines) + len(new_lines))
+    windows = [(0, len(old_lines), 0, len(new_lines))]
+    while windows:
+        alo, ahi, blo, bhi = windows.pop()
+
+        # The common prefix and suffix are cheap to find and usually cover
+        # almost the whole file, because most edits touch one region.
+        start = alo
+        while alo < ahi and blo < bhi and old_lines[alo] == new_lines[blo]:
+            alo += 1
+            blo += 1
+        if alo > start:
+            blocks.append((start, blo - (alo - start), alo - start))
+
+        end = ahi
+        while alo < ahi and blo < bhi and old_lines[ahi - 1] == new_lines[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+        if end > ahi:
+            blocks.append((ahi, bhi, end - ahi))
+
+        if alo == ahi or blo == bhi or budget <= 0:
+            continue
+        budget -= (ahi - alo) + (bhi - blo)
+
+        # Without unique lines the window is replaced as a whole, lines like
+        # blank lines and ``pass`` are not worth matching.
+        i, j = alo, blo
+        for old_index, new_index in _get_unique_matches(
+                old_lines, new_lines, alo, ahi, blo, bhi):
+            if i < old_index or j < new_index:
+                windows.append((i, old_index, j, new_index))
+            blocks.append((old_index, new_index, 1))
+            i, j = old_index + 1, new_index + 1
+        if i > alo:
+            windows.append((i, ahi, j, bhi))
+
+    blocks.sort()
+    return blocks
+
+
+def _get_opcodes(old_lines, new_lines):
+    """
+    Returns ``difflib.SequenceMatcher.get_opcodes`` compatible opcodes for
+    lines. The common prefix and suffix are trimmed first, the window between
+    them is diffed with a patience diff. In contrast to ``difflib`` it stays
+    linear for files with many repeated lines.
+    """
+    blocks = _get_matching_blocks(old_lines, new_lines)
+    opcodes = []
+    i = j = 0
+    for old_index, new_index, size in blocks + [(len(old_lines), len(new_lines), 0)]:
+        if i < old_index and j < new_index:
+            opcodes.append(('replace', i, old_index, j, new_index))
+        elif i < old_index:
+            opcodes.append(('delete', i, old_index, j, new_index))
+        elif j < new_index:
+            opcodes.append(('insert', i, old_index, j, new_index))
+        if size:
+            if opcodes and opcodes[-1][0] == 'equal':
+                # Merge adjacent blocks.
+                _, i1, _, j1, _ = opcodes.pop()
+                opcodes.append(('equal', i1, old_index + size, j1, new_index + size))
+            else:
+                opcodes.append(('equal', old_index, old_index + size,
+                                new_index, new_index + size))
+        i, j = old_index + size, new_index + size
+    return opcodes
+
+
 def _assert_valid_graph(node):
     """
     Checks if the parent/children relationship is correct.
@@ -78,6 +226,62 @@ def _assert_valid_graph(node):
             _assert_valid_graph(child)
 
 
+def _assert_valid_used_names(module, used_names):
+    """
+    Checks if the incrementally updated used names match the names of the
+    module.
+
+    This is a check that only runs during debugging/testing.
+    """
+    module._used_names = None
+    expected = module.get_used_names()
+    module._used_names = used_names
+
+    assert set(used_names) == set(expected), \
+        set(used_names).symmetric_difference(expected)
+    for value, names in expected.items():
+        assert used_names[value] == names, (value, used_names[value], names)
+
+
+def _iter_names(nodes):
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        try:
+            children = node.children
+        except AttributeError:
+            if node.type == 'name':
+                yield node
+        else:
+            stack.extend(reversed(children))
+
+
+def _update_used_names(used_names, removed_names, added_names):
+    """
+    Returns a new used names mapping without the removed name leaves and with
+    the added ones. Only the lists of the names that changed are copied.
+    """
+    changed = {}
+    removed_ids = set()
+    for name in removed_names:
+        removed_ids.add(id(name))
+        changed.setdefault(name.value, [])
+    for name in added_names:
+        changed.setdefault(name.value, []).append(name)
+
+    dct = dict(used_names._dict)
+    for value, added in changed.items():
+        names = [n for n in dct.get(value, ()) if id(n) not in removed_ids]
+        if added:
+            # Keep the names in the order of the module.
+            names = sorted(names + added, key=lambda n: n.start_pos)
+        if names:
+            dct[value] = names
+        else:
+            dct.pop(value, None)
+    return UsedNamesMapping(dct)
+
+
 def _get_debug_error_message(module, old_lines, new_lines):
     current_lines = split_lines(module.get_code(), keepends=True)
     current_diff = difflib.unified_diff(new_lines, current_lines)
@@ -188,13 +392,13 @@ class DiffParser(object):
         self._tokenizer = tokenizer
         self._module = module
 
-    def _reset(self):
+    def _reset(self, track_names=False):
         self._copy_count = 0
         self._parser_count = 0
 
-        self._nodes_tree = _NodesTree(self._module)
+        self._nodes_tree = _NodesTree(self._module, track_names)
 
-    def update(self, old_lines, new_lines):
+    def update(self, old_lines, new_lines, changed_range=None):
         '''
         The algorithm works as follows:
 
@@ -208,19 +412,27 @@ class DiffParser(object):
             - Parse from parsed_until_line + 1 to min(j2 + 1), hopefully not
               much more.
 
+        ``changed_range`` is an optional ``(start, old_end, new_end)`` tuple
+        for callers that know what changed: ``old_lines[start:old_end]`` was
+        replaced by ``new_lines[start:new_end]``. It saves diffing the lines.
+
         Returns the new module node.
         '''
         LOG.debug('diff parser start')
-        # Reset the used names cache so they get regenerated.
+        # The used names are updated with the changes at the end. Until then
+        # they are reset, in case the diff parser fails.
+        used_names = self._module._used_names
         self._module._used_names = None
 
         self._parser_lines_new = new_lines
 
-        self._reset()
+        self._reset(track_names=used_names is not None)
 
         line_length = len(new_lines)
-        sm = difflib.SequenceMatcher(None, old_lines, self._parser_lines_new)
-        opcodes = sm.get_opcodes()
+        if changed_range is None:
+            opcodes = _get_opcodes(old_lines, self._parser_lines_new)
+        else:
+            opcodes = _get_opcodes_for_range(len(old_lines), line_length, *changed_range)
         LOG.debug('line_lengths old: %s; new: %s' % (len(old_lines), line_length))
 
         for operation, i1, i2, j1, j2 in opcodes:
@@ -241,6 +453,10 @@ class DiffParser(object):
             else:
                 assert operation == 'delete'
 
+        removed_names = None
+        if used_names is not None:
+            removed_names = self._nodes_tree.get_removed_names()
+
         # With this action all change will finally be applied and we have a
         # changed module.
         self._nodes_tree.close()
@@ -261,6 +477,20 @@ class DiffParser(object):
                 ('(%s != %s) ' % (last_pos, line_length))
                 + _get_debug_error_message(self._module, old_lines, new_lines)
             )
+
+        if removed_names is not None:
+            used_names = _update_used_names(
+                used_names,
+                removed_names,
+                self._nodes_tree.added_names
+            )
+            if DEBUG_DIFF_PARSER:
+                try:
+                    _assert_valid_used_names(self._module, used_names)
+                except AssertionError:
+                    print(_get_debug_error_message(self._module, old_lines, new_lines))
+                    raise
+            self._module._used_names = used_names
         LOG.debug('diff parser end')
         return self._module
 
@@ -427,7 +657,10 @@ class DiffParser(object):
 
 
 class _NodesTreeNode(object):
-    _ChildrenGroup = namedtuple('_ChildrenGroup', 'prefix children line_offset last_line_offset_leaf')
+    _ChildrenGroup = namedtuple(
+        '_ChildrenGroup',
+        'prefix children line_offset last_line_offset_leaf is_copy'
+    )
 
     def __init__(self, tree_node, parent=None):
         self.tree_node = tree_node
@@ -437,7 +670,8 @@ class _NodesTreeNode(object):
 
     def finish(self):
         children = []
-        for prefix, children_part, line_offset, last_line_offset_leaf in self._children_groups:
+        for prefix, children_part, line_offset, last_line_offset_leaf, _ \
+                in self._children_groups:
             first_leaf = _get_next_leaf_if_indentation(
                 children_part[0].get_first_leaf()
             )
@@ -461,12 +695,22 @@ class _NodesTreeNode(object):
     def add_child_node(self, child_node):
         self._node_children.append(child_node)
 
-    def add_tree_nodes(self, prefix, children, line_offset=0, last_line_offset_leaf=None):
+    def add_tree_nodes(self, prefix, children, line_offset=0, last_line_offset_leaf=None,
+                       is_copy=False):
         if last_line_offset_leaf is None:
             last_line_offset_leaf = children[-1].get_last_leaf()
-        group = self._ChildrenGroup(prefix, children, line_offset, last_line_offset_leaf)
+        group = self._ChildrenGroup(
+            prefix, children, line_offset, last_line_offset_leaf, is_copy)
         self._children_groups.append(group)
 
+    def iter_copied_groups(self):
+        for group in self._children_groups:
+            if group.is_copy:
+                yield group
+        for node_child in self._node_children:
+            for group in node_child.iter_copied_groups():
+                yield group
+
     def get_last_line(self, suffix):
         line = 0
         if self._children_groups:
@@ -493,12 +737,15 @@ class _NodesTreeNode(object):
 
 
 class _NodesTree(object):
-    def __init__(self, module):
+    def __init__(self, module, track_names=False):
         self._base_node = _NodesTreeNode(module)
         self._working_stack = [self._base_node]
         self._module = module
         self._prefix_remainder = ''
         self.prefix = ''
+        # The names of the parsed nodes. They have to be collected when the
+        # nodes are added, copied nodes may be appended to parsed suites.
+        self.added_names = [] if track_names else None
 
     @property
     def parsed_until_line(self):
@@ -538,6 +785,8 @@ class _NodesTree(object):
         node = self._get_insertion_node(tree_nodes[0])
         assert node.tree_node.type in ('suite', 'file_input')
         node.add_tree_nodes(old_prefix, tree_nodes)
+        if self.added_names is not None:
+            self.added_names += _iter_names(tree_nodes)
         # tos = Top of stack
         self._update_tos(tree_nodes[-1])
 
@@ -688,12 +937,43 @@ class _NodesTree(object):
                 assert last_line_offset_leaf == ':'
             else:
                 last_line_offset_leaf = new_nodes[-1].get_last_leaf()
-            tos.add_tree_nodes(prefix, new_nodes, line_offset, last_line_offset_leaf)
+            tos.add_tree_nodes(prefix, new_nodes, line_offset, last_line_offset_leaf,
+                               is_copy=True)
             prefix = new_prefix
             self._prefix_remainder = ''
 
         return new_nodes, working_stack, prefix
 
+    def get_removed_names(self):
+        """
+        Returns the name leaves of the old module that are not copied, by
+        walking the leaves between the copied parts. This must happen before
+        :meth:`close`, while the old module is still intact.
+
+        Returns None if the copied parts could not be found.
+        """
+        ranges = sorted(
+            (
+                (group.children[0].get_first_leaf(), group.last_line_offset_leaf)
+                for group in self._base_node.iter_copied_groups()
+            ),
+            key=lambda r: r[0].start_pos
+        )
+
+        removed = []
+        leaf = self._module.get_first_leaf()
+        for first_leaf, last_leaf in ranges + [(None, None)]:
+            while leaf is not first_leaf:
+                if leaf is None:
+                    # The walk missed a copied part.
+                    return None
+                if leaf.type == 'name':
+                    removed.append(leaf)
+                leaf = leaf.get_next_leaf()
+            if last_leaf is not None:
+                leaf = last_leaf.get_next_leaf()
+        return removed
+
     def close(self):
         self._base_node.finish()
 
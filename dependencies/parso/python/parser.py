@@ -1,9 +1,11 @@
+from parso._compatibility import intern
 from parso.python import tree
 from parso.python.token import PythonTokenTypes
 from parso.parser import BaseParser
 
 
 NAME = PythonTokenTypes.NAME
+OP = PythonTokenTypes.OP
 INDENT = PythonTokenTypes.INDENT
 DEDENT = PythonTokenTypes.DEDENT
 
@@ -109,11 +111,18 @@ class Parser(BaseParser):
 
     def convert_leaf(self, type, value, prefix, start_pos):
         # print('leaf', repr(value), token.tok_name[type])
+        # The trees of big modules are mostly leaves. Share the strings that
+        # repeat, the prefixes are whitespace unless there are comments.
+        if '#' not in prefix:
+            prefix = intern(prefix)
         if type == NAME:
+            value = intern(value)
             if value in self._pgen_grammar.reserved_syntax_strings:
                 return tree.Keyword(value, start_pos, prefix)
             else:
                 return tree.Name(value, start_pos, prefix)
+        if type == OP:
+            value = intern(value)
 
         return self._leaf_map.get(type, tree.Operator)(value, start_pos, prefix)
 
@@ -0,0 +1,187 @@
+"""
+Skeleton parsing builds the module, the classes, the function signatures and
+the statements outside of functions, but skips the function bodies. Most of
+the functions of an imported library are never looked into, so this saves
+most of the parser time and memory.
+
+A skipped body is kept as a :class:`parso.python.tree.DeferredSuite` with its
+range in the lines of the module. It is parsed transparently once its
+children are accessed. The names of the skipped bodies are not part of
+``Module.get_used_names(include_deferred=False)``, names are never defined by
+a body in an outer scope (bodies with ``global`` statements are not skipped).
+"""
+from parso.python import tree
+from parso.python.diff import _iter_names, _update_used_names
+from parso.python.parser import Parser
+from parso.python.token import PythonTokenTypes
+from parso.python.tokenize import PythonToken
+
+NAME = PythonTokenTypes.NAME
+NEWLINE = PythonTokenTypes.NEWLINE
+INDENT = PythonTokenTypes.INDENT
+DEDENT = PythonTokenTypes.DEDENT
+ERRORTOKEN = PythonTokenTypes.ERRORTOKEN
+ERROR_DEDENT = PythonTokenTypes.ERROR_DEDENT
+
+
+class _DeferredBody(object):
+    """
+    The lines of a skipped function body. ``start_line`` and ``end_line`` are
+    1-based and inclusive.
+    """
+    def __init__(self, version, lines, newline, start_line, end_line, end_pos):
+        self.version = version
+        self.lines = lines
+        self.newline = newline
+        self.start_line = start_line
+        self.end_line = end_line
+        self.end_pos = end_pos
+
+
+class SkeletonParser(Parser):
+    """
+    A parser that skips the bodies of functions, see the module docstring.
+
+    Skipping is decided by the parser state: a body is skipped if an
+    ``INDENT`` token follows the newline of a function header. Bodies with
+    tokenizer errors are parsed, the same as bodies with ``global``
+    statements.
+    """
+    def __init__(self, pgen_grammar, version_info, lines, error_recovery=True,
+                 start_nonterminal='file_input'):
+        if not error_recovery:
+            raise NotImplementedError("Skeleton parsing needs error recovery.")
+        super(SkeletonParser, self).__init__(pgen_grammar, error_recovery,
+                                             start_nonterminal)
+        self._version = '%s.%s' % (version_info.major, version_info.minor)
+        self._lines = lines
+        self._skipped_bodies = {}  # Position of the skipped body -> end
+        self._deferred_suites = set()
+
+    def parse(self, tokens):
+        module = super(SkeletonParser, self).parse(self._skip_bodies(tokens))
+        # The error recovery may have parsed some of the bodies.
+        suites = set(s for s in self._deferred_suites if type(s) is tree.DeferredSuite)
+        if suites:
+            module._deferred_suites = suites
+        return module
+
+    def convert_node(self, nonterminal, children):
+        if nonterminal == 'suite' and len(children) == 4:
+            end = self._skipped_bodies.pop(children[2].start_pos, None)
+            if end is not None:
+                # children are NEWLINE INDENT pass_placeholder DEDENT.
+                end_line, end_pos = end
+                newline = children[0]
+                node = tree.DeferredSuite(_DeferredBody(
+                    self._version,
+                    self._lines,
+                    newline,
+                    # Comments before the first statement are part of the body.
+                    newline.start_pos[0] + 1,
+                    end_line,
+                    end_pos,
+                ))
+                newline.parent = node
+                self._deferred_suites.add(node)
+                return node
+        return super(SkeletonParser, self).convert_node(nonterminal, children)
+
+    def _is_function_body(self):
+        stack = self.stack
+        return (len(stack) > 1 and stack[-1].nonterminal == 'suite'
+                and len(stack[-1].nodes) == 1 and stack[-2].nonterminal == 'funcdef')
+
+    def _skip_bodies(self, tokens):
+        tokens = iter(tokens)
+        for token in tokens:
+            # The parser already consumed the previous tokens.
+            if token.type != INDENT or not self._is_function_body():
+                yield token
+                continue
+
+            body = [token]
+            indents = 1
+            last = None
+            for token in tokens:
+                body.append(token)
+                typ = token.type
+                if typ == INDENT:
+                    indents += 1
+                elif typ == DEDENT:
+                    indents -= 1
+                    if not indents:
+                        break
+                elif typ in (ERRORTOKEN, ERROR_DEDENT) \
+                        or typ == NAME and token.string == 'global':
+                    break
+                else:
+                    last = token
+
+            if indents or last is None:
+                for token in body:
+                    yield token
+                continue
+
+            # A placeholder that the parser accepts as a body.
+            start_pos = body[0].start_pos
+            end_line, column = last.end_pos
+            if not column:
+                # The body ends with a newline.
+                end_line -= 1
+            self._skipped_bodies[start_pos] = end_line, last.end_pos
+            yield body[0]
+            yield PythonToken(NAME, 'pass', start_pos, '')
+            yield PythonToken(NEWLINE, '', start_pos, '')
+            yield token
+
+
+def _get_body_statements(parsed, start_line):
+    funcdef = parsed.children[0]
+    if funcdef.type == 'funcdef' and funcdef.children[-1].type == 'suite':
+        # The error recovery may end the function early in broken code.
+        return funcdef.children[-1].children[1:] + parsed.children[1:-1]
+
+    leaves = []
+    leaf = parsed.get_first_leaf()
+    while leaf is not None:
+        if leaf.start_pos[0] >= start_line and leaf.type != 'endmarker':
+            leaves.append(leaf)
+        leaf = leaf.get_next_leaf()
+    if not leaves:
+        return []
+    return [tree.PythonErrorNode(leaves)]
+
+
+def parse_bodies(module, suites):
+    """
+    Parses the skipped bodies of deferred suites of a module and adds their
+    names to the used names of the module.
+    """
+    from parso.grammar import load_grammar
+
+    names = []
+    for suite in list(suites):
+        if type(suite) is not tree.DeferredSuite:
+            continue
+        body = suite._body
+        grammar = load_grammar(version=body.version)
+        # The body of a function at the start of the line before the body
+        # keeps the positions and the indentation of the body.
+        lines = ['def _():\n'] + body.lines[body.start_line - 1:body.end_line]
+        tokens = grammar._tokenizer(lines, (body.start_line - 1, 0))
+        parsed = Parser(grammar._pgen_grammar).parse(tokens)
+        statements = _get_body_statements(parsed, body.start_line)
+        for node in statements:
+            node.parent = suite
+
+        suite.children = [body.newline] + statements
+        suite.__class__ = tree.PythonNode
+        names += _iter_names(statements)
+
+    if module.type != 'file_input':
+        # Still being parsed.
+        return
+    module._deferred_suites.difference_update(suites)
+    if names and module._used_names is not None:
+        module._used_names = _update_used_names(module._used_names, (), names)
@@ -163,6 +163,59 @@ class PythonNode(PythonMixin, Node):
     __slots__ = ()
 
 
+_children = BaseNode.children
+
+
+class DeferredSuite(PythonNode):
+    """
+    The ``suite`` of a function whose body was skipped by a skeleton parse
+    (see :py:class:`parso.python.skeleton.SkeletonParser`). The body is parsed
+    from the lines of the module when the children are accessed, the node is
+    a normal ``suite`` afterwards.
+
+    The positions are known without parsing the body.
+    """
+    __slots__ = ()
+
+    def __init__(self, body):
+        super(DeferredSuite, self).__init__('suite', body)
+
+    @property
+    def children(self):
+        from parso.python.skeleton import parse_bodies
+        parse_bodies(self.get_root_node(), [self])
+        return self.children
+
+    @children.setter
+    def children(self, children):
+        _children.__set__(self, children)
+
+    @property
+    def _body(self):
+        return _children.__get__(self)
+
+    @property
+    def start_pos(self):
+        return self._body.newline.start_pos
+
+    @property
+    def end_pos(self):
+        return self._body.end_pos
+
+    def get_start_pos_of_prefix(self):
+        return self._body.newline.get_start_pos_of_prefix()
+
+    def get_first_leaf(self):
+        return self._body.newline
+
+    def __getstate__(self):
+        # Pickling the children would parse the body.
+        return None, {'type': self.type, 'parent': self.parent, 'children': self._body}
+
+    def __repr__(self):
+        return "<%s: @%s-%s>" % (type(self).__name__, self.start_pos[0], self.end_pos[0])
+
+
 class PythonErrorNode(PythonMixin, ErrorNode):
     __slots__ = ()
 
@@ -377,6 +430,23 @@ class Scope(PythonBaseNode, DocstringMixin):
         """
         return self.children[-1]
 
+    def parse_deferred_bodies(self):
+        """
+        Parses the function bodies within this scope that were skipped by a
+        skeleton parse.
+        """
+        module = self.get_root_node()
+        suites = getattr(module, '_deferred_suites', None)
+        if not suites:
+            return
+        if self is not module:
+            start_pos, end_pos = self.start_pos, self.end_pos
+            suites = [s for s in suites
+                      if start_pos <= s.start_pos and s.end_pos <= end_pos]
+        if suites:
+            from parso.python.skeleton import parse_bodies
+            parse_bodies(module, suites)
+
     def __repr__(self):
         try:
             name = self.name.value
@@ -393,12 +463,13 @@ class Module(Scope):
     Depending on the underlying parser this may be a full module or just a part
     of a module.
     """
-    __slots__ = ('_used_names',)
+    __slots__ = ('_used_names', '_deferred_suites')
     type = 'file_input'
 
     def __init__(self, children):
         super(Module, self).__init__(children)
         self._used_names = None
+        self._deferred_suites = None
 
     def _iter_future_import_names(self):
         """
@@ -428,16 +499,24 @@ class Module(Scope):
                 return True
         return False
 
-    def get_used_names(self):
+    def get_used_names(self, include_deferred=True):
         """
         Returns all the :class:`Name` leafs that exist in this module. This
         includes both definitions and references of names.
+
+        The function bodies skipped by a skeleton parse are parsed first,
+        unless ``include_deferred`` is False. Their names are missing then,
+        but all the names outside of functions are there.
         """
+        if include_deferred and self._deferred_suites:
+            self.parse_deferred_bodies()
         if self._used_names is None:
             # Don't directly use self._used_names to eliminate a lookup.
             dct = {}
 
             def recurse(node):
+                if type(node) is DeferredSuite:
+                    return
                 try:
                     children = node.children
                 except AttributeError:
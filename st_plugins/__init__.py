@@ -62,17 +62,6 @@ def is_repl(view):
     return view.settings().get("repl", False)
 
 
-def unique(items, pred=lambda x: x):
-    stack = set()
-
-    for i in items:
-        calculated = pred(i)
-        if calculated in stack:
-            continue
-        stack.add(calculated)
-        yield i
-
-
 class SublimePythonJediForkToggleLoggingLevelCommand(settings_utils.SettingsToggleList,
                                                      sublime_plugin.WindowCommand):
     _ody_key = "logging_level"
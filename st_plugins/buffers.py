@@ -0,0 +1,160 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+import threading
+
+from functools import partial
+
+import sublime
+import sublime_plugin
+
+from .mirror import BufferState
+from .mirror import get_changed_range
+from python_utils.sublime_text_utils import events
+
+__all__ = [
+    "SublimePythonJediForkBufferCloseListener",
+    "SublimePythonJediForkWindowCloseListener"
+]
+
+_trackers = {}  # Buffer ID -> _BufferTracker
+_lock = threading.Lock()
+
+
+class _BufferTracker():
+    def __init__(self):
+        # The change count the Jedi session mirrors. None until the full text was sent.
+        self.synced_change_count = None
+        # The change count after the recorded edits.
+        self.change_count = None
+        self.edits = []
+
+
+def get_buffer_state(view):
+    """Get the content of a view to send with a request.
+
+    Only the edits made since the previous request are sent if they were tracked,
+    otherwise the full text.
+
+    Parameters
+    ----------
+    view : sublime.View
+        A Sublime Text view.
+
+    Returns
+    -------
+    BufferState
+        The buffer content.
+    """
+    buffer_id = view.buffer_id()
+
+    with _lock:
+        tracker = _trackers.setdefault(buffer_id, _BufferTracker())
+        change_count = view.change_count()
+
+        if (tracker.synced_change_count is not None and
+                tracker.change_count == change_count):
+            edits = tracker.edits
+            base_change_count = tracker.synced_change_count
+            tracker.edits = []
+            tracker.synced_change_count = change_count
+        else:
+            edits = None
+
+    if edits is not None:
+        start, _, end = get_changed_range(edits)
+        return BufferState(
+            buffer_id,
+            change_count,
+            edits=edits,
+            base_change_count=base_change_count,
+            changed_text=view.substr(sublime.Region(view.text_point(start, 0),
+                                                    view.text_point(end, 0))),
+            line_count=view.rowcol(view.size())[0] + 1
+        )
+
+    while True:
+        text = view.substr(sublime.Region(0, view.size()))
+
+        # Make sure the text wasn't modified while being copied.
+        if view.change_count() == change_count:
+            break
+
+        change_count = view.change_count()
+
+    with _lock:
+        tracker.edits = []
+        tracker.change_count = tracker.synced_change_count = change_count
+
+    return BufferState(buffer_id, change_count, text=text)
+
+
+def forget_buffer(buffer_id):
+    """Stop tracking the edits of a buffer.
+
+    Parameters
+    ----------
+    buffer_id : int
+        The Sublime Text buffer ID.
+    """
+    with _lock:
+        _trackers.pop(buffer_id, None)
+
+
+class SublimePythonJediForkBufferCloseListener(sublime_plugin.EventListener):
+    """Frees what the Jedi sessions keep about a buffer once its last view is closed.
+    """
+
+    def on_close(self, view):
+        buffer_id = view.buffer_id()
+
+        for window in sublime.windows():
+            for other in window.views():
+                if other.id() != view.id() and other.buffer_id() == buffer_id:
+                    return
+
+        forget_buffer(buffer_id)
+        # Daemons may be busy, don't wait for them on the UI thread.
+        sublime.set_timeout_async(
+            partial(events.broadcast, "buffer_closed", buffer_id=buffer_id), 0)
+
+
+class SublimePythonJediForkWindowCloseListener(sublime_plugin.EventListener):
+    """Frees the Jedi daemon and the request scheduler of a window once it's closed.
+
+    Sublime Text 4 only, the daemons of closed windows are otherwise freed when another
+    window gets its daemon.
+    """
+
+    def on_pre_close_window(self, window):
+        sublime.set_timeout_async(
+            partial(events.broadcast, "window_closed", window_id=window.id()), 0)
+
+
+# Sublime Text 4 only. Without it, the full text is sent whenever a buffer changed.
+if hasattr(sublime_plugin, "TextChangeListener"):
+    __all__.append("SublimePythonJediForkBufferListener")
+
+    class SublimePythonJediForkBufferListener(sublime_plugin.TextChangeListener):
+        """Records the edits of the buffers used in requests.
+        """
+
+        def on_text_changed(self, changes):
+            with _lock:
+                tracker = _trackers.get(self.buffer.id())
+
+                if tracker is None or tracker.synced_change_count is None:
+                    return
+
+                view = self.buffer.primary_view()
+
+                if view is None:
+                    return
+
+                tracker.edits.extend(
+                    (c.a.row, c.a.col, c.b.row, c.b.col, c.str) for c in changes
+                )
+                tracker.change_count = view.change_count()
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+import sublime
+import sublime_plugin
+
+from .daemon import DAEMONS
+
+__all__ = [
+    "SublimePythonJediForkCacheStatisticsCommand"
+]
+
+_panel_name = "SublimePythonJediFork-cache"
+
+
+def _format_size(size):
+    return "{0:.1f} MB".format(size / (1024.0 * 1024.0))
+
+
+def format_statistics(name, statistics):
+    """Format the parser cache statistics of a process running Jedi.
+
+    Parameters
+    ----------
+    name : str
+        The process description.
+    statistics : dict, None
+        The ``memory`` and ``disk`` statistics, None if they are unknown.
+
+    Returns
+    -------
+    str
+        The report.
+    """
+    if statistics is None:
+        return "{0}\n  No answer from the completion server.\n".format(name)
+
+    memory = statistics["memory"]
+    disk = statistics["disk"]
+
+    return (
+        "{0}\n"
+        "  Memory: {1} modules ({2} open buffers), {3} of {4}, "
+        "{5} hits, {6} misses, {7} evictions\n"
+        "  Disk:   {8} pickles, {9} of {10}, {11} loaded, {12} missing or outdated, "
+        "hit rate {13:.0%}\n"
+    ).format(
+        name,
+        memory["entries"], memory["pinned"], _format_size(memory["size"]),
+        _format_size(memory["budget"]), memory["hits"], memory["misses"],
+        memory["evictions"],
+        disk["entries"], _format_size(disk["size"]), _format_size(disk["budget"]),
+        disk["disk_hits"], disk["disk_misses"], disk["hit_rate"]
+    )
+
+
+class SublimePythonJediForkCacheStatisticsCommand(sublime_plugin.WindowCommand):
+    """Show the parser cache statistics of the Jedi environments in an output panel.
+    """
+
+    def run(self):
+        # The completion servers may be busy, don't wait for them on the UI thread.
+        sublime.set_timeout_async(self._report, 0)
+
+    def _report(self):
+        parts = []
+
+        for daemon in DAEMONS.items():
+            name = daemon.env.executable
+
+            if daemon.worker is not None:
+                name += " (completion server)"
+
+            parts.append(format_statistics(name, daemon.get_cache_statistics()))
+
+        report = "\n".join(parts) or "No Jedi environment is running.\n"
+        sublime.set_timeout(lambda: self._show(report), 0)
+
+    def _show(self, report):
+        panel = self.window.create_output_panel(_panel_name)
+        panel.run_command("append", {"characters": report})
+        self.window.run_command("show_panel", {"panel": "output." + _panel_name})
+
+    def description(self):
+        return "Jedi parser cache statistics"
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+from functools import partial
+
+import sublime
+import sublime_plugin
+
+from .daemon import warm_cache
+
+__all__ = [
+    "SublimePythonJediForkWarmCacheCommand"
+]
+
+_status_key = "SublimePythonJediFork-warm-cache"
+_running = set()  # Window IDs
+
+
+def _show_progress(view, done, total):
+    sublime.set_timeout(
+        lambda: view.set_status(_status_key, "Jedi: caching modules {0}/{1}".format(done, total)),
+        0
+    )
+
+
+class SublimePythonJediForkWarmCacheCommand(sublime_plugin.WindowCommand):
+    """Parse the modules of the Jedi environment of the active view to the on-disk parser
+    cache, so that they are loaded from their pickles when they are first imported.
+
+    Useful once a new interpreter or virtualenv is configured. Modules that are already
+    cached are skipped.
+    """
+
+    def run(self):
+        view = self.window.active_view()
+        window_id = self.window.id()
+
+        if window_id in _running:
+            sublime.status_message("Jedi: the parser cache is already being warmed up.")
+            return
+
+        _running.add(window_id)
+        sublime.set_timeout_async(partial(self._warm_up, view), 0)
+
+    def _warm_up(self, view):
+        try:
+            counts = warm_cache(view, progress=partial(_show_progress, view))
+        finally:
+            _running.discard(self.window.id())
+            sublime.set_timeout(lambda: view.erase_status(_status_key), 0)
+
+        if counts is None:
+            sublime.status_message("Jedi: the parser cache warm-up failed, see the console.")
+        else:
+            sublime.status_message(
+                "Jedi: {parsed} modules parsed, {cached} already cached, "
+                "{error} unreadable.".format(**counts)
+            )
+
+    def is_enabled(self):
+        view = self.window.active_view()
+        return view is not None and view.match_selector(0, "source.python")
+
+    def description(self):
+        return "Jedi warm up the parser cache"
+
+
+if __name__ == "__main__":
+    pass
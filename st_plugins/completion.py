@@ -2,6 +2,8 @@
 # -*- coding: utf-8 -*-
 import re
 
+from functools import partial
+
 import sublime
 import sublime_plugin
 
@@ -9,6 +11,7 @@ from . import is_desired_scope
 from . import is_repl
 from . import logger
 from . import settings
+from .completion_cache import CompletionCache
 from .daemon import ask_daemon
 
 __all__ = [
@@ -127,7 +130,10 @@ class SublimePythonJediForkCompletions(sublime_plugin.ViewEventListener):
 
     _completions = []
     _previous_completions = []
-    _last_location = None
+
+    def __init__(self, view):
+        super().__init__(view)
+        self._cache = CompletionCache()
 
     def __enabled(self):
         if sublime.active_window().active_view().id() != self.view.id():
@@ -167,32 +173,48 @@ class SublimePythonJediForkCompletions(sublime_plugin.ViewEventListener):
             if not re.match(settings.get("only_complete_after_regex"), previous_char):
                 return None
 
-        if self._last_location != locations[0]:
-            self._last_location = locations[0]
-            ask_daemon(
-                self.view,
-                self._receive_completions,
-                "autocomplete",
-                location=locations[0]
-            )
-            # queue_utils.debounce(
-            #     partial(
-            #         ask_daemon,
-            #         self.view,
-            #         self._receive_completions,
-            #         "autocomplete",
-            #         location=locations[0]),
-            #     delay=settings.get("completion_timeout", 10),
-            #     key=_plugin_id.format("autocomplete")
-            # )
-            return [], _plugin_only_completion
+        if self._cache.match(self.view, locations[0]):
+            if self._cache.candidates is None:
+                # Still waiting for Jedi.
+                return [], _plugin_only_completion
+
+            completions = self._cache.refine(
+                fuzzy=settings.get("fuzzy_jedi_completions", False))
+            self._request_types(completions)
+
+            return completions
+
+        # Query Jedi at the start of the identifier, so that the completions can be
+        # refined locally while the rest of it is typed.
+        start = self._cache.reset(self.view, locations[0])
+        ask_daemon(
+            self.view,
+            partial(self._receive_completions, start=start),
+            "autocomplete",
+            {"prefix": self._cache.prefix},
+            location=start
+        )
+        # queue_utils.debounce(
+        #     partial(
+        #         ask_daemon,
+        #         self.view,
+        #         self._receive_completions,
+        #         "autocomplete",
+        #         location=locations[0]),
+        #     delay=settings.get("completion_timeout", 10),
+        #     key=_plugin_id.format("autocomplete")
+        # )
+        return [], _plugin_only_completion
+
+    def _receive_completions(self, view, completions, start=None):
+        if completions is None:
+            # The request failed. Ask again on the next keystroke.
+            if start == self._cache.start:
+                self._cache.clear()
 
-        if self._last_location == locations[0] and self._completions:
-            self._last_location = None
-            return self._completions
+            return
 
-    def _receive_completions(self, view, completions):
-        if not completions:
+        if not self._cache.set_candidates(start, completions) or not completions:
             return
 
         logger.debug("Completions: {0}".format(completions))
@@ -214,6 +236,34 @@ class SublimePythonJediForkCompletions(sublime_plugin.ViewEventListener):
                 "next_completion_if_showing": False
             })
 
+    def _request_types(self, completions):
+        """Request the types of the best ranked completions shown without one.
+
+        Parameters
+        ----------
+        completions : list
+            The refined completions, as they are shown.
+        """
+        precise_types = settings.get("precise_completion_types", -1)
+
+        if precise_types < 0:
+            return
+
+        names = self._cache.get_untyped(completions[:precise_types])
+
+        if names:
+            ask_daemon(
+                self.view,
+                partial(self._receive_types, start=self._cache.start),
+                "completion_types",
+                {"names": names},
+                location=self._cache.start
+            )
+
+    def _receive_types(self, view, types, start=None):
+        # Not shown before the next keystroke, reopening the popup would make it flicker.
+        self._cache.set_types(start, types)
+
     def _is_completions_subset(self):
         completions = {completion for _, completion in self._completions}
         previous = {completion for _, completion in self._previous_completions}
@@ -0,0 +1,228 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+import re
+
+import sublime
+
+from .ranking import rank_completions
+
+_identifier_tail = re.compile(r"\w*$")
+
+
+def get_identifier(view, location):
+    """Get the part of the identifier before a location.
+
+    Parameters
+    ----------
+    view : sublime.View
+        A Sublime Text view.
+    location : int
+        A point in the view.
+
+    Returns
+    -------
+    tuple
+        ``(start, prefix, head)``: the point where the identifier starts, the identifier
+        characters before ``location`` and the text of the line before the identifier.
+    """
+    line_head = view.substr(sublime.Region(view.line(location).begin(), location))
+    prefix = _identifier_tail.search(line_head).group()
+    head = line_head[:len(line_head) - len(prefix)]
+
+    return location - len(prefix), prefix, head
+
+
+class CompletionCache():
+    """Completions of the identifier being typed.
+
+    Jedi is queried once at the start of an identifier. While the identifier is being typed,
+    the candidates are filtered by the typed characters instead of querying Jedi again. The
+    cache is invalidated as soon as the identifier start moves (after typing ``.``, ``(``, a
+    newline, etc.) or the view is edited outside the identifier.
+
+    Only the best ranked completions get a precise type from Jedi. As the typed characters
+    change which completions are shown first, the types they lack are requested once per
+    identifier (see :py:meth:`get_untyped` and :py:meth:`set_types`).
+
+    Attributes
+    ----------
+    candidates : list, None
+        The completions at the identifier start. None while they are being requested.
+    start : int, None
+        The point where the identifier starts. None if the cache is empty.
+    """
+
+    def __init__(self):
+        """Initialization.
+        """
+        self.clear()
+
+    def clear(self):
+        """Empty the cache.
+        """
+        self.start = None
+        self.candidates = None
+        self._head = None
+        self._prefix = None
+        self._change_count = None
+        self._outside_size = None
+        self._types_requested = False
+
+    def reset(self, view, location):
+        """Start caching the completions of the identifier at a location.
+
+        Parameters
+        ----------
+        view : sublime.View
+            A Sublime Text view.
+        location : int
+            A point in the view.
+
+        Returns
+        -------
+        int
+            The point where the identifier starts. Completions must be requested there.
+        """
+        self.start, self._prefix, self._head = get_identifier(view, location)
+        self.candidates = None
+        self._change_count = view.change_count()
+        self._outside_size = view.size() - len(self._prefix)
+        self._types_requested = False
+
+        return self.start
+
+    @property
+    def prefix(self):
+        """str: The typed part of the identifier."""
+        return self._prefix
+
+    def set_candidates(self, start, candidates):
+        """Store the completions requested by :py:meth:`reset`.
+
+        Parameters
+        ----------
+        start : int
+            The point the completions were requested at.
+        candidates : list
+            The completions.
+
+        Returns
+        -------
+        bool
+            Whether they were stored (the cache wasn't reset in the meantime).
+        """
+        if start != self.start:
+            return False
+
+        self.candidates = candidates
+
+        return True
+
+    def match(self, view, location):
+        """Check whether the cache still applies to a location.
+
+        Parameters
+        ----------
+        view : sublime.View
+            A Sublime Text view.
+        location : int
+            A point in the view.
+
+        Returns
+        -------
+        bool
+            Whether the completions at ``location`` can be taken from the cache.
+        """
+        if self.start is None:
+            return False
+
+        start, prefix, head = get_identifier(view, location)
+        change_count = view.change_count()
+
+        # Every change must have been made to the identifier: one change count per
+        # character typed or deleted.
+        if (start != self.start or
+                head != self._head or
+                view.size() - len(prefix) != self._outside_size or
+                not 0 <= change_count - self._change_count <= abs(len(prefix) -
+                                                                   len(self._prefix))):
+            self.clear()
+            return False
+
+        self._prefix = prefix
+        self._change_count = change_count
+
+        return True
+
+    def refine(self, fuzzy=False):
+        """Filter and rank the cached completions by the typed part of the identifier.
+
+        Parameters
+        ----------
+        fuzzy : bool, optional
+            Whether the typed characters only have to appear in order, instead of being
+            a prefix.
+
+        Returns
+        -------
+        list
+            The matching completions. Those matching case-sensitively come first, the
+            order of the Jedi completions is kept otherwise.
+        """
+        return rank_completions(self.candidates or [], self._prefix, fuzzy,
+                                lambda completion: completion[0].split("\t", 1)[0])
+
+    def get_untyped(self, completions):
+        """Get the names of completions shown without a type, unless their types were
+        already requested for this identifier.
+
+        Each types request infers all the completions again, so it's only made once: for
+        the completions shown first after the first refinement that lacks types.
+
+        Parameters
+        ----------
+        completions : list
+            Completions returned by :py:meth:`refine`, e.g. the best ranked ones.
+
+        Returns
+        -------
+        list of str
+            The names to request the types of. Empty once a request was made.
+        """
+        if self._types_requested:
+            return []
+
+        names = [completion[1] for completion in completions if "\t" not in completion[0]]
+        self._types_requested = bool(names)
+
+        return names
+
+    def set_types(self, start, types):
+        """Add the types of completions to their labels.
+
+        Parameters
+        ----------
+        start : int
+            The point the types were requested at.
+        types : dict
+            Completion name -> type.
+
+        Returns
+        -------
+        bool
+            Whether a label was updated (the cache wasn't reset in the meantime).
+        """
+        if start != self.start or self.candidates is None or not types:
+            return False
+
+        self.candidates = [
+            (name + "\t" + types[name], name)
+            if "\t" not in label and types.get(name) else (label, name)
+            for label, name in self.candidates
+        ]
+
+        return True
+
+
+if __name__ == "__main__":
+    pass
@@ -1,6 +1,8 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
-from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
 
 from collections import defaultdict
 from functools import partial
@@ -9,29 +11,125 @@ from functools import wraps
 import jedi
 
 from jedi.api import environment
+from parso.cache import get_disk_statistics
+from parso.cache import get_statistics
+from parso.cache import set_content_validation
+from parso.cache import set_disk_budget
+from parso.cache import set_memory_budget
 
 import sublime
 
 
 from . import logger
 from . import settings
+from .buffers import forget_buffer
+from .buffers import get_buffer_state
 from .facade import JediFacade
+from .metrics import METRICS
+from .metrics import RequestTimer
+from .mirror import BufferOutOfSync
+from .pool import SharedPool
+from .scheduler import PRIORITY_INTERACTIVE
+from .scheduler import Scheduler
+from .session import JediSession
+from .worker import WorkerError
+from .worker import WorkerProcess
 from python_utils.sublime_text_utils import events
 from python_utils.sublime_text_utils import queue
 from python_utils.sublime_text_utils import utils
 
-DAEMONS = defaultdict(dict)  # per window
+# Shared by the windows using the same environment.
+DAEMONS = SharedPool(dispose=lambda daemon: daemon.shutdown(), max_size=4)
 REQUESTORS = defaultdict(dict)  # per window
 _plugin_id = "SublimePythonJedi-{}"
+_status_key = "SublimePythonJediFork"
+# Settings the completion server needs to answer requests.
+_server_settings = ("auto_complete_function_params", "fuzzy_jedi_completions",
+                    "precise_completion_types", "parser_cache_memory_limit",
+                    "parser_disk_cache_limit", "parser_cache_content_validation",
+                    "reference_search_processes")
 
 
 @events.on("settings_changed")
 def on_settings_changed(settings, **kwargs):
+    if settings.has_changed("environment_pool_size"):
+        DAEMONS.resize(settings.get("environment_pool_size", 4))
+
+    if settings.has_changed("parser_cache_memory_limit"):
+        set_memory_budget(settings.get("parser_cache_memory_limit", 500) * 1024 * 1024)
+
+    if settings.has_changed("parser_disk_cache_limit"):
+        set_disk_budget(settings.get("parser_disk_cache_limit", 500) * 1024 * 1024)
+
+    if settings.has_changed("parser_cache_content_validation"):
+        set_content_validation(settings.get("parser_cache_content_validation", True))
+
     if any((settings.has_changed("python_virtualenv"),
             settings.has_changed("python_interpreter"),
-            settings.has_changed("python_package_paths"))):
-        DAEMONS.clear()
-        REQUESTORS.clear()
+            settings.has_changed("python_package_paths"),
+            settings.has_changed("completion_server"),
+            settings.has_changed("completion_server_interpreter"),
+            settings.has_changed("completion_server_memory_limit"))):
+        # Only drop the daemons of the windows whose environment changed.
+        for window in sublime.windows():
+            key = DAEMONS.get_key(window.id())
+            view = window.active_view()
+
+            if key is not None and (view is None or _get_daemon_key(view, settings) != key):
+                DAEMONS.discard(window.id())
+
+
+@events.on("buffer_closed")
+def on_buffer_closed(buffer_id, **kwargs):
+    # The buffer may have been used by any window.
+    for daemon in DAEMONS.items():
+        daemon.close_buffer(buffer_id)
+
+
+@events.on("window_closed")
+def on_window_closed(window_id, **kwargs):
+    _forget_window(window_id)
+
+
+@events.on("plugin_loaded")
+def on_plugin_loaded():
+    DAEMONS.resize(settings.get("environment_pool_size", 4))
+    set_memory_budget(settings.get("parser_cache_memory_limit", 500) * 1024 * 1024)
+    set_disk_budget(settings.get("parser_disk_cache_limit", 500) * 1024 * 1024)
+    set_content_validation(settings.get("parser_cache_content_validation", True))
+
+
+@events.on("plugin_unloaded")
+def on_plugin_unloaded():
+    _clear_daemons()
+
+
+def _clear_daemons():
+    DAEMONS.clear()
+
+    for requestor in REQUESTORS.values():
+        requestor.shutdown()
+
+    REQUESTORS.clear()
+
+
+def _forget_window(window_id):
+    # The daemon is kept in the pool for other windows until it's evicted.
+    DAEMONS.release(window_id)
+    requestor = REQUESTORS.pop(window_id, None)
+
+    if requestor is not None:
+        requestor.shutdown()
+
+
+def _forget_closed_windows(window_id):
+    open_windows = set(window.id() for window in sublime.windows())
+    # Not listed yet while it's being opened.
+    open_windows.add(window_id)
+
+    for closed in (set(DAEMONS.owners()) | set(REQUESTORS)) - open_windows:
+        logger.debug("Forgetting closed window: {0}".format(closed))
+        _forget_window(closed)
 
 
 def _prepare_request_data(view, location):
@@ -40,25 +138,87 @@ def _prepare_request_data(view, location):
     current_line, current_column = view.rowcol(location)
 
     filename = view.file_name() or ""
-    source = view.substr(sublime.Region(0, view.size()))
+    source = get_buffer_state(view)
     return filename, source, current_line, current_column
 
 
+def _get_daemon_config(view, settings):
+    view_context = utils.get_view_context(view)
+    python_virtualenv = settings.get("python_virtualenv").get(sublime.platform(), "")
+    python_interpreter = settings.get("python_interpreter").get(sublime.platform(), "")
+    environment_path = utils.substitute_variables(view_context,
+                                                  python_virtualenv or python_interpreter)
+
+    if environment_path:
+        # Not os.path.realpath, a virtualenv interpreter is often a link to the system one.
+        environment_path = os.path.normcase(os.path.abspath(environment_path))
+
+    extra_packages = settings.get("python_package_paths").get(sublime.platform(), [])
+
+    if extra_packages:
+        extra_packages = utils.substitute_variables(view_context, extra_packages)
+
+    server_interpreter = ""
+
+    if settings.get("completion_server", False):
+        server_interpreter = utils.substitute_variables(
+            view_context,
+            settings.get("completion_server_interpreter", {}).get(sublime.platform(), "")
+        )
+
+    return {
+        "environment_path": environment_path,
+        "extra_packages": list(extra_packages),
+        "completion_server": settings.get("completion_server", False),
+        "server_interpreter": server_interpreter,
+        "server_memory_limit": settings.get("completion_server_memory_limit", 0),
+    }
+
+
+def _get_daemon_key(view, settings):
+    config = _get_daemon_config(view, settings)
+    return (config["environment_path"],
+            tuple(config["extra_packages"]),
+            config["completion_server"],
+            config["server_interpreter"],
+            config["server_memory_limit"])
+
+
 def _get_daemon(view):
     window_id = view.window().id()
-    if window_id not in DAEMONS:
-        DAEMONS[window_id] = Daemon(view, settings=settings)
-    return DAEMONS[window_id]
+    daemon = DAEMONS.get(window_id)
+
+    if daemon is None:
+        _forget_closed_windows(window_id)
+        daemon = DAEMONS.acquire(window_id, _get_daemon_key(view, settings),
+                                 partial(Daemon, view, settings=settings))
+
+    return daemon
 
 
 def _get_requestor(view):
     window_id = view.window().id()
     if window_id not in REQUESTORS:
-        REQUESTORS[window_id] = ThreadPoolExecutor(max_workers=1)
+        REQUESTORS[window_id] = Scheduler(name=_plugin_id.format(window_id))
     return REQUESTORS[window_id]
 
 
-def ask_daemon_sync(view, ask_type, ask_kwargs, location=None):
+def _request(daemon, view, ask_type, ask_kwargs, location, cancellation_check, timer,
+             progress):
+    with timer.stage("buffer"):
+        data = _prepare_request_data(view, location)
+
+    return daemon.request(
+        ask_type,
+        ask_kwargs or {},
+        *data,
+        cancellation_check=cancellation_check,
+        timer=timer,
+        progress=progress)
+
+
+def ask_daemon_sync(view, ask_type, ask_kwargs, location=None, cancellation_check=None,
+                    timer=None, progress=None):
     """Jedi sync request shortcut.
 
     Parameters
@@ -71,6 +231,14 @@ def ask_daemon_sync(view, ask_type, ask_kwargs, location=None):
         Description
     location : int, int, None, optional
         Description
+    cancellation_check : callable, None, optional
+        Returns True once the request became obsolete.
+    timer : metrics.RequestTimer, None, optional
+        Collects the timings of the request. If None, the timings are recorded in
+        ``metrics.METRICS`` once the request is answered.
+    progress : callable, None, optional
+        Called with the partial results of a streaming request (``references``), from
+        the thread that waits for the answer or from the server reader thread.
 
     Returns
     -------
@@ -78,13 +246,31 @@ def ask_daemon_sync(view, ask_type, ask_kwargs, location=None):
         Description
     """
     daemon = _get_daemon(view)
-    return daemon.request(
-        ask_type,
-        ask_kwargs or {},
-        *_prepare_request_data(view, location))
+    own_timer = timer is None
 
+    if own_timer:
+        timer = RequestTimer(ask_type)
 
-def ask_daemon(view, callback, ask_type, ask_kwargs=None, location=None):
+    try:
+        try:
+            return _request(daemon, view, ask_type, ask_kwargs, location,
+                            cancellation_check, timer, progress)
+        except BufferOutOfSync as err:
+            logger.debug(err)
+
+        # Start over sending the full text.
+        forget_buffer(view.buffer_id())
+
+        return _request(daemon, view, ask_type, ask_kwargs, location,
+                        cancellation_check, timer, progress)
+    finally:
+        if own_timer:
+            METRICS.add(timer)
+
+
+def ask_daemon(view, callback, ask_type, ask_kwargs=None, location=None,
+               priority=PRIORITY_INTERACTIVE, status=None, requeue=False,
+               cancellation_check=None, progress=None):
     """Jedi async request shortcut.
 
     Parameters
@@ -99,20 +285,85 @@ def ask_daemon(view, callback, ask_type, ask_kwargs=None, location=None):
         Description
     location : int, int, None, optional
         Description
+    priority : int, optional
+        Scheduler priority. Interactive requests always run before background work.
+    status : str, None, optional
+        Shown in the status bar of the view while the request runs.
+    requeue : bool, optional
+        Run the request again once the scheduler is idle when it is preempted by an
+        interactive request, instead of dropping it.
+    cancellation_check : callable, None, optional
+        Returns True once the request became obsolete. Replaces the check of the
+        scheduler: a preempted request isn't aborted then, it finishes first (its answer
+        is dropped and it is run again if ``requeue``).
+    progress : callable, None, optional
+        Called with the partial results of a streaming request (``references``).
+
+    Note
+    ----
+    A new request supersedes the pending or running request of the same type for the
+    same view. Obsolete inference is aborted at Jedi's cancellation checkpoints.
     """
     window_id = view.window().id()
-
-    def _async_summon():
-        answer = ask_daemon_sync(view, ask_type, ask_kwargs, location)
+    request_key = (view.id(), ask_type)
+
+    def _summon(timer, request):
+        if status:
+            view.set_status(_status_key, status)
+
+        try:
+            return ask_daemon_sync(view, ask_type, ask_kwargs, location,
+                                   cancellation_check=cancellation_check or request.is_cancelled,
+                                   timer=timer,
+                                   progress=progress)
+        finally:
+            if status:
+                view.erase_status(_status_key)
+
+    def _answer(timer, answer):
+        sublime.set_timeout_async(partial(_deliver, timer, answer, time.perf_counter()), 0)
+
+    def _deliver(timer, answer, answered_at):
+        timer.add("ui", time.perf_counter() - answered_at)
         run_in_active_view(window_id)(callback)(answer)
+        METRICS.add(timer)
+
+    def _submit():
+        # Timed from the end of the debounce delay, which isn't part of the latency.
+        timer = RequestTimer(ask_type)
+        requestor.submit(request_key, partial(_summon, timer), partial(_answer, timer),
+                         priority, requeue)
 
     if callback:
+        requestor = _get_requestor(view)
         queue.debounce(
-            partial(sublime.set_timeout_async, _async_summon, 0),
+            _submit,
             delay=settings.get("completion_timeout", 10),
-            key=_plugin_id.format("debounce")
+            key=_plugin_id.format("{0}-{1}".format(*request_key))
         )
-        # sublime.set_timeout_async(_async_summon, 0)
+
+
+def warm_cache(view, progress=None, cancellation_check=None):
+    """Parse the modules of the Jedi environment of a view to the on-disk parser cache.
+
+    Blocks until all the modules are cached, don't call this on the UI thread.
+
+    Parameters
+    ----------
+    view : sublime.View
+        A Sublime Text view.
+    progress : callable, None, optional
+        Called with the number of files done and the total every few files.
+    cancellation_check : callable, None, optional
+        Returns True once the warm-up should stop.
+
+    Returns
+    -------
+    dict, None
+        The number of ``parsed``, ``cached`` and ``error`` files. None if the completion
+        server failed or the warm-up was cancelled.
+    """
+    return _get_daemon(view).warm_cache(progress, cancellation_check)
 
 
 def run_in_active_view(window_id):
@@ -153,8 +404,15 @@ class Daemon():
         Description
     env : TYPE
         Description
+    extra_packages : list
+        Paths prepended to the environment ``sys.path``.
+    session : JediSession, None
+        Long-lived Jedi inference state reused by all requests. None when Jedi runs in the
+        completion server.
     sys_path : TYPE
         Description
+    worker : WorkerProcess, None
+        The out-of-process completion server, if enabled.
     """
 
     def __init__(self, view, settings):
@@ -167,33 +425,35 @@ class Daemon():
         settings : TYPE
             Description
         """
-        view_context = utils.get_view_context(view)
-        python_virtualenv = settings.get("python_virtualenv").get(sublime.platform(), "")
-        python_interpreter = settings.get("python_interpreter").get(sublime.platform(), "")
-
-        if python_virtualenv:
-            logger.debug("Jedi Environment: {0}".format(python_virtualenv))
-            self.env = environment.create_environment(
-                utils.substitute_variables(view_context, python_virtualenv),
-                safe=False
-            )
-        elif python_interpreter:
-            logger.debug("Jedi Environment: {0}".format(python_interpreter))
-            self.env = environment.create_environment(
-                utils.substitute_variables(view_context, python_interpreter),
-                safe=False
-            )
+        config = _get_daemon_config(view, settings)
+        environment_path = config["environment_path"]
+
+        if environment_path:
+            logger.debug("Jedi Environment: {0}".format(environment_path))
+            self.env = environment.create_environment(environment_path, safe=False)
         else:
             self.env = jedi.get_default_environment()
 
-        self.sys_path = self.env.get_sys_path()
         # prepare the extra packages if any
-        extra_packages = settings.get("python_package_paths").get(sublime.platform(), [])
+        self.extra_packages = config["extra_packages"]
 
-        if extra_packages:
-            logger.debug("Jedi Extra Packages: {0}".format(extra_packages))
-            self.sys_path = utils.substitute_variables(
-                view_context, extra_packages) + self.sys_path
+        if self.extra_packages:
+            logger.debug("Jedi Extra Packages: {0}".format(self.extra_packages))
+
+        self.sys_path = None
+        self.session = None
+        self.worker = None
+
+        if config["completion_server"]:
+            self.worker = WorkerProcess(
+                executable=config["server_interpreter"] or self.env.executable,
+                environment=environment_path,
+                extra_packages=self.extra_packages,
+                memory_limit=config["server_memory_limit"]
+            )
+        else:
+            self.sys_path = self.extra_packages + self.env.get_sys_path()
+            self.session = JediSession(self.env, self.sys_path)
 
     def request(
             self,
@@ -202,7 +462,10 @@ class Daemon():
             filename,
             source,
             line,
-            column):
+            column,
+            cancellation_check=None,
+            timer=None,
+            progress=None):
         """Send request to daemon process.
 
         Parameters
@@ -213,36 +476,169 @@ class Daemon():
             Description
         filename : TYPE
             Description
-        source : TYPE
-            Description
+        source : mirror.BufferState
+            The buffer content.
         line : TYPE
             Description
         column : TYPE
             Description
+        cancellation_check : callable, None, optional
+            Returns True once the request became obsolete.
+        timer : metrics.RequestTimer, None, optional
+            Collects the timings of the request stages.
+        progress : callable, None, optional
+            Called with the partial results of a streaming request.
 
         Returns
         -------
         TYPE
             Description
+
+        Raises
+        ------
+        BufferOutOfSync
+            If ``source`` only contains edits that the session can't apply.
         """
         logger.info("Sending request to daemon for '{0}'".format(request_type))
         logger.debug((request_type, request_kwargs, filename, line, column))
 
-        facade = JediFacade(
-            env=self.env,
-            complete_funcargs=settings.get("auto_complete_function_params"),
-            source=source,
-            line=line + 1,
-            column=column,
-            filename=filename,
-            sys_path=self.sys_path,
-        )
+        if self.worker is not None:
+            try:
+                answer = self.worker.request(
+                    request_type,
+                    request_kwargs,
+                    filename,
+                    source.as_dict(),
+                    line + 1,
+                    column,
+                    settings={key: settings.get(key) for key in _server_settings},
+                    cancellation_check=cancellation_check,
+                    timer=timer,
+                    progress=progress,
+                )
+            except WorkerError as err:
+                logger.error(err)
+                answer = None
+
+            logger.debug("Answer: {0}".format(answer))
+
+            return answer
+
+        with self.session.lock:
+            facade = JediFacade(
+                env=self.env,
+                complete_funcargs=settings.get("auto_complete_function_params"),
+                source=source,
+                line=line + 1,
+                column=column,
+                filename=filename,
+                sys_path=self.sys_path,
+                session=self.session,
+                cancellation_check=cancellation_check,
+                timer=timer,
+            )
+
+            answer = facade.get(request_type, request_kwargs, progress=progress)
 
-        answer = facade.get(request_type, request_kwargs)
         logger.debug("Answer: {0}".format(answer))
 
         return answer
 
+    def close_buffer(self, buffer_id):
+        """Forget a closed buffer.
+
+        Parameters
+        ----------
+        buffer_id : int
+            The Sublime Text buffer ID.
+        """
+        if self.worker is not None:
+            self.worker.close_buffer(buffer_id)
+        else:
+            with self.session.lock:
+                self.session.close_buffer(buffer_id)
+
+    def get_cache_statistics(self):
+        """Get the parser cache statistics of the process running Jedi.
+
+        Returns
+        -------
+        dict, None
+            The ``memory`` and ``disk`` statistics (see ``parso.cache.get_statistics`` and
+            ``parso.cache.get_disk_statistics``). None if the completion server didn't
+            answer.
+        """
+        if self.worker is not None:
+            return self.worker.get_cache_statistics()
+
+        return {"memory": get_statistics(),
+                "disk": get_disk_statistics(jedi.settings.cache_directory)}
+
+    def warm_cache(self, progress=None, cancellation_check=None):
+        """Parse the modules of the environment to the on-disk parser cache.
+
+        The completion server parses them in a process pool. Without it, they are parsed
+        one by one in the plugin host, whose interpreter loads the pickles.
+
+        Parameters
+        ----------
+        progress : callable, None, optional
+            Called with the number of files done and the total every few files.
+        cancellation_check : callable, None, optional
+            Returns True once the warm-up should stop.
+
+        Returns
+        -------
+        dict, None
+            The number of ``parsed``, ``cached`` and ``error`` files. None if the
+            completion server failed or the warm-up was cancelled.
+        """
+        if self.worker is not None:
+            try:
+                return self.worker.warm_cache(
+                    settings={key: settings.get(key) for key in _server_settings},
+                    progress=progress,
+                    cancellation_check=cancellation_check,
+                )
+            except WorkerError as err:
+                logger.error(err)
+                return None
+
+        return self.session.warm_cache(processes=0, progress=progress,
+                                       cancellation_check=cancellation_check)
+
+    def shutdown(self):
+        """Stop the completion server, if any, and the environment subprocess.
+
+        A daemon evicted from the pool may still answer a request of another window:
+        the in-process state is then disposed by a thread, once the request is done.
+        """
+        if self.worker is not None:
+            self.worker.stop()
+
+        if self.session is None:
+            self._dispose()
+        elif self.session.lock.acquire(blocking=False):
+            try:
+                self._dispose()
+            finally:
+                self.session.lock.release()
+        else:
+            threading.Thread(target=self._dispose_when_idle, daemon=True).start()
+
+    def _dispose_when_idle(self):
+        with self.session.lock:
+            self._dispose()
+
+    def _dispose(self):
+        if self.session is not None:
+            self.session.clear()
+
+        subprocess = getattr(self.env, "_subprocess", None)
+
+        if subprocess is not None and not subprocess.is_crashed:
+            subprocess._kill()
+
 
 if __name__ == "__main__":
     pass
@@ -1,18 +1,39 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
+import time
+
 from itertools import chain
 from operator import itemgetter
 
 import jedi
 
 from jedi.api.completion import Parameter
+from jedi.api.exceptions import InferenceCancelled
+from jedi.inference.imports import infer_import
+from jedi.inference.name_index import get_name_index
+from jedi.inference.references import rebuild_name_index
 
 from . import logger
 from . import settings
-from . import unique
+from .metrics import RequestTimer
+from .ranking import rank_completions
+
+# Seconds a reference search runs per request, the other requests are answered in between.
+_SEARCH_STEP = 0.1
+
+
+def unique(items, pred=lambda x: x):
+    stack = set()
+
+    for i in items:
+        calculated = pred(i)
+        if calculated in stack:
+            continue
+        stack.add(calculated)
+        yield i
 
 
-def format_completion(complete):
+def format_completion(complete, precise=True):
     """Returns a tuple of the string that would be visible in
     the completion dialogue and the completion word
 
@@ -20,13 +41,21 @@ def format_completion(complete):
     ----------
     complete : jedi.api_classes.Completion
         Description
+    precise : bool, optional
+        Infer the type of the completion if needed. Otherwise only the type known
+        without inference is shown, if any.
 
     Returns
     -------
     tuple
         Description
     """
-    return (complete.name + "\t" + complete.type, complete.name)
+    completion_type = complete.type if precise else complete.syntactic_type
+
+    if completion_type is None:
+        return (complete.name, complete.name)
+
+    return (complete.name + "\t" + completion_type, complete.name)
 
 
 def get_function_parameters(call_signature, with_keywords=True):
@@ -94,6 +123,12 @@ class JediFacade():
      autocomplete | get_autocomplete
     -------------------------------
      funcargs     | get_funcargs
+    -------------------------------
+     prewarm      | get_prewarm
+    --------------------------------
+     name_index   | get_name_index
+    --------------------------------
+     references   | get_references
     --------------------------------
 
     Attributes
@@ -102,6 +137,8 @@ class JediFacade():
         Description
     script : TYPE
         Description
+    timer : metrics.RequestTimer
+        Timings of the request stages.
     """
 
     def __init__(
@@ -113,17 +150,33 @@ class JediFacade():
             column,
             filename="",
             encoding="utf-8",
-            sys_path=None):
-        filename = filename or None
-        self.script = jedi.Script(
-            source=source,
-            line=line,
-            column=column,
-            path=filename,
-            encoding=encoding,
-            environment=env,
-            sys_path=sys_path,
-        )
+            sys_path=None,
+            session=None,
+            cancellation_check=None,
+            timer=None):
+        self.timer = timer or RequestTimer("")
+        self.session = session
+
+        with self.timer.stage("parse"):
+            if session is not None:
+                self.script = session.script(
+                    source=source,
+                    line=line,
+                    column=column,
+                    filename=filename,
+                    encoding=encoding,
+                    cancellation_check=cancellation_check,
+                )
+            else:
+                self.script = jedi.Script(
+                    source=source,
+                    line=line,
+                    column=column,
+                    path=filename or None,
+                    encoding=encoding,
+                    environment=env,
+                    sys_path=sys_path,
+                )
 
     def get(self, _action, *args, **kwargs):
         """Action dispatcher.
@@ -144,6 +197,8 @@ class JediFacade():
         """
         try:
             return getattr(self, "get_" + _action)(*args, **kwargs)
+        except InferenceCancelled:
+            logger.debug("`JediFacade.get_{0}` cancelled".format(_action))
         except Exception:
             logger.exception("`JediFacade.get_{0}` failed".format(_action))
 
@@ -163,17 +218,23 @@ class JediFacade():
             Description
         """
         complete_all = settings.get("auto_complete_function_params", "all") == "all"
-        call_parameters = self._complete_call_assigments(
-            with_keywords=complete_all,
-            with_values=complete_all
-        )
+
+        with self.timer.stage("signatures"):
+            call_parameters = list(self._complete_call_assigments(
+                with_keywords=complete_all,
+                with_values=complete_all
+            ))
+
         return ", ".join(p[1] for p in call_parameters)
 
-    def get_autocomplete(self, *args, **kwargs):
+    def get_autocomplete(self, request_kwargs=None, *args, **kwargs):
         """Jedi completion.
 
         Parameters
         ----------
+        request_kwargs : dict, None, optional
+            ``prefix``, the typed part of the identifier, when the completions are
+            requested at its start to be refined locally.
         *args
             Description
         **kwargs
@@ -184,26 +245,199 @@ class JediFacade():
         TYPE
             Description
         """
-        completions = chain(
-            self._complete_call_assigments(with_keywords=True,
-                                           with_values=True),
-            self._completion()
-        )
+        with self.timer.stage("signatures"):
+            call_parameters = list(self._complete_call_assigments(with_keywords=True,
+                                                                  with_values=True))
+
+        prefix = (request_kwargs or {}).get("prefix", "")
+        completions = chain(call_parameters, self._completion(prefix))
         return list(unique(completions, itemgetter(0)))
 
-    def _completion(self):
+    def get_completion_types(self, request_kwargs=None, *args, **kwargs):
+        """Infer the types of some of the completions, the ones that became the best
+        ranked while the identifier was refined locally.
+
+        Parameters
+        ----------
+        request_kwargs : dict, None, optional
+            ``names``, the names of the completions.
+        *args
+            Description
+        **kwargs
+            Description
+
+        Returns
+        -------
+        dict
+            Completion name -> type.
+        """
+        names = set((request_kwargs or {}).get("names", ()))
+
+        with self.timer.stage("inference"):
+            completions = [complete for complete in self.script.completions()
+                           if complete.name in names]
+
+        with self.timer.stage("format"):
+            return {complete.name: complete.type for complete in completions}
+
+    def get_prewarm(self, *args, **kwargs):
+        """Load what the first completions in the buffer need: builtins, typing and the
+        imported modules (with their stubs) and names (with their signatures).
+
+        Everything loaded is kept by the session for the next requests.
+
+        Parameters
+        ----------
+        *args
+            Description
+        **kwargs
+            Description
+
+        Returns
+        -------
+        int
+            The number of imported names resolved.
+        """
+        inference_state = self.script._inference_state
+        inference_state.builtins_module
+        inference_state.typing_module
+
+        module_context = self.script._get_module_context()
+        count = 0
+
+        for import_node in self.script._module_node.iter_imports():
+            for name in import_node.get_defined_names():
+                for value in infer_import(module_context, name):
+                    value.get_signatures()
+
+                count += 1
+
+        return count
+
+    def get_name_index(self, request_kwargs=None, *args, **kwargs):
+        """Statistics of the name index of the Jedi project of the buffer, the index of
+        the files that contain each identifier, used to find references.
+
+        Parameters
+        ----------
+        request_kwargs : dict, None, optional
+            With ``rebuild`` True, all the files of the project are indexed again first.
+        *args
+            Description
+        **kwargs
+            Description
+
+        Returns
+        -------
+        dict
+            The ``path`` and ``size`` of the pickled index and the number of indexed
+            ``files`` and ``names``.
+        """
+        inference_state = self.script._inference_state
+
+        if (request_kwargs or {}).get("rebuild"):
+            return rebuild_name_index(inference_state)
+
+        return get_name_index(inference_state).get_statistics()
+
+    def get_references(self, request_kwargs=None, progress=None, *args, **kwargs):
+        """Find the references of the name under the cursor.
+
+        The references of the buffer are found first, then the ones of each module that
+        contains the name. With a ``search`` ID and a session, the search stops after a
+        short while and the next request with the same ID continues it, so that the
+        session isn't held by the whole search.
+
+        Parameters
+        ----------
+        request_kwargs : dict, None, optional
+            ``limit``, the maximum number of references, None for all of them, and
+            ``search``, the ID of the search to start or continue.
+        progress : callable, None, optional
+            Called with each batch of references as soon as it's found.
+        *args
+            Description
+        **kwargs
+            Description
+
+        Returns
+        -------
+        tuple
+            ``(references, done)``: the path (empty for an unsaved buffer), line (1 based),
+            column (0 based) and code line of each reference found by this request, and
+            whether the search is over.
+        """
+        request_kwargs = request_kwargs or {}
+        search_id = request_kwargs.get("search")
+        resumable = search_id is not None and self.session is not None
+        batches = self.session.get_search(search_id) if resumable else None
+
+        if batches is not None:
+            # The other modules import the buffer module that was searched already.
+            self.script._get_module_context()
+        else:
+            batches = self.script.iter_references(*self.script._pos,
+                                                  limit=request_kwargs.get("limit"))
+
+            if resumable:
+                self.session.add_search(search_id, batches)
+
+        references = []
+        started = time.perf_counter()
+
+        with self.timer.stage("references"):
+            for definitions in batches:
+                batch = [(d.module_path or "", d.line, d.column, d.get_line_code().strip())
+                         for d in definitions]
+                references.extend(batch)
+
+                if progress is not None:
+                    progress(batch)
+
+                if resumable and time.perf_counter() - started > _SEARCH_STEP:
+                    return references, False
+
+        return references, True
+
+    def _completion(self, prefix=""):
         """Regular completions.
 
         :rtype: list of (str, str)
 
-        Yields
-        ------
-        TYPE
+        Parameters
+        ----------
+        prefix : str, optional
+            The typed part of the identifier, the completions are ranked by it the same
+            way as they are refined locally.
+
+        Returns
+        -------
+        list
             Description
         """
-        completions = self.script.completions(fuzzy=settings.get("fuzzy_jedi_completions", False))
-        for complete in completions:
-            yield format_completion(complete)
+        with self.timer.stage("context"):
+            self.script._get_module_context()
+
+        with self.timer.stage("inference"):
+            completions = self.script.completions(
+                fuzzy=settings.get("fuzzy_jedi_completions", False))
+
+        # Only the best ranked completions get a precise type, the others are shown as
+        # fast as possible. They are ranked like the list that is actually shown.
+        precise_types = settings.get("precise_completion_types", -1)
+
+        if precise_types < 0:
+            precise = None
+        else:
+            ranked = rank_completions(completions, prefix,
+                                      settings.get("fuzzy_jedi_completions", False),
+                                      lambda complete: complete.name)
+            precise = set(id(complete) for complete in ranked[:precise_types])
+
+        with self.timer.stage("format"):
+            return [format_completion(complete,
+                                      precise=precise is None or id(complete) in precise)
+                    for complete in completions]
 
     def _complete_call_assigments(
             self,
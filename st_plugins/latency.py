@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+import os
+
+import sublime_plugin
+
+from . import logger
+from .metrics import METRICS
+
+__all__ = [
+    "SublimePythonJediForkLatencyReportCommand"
+]
+
+_panel_name = "SublimePythonJediFork-latency"
+
+
+class SublimePythonJediForkLatencyReportCommand(sublime_plugin.WindowCommand):
+    """Show the latency percentiles of the Jedi requests in an output panel.
+
+    The recorded requests are also appended to ``export_path`` as JSON Lines if given.
+    """
+
+    def run(self, export_path=""):
+        report = METRICS.report()
+
+        if export_path:
+            export_path = os.path.expanduser(export_path)
+
+            try:
+                count = METRICS.export(export_path)
+            except (IOError, OSError) as err:
+                logger.error("Unable to export latencies: {0}".format(err))
+            else:
+                report += "\n{0} requests exported to {1}\n".format(count, export_path)
+
+        panel = self.window.create_output_panel(_panel_name)
+        panel.run_command("append", {"characters": report})
+        self.window.run_command("show_panel", {"panel": "output." + _panel_name})
+
+    def description(self):
+        return "Jedi request latencies"
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,243 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+import json
+import math
+import threading
+import time
+
+from collections import OrderedDict
+from collections import deque
+from contextlib import contextmanager
+
+# Request stages, in the order they happen.
+STAGES = ("buffer", "parse", "signatures", "context", "inference", "format", "ui", "total")
+PERCENTILES = (50, 95, 99)
+
+
+class RequestTimer():
+    """Timings of the stages of a request.
+
+    Attributes
+    ----------
+    request_type : str
+        The request type (``autocomplete``, ``funcargs``, etc.).
+    timings : OrderedDict
+        Stage name -> seconds.
+    """
+
+    def __init__(self, request_type):
+        """Initialization.
+
+        Parameters
+        ----------
+        request_type : str
+            The request type.
+        """
+        self.request_type = request_type
+        self.timings = OrderedDict()
+        self._created = time.time()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        """Time a stage of the request.
+
+        Parameters
+        ----------
+        name : str
+            The stage name.
+        """
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        """Add time to a stage.
+
+        Parameters
+        ----------
+        name : str
+            The stage name.
+        seconds : float
+            The time spent.
+        """
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def update(self, timings):
+        """Add the timings of another timer (e.g. measured by the completion server).
+
+        Parameters
+        ----------
+        timings : dict
+            Stage name -> seconds.
+        """
+        for name, seconds in timings.items():
+            self.add(name, seconds)
+
+    def stop(self):
+        """Record the total time of the request.
+        """
+        self.timings["total"] = time.perf_counter() - self._start
+
+    def as_dict(self):
+        """Get the timings as a JSON serializable dictionary.
+
+        Returns
+        -------
+        dict
+            The request type, its start time and the timings in milliseconds.
+        """
+        return {
+            "type": self.request_type,
+            "time": self._created,
+            "timings": {name: round(seconds * 1000, 3) for name, seconds in self.timings.items()},
+        }
+
+
+def percentile(sorted_samples, percent):
+    """Nearest-rank percentile.
+
+    Parameters
+    ----------
+    sorted_samples : list
+        The samples, sorted.
+    percent : int
+        The percentile (0 - 100).
+
+    Returns
+    -------
+    float
+        The percentile. 0 if there are no samples.
+    """
+    if not sorted_samples:
+        return 0.0
+
+    rank = max(1, int(math.ceil(percent / 100.0 * len(sorted_samples))))
+
+    return sorted_samples[rank - 1]
+
+
+class LatencyRecorder():
+    """Latency histograms per request type and stage.
+
+    Only the latest ``max_samples`` requests are kept.
+    """
+
+    def __init__(self, max_samples=1000):
+        """Initialization.
+
+        Parameters
+        ----------
+        max_samples : int, optional
+            The number of requests kept.
+        """
+        self._records = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def add(self, timer):
+        """Record the timings of a finished request.
+
+        Parameters
+        ----------
+        timer : RequestTimer
+            The request timings.
+        """
+        if "total" not in timer.timings:
+            timer.stop()
+
+        with self._lock:
+            self._records.append(timer.as_dict())
+
+    def get_histograms(self):
+        """Get the latency percentiles.
+
+        Returns
+        -------
+        OrderedDict
+            Request type -> stage -> ``(count, p50, p95, p99)`` in milliseconds.
+        """
+        with self._lock:
+            records = list(self._records)
+
+        samples = OrderedDict()
+
+        for record in records:
+            stages = samples.setdefault(record["type"], OrderedDict())
+
+            for name, milliseconds in record["timings"].items():
+                stages.setdefault(name, []).append(milliseconds)
+
+        histograms = OrderedDict()
+
+        for request_type in sorted(samples):
+            stages = samples[request_type]
+            histograms[request_type] = OrderedDict()
+
+            for name in sorted(stages, key=lambda s: STAGES.index(s) if s in STAGES else
+                               len(STAGES)):
+                values = sorted(stages[name])
+                histograms[request_type][name] = (len(values),) + tuple(
+                    percentile(values, p) for p in PERCENTILES)
+
+        return histograms
+
+    def report(self):
+        """Format the latency percentiles as a table.
+
+        Returns
+        -------
+        str
+            The report.
+        """
+        lines = []
+
+        for request_type, stages in self.get_histograms().items():
+            lines.append("{0}".format(request_type))
+            lines.append("    {0:<12}{1:>8}{2:>10}{3:>10}{4:>10}".format(
+                "stage (ms)", "count", *("p{0}".format(p) for p in PERCENTILES)))
+
+            for name, (count, p50, p95, p99) in stages.items():
+                lines.append("    {0:<12}{1:>8}{2:>10.1f}{3:>10.1f}{4:>10.1f}".format(
+                    name, count, p50, p95, p99))
+
+            lines.append("")
+
+        return "\n".join(lines) or "No requests recorded yet."
+
+    def export(self, path):
+        """Append the recorded requests to a JSON Lines file.
+
+        Parameters
+        ----------
+        path : str
+            The file path.
+
+        Returns
+        -------
+        int
+            The number of requests written.
+        """
+        with self._lock:
+            records = list(self._records)
+
+        with open(path, "a") as jsonl:
+            for record in records:
+                jsonl.write(json.dumps(record, sort_keys=True) + "\n")
+
+        return len(records)
+
+    def clear(self):
+        """Forget the recorded requests.
+        """
+        with self._lock:
+            self._records.clear()
+
+
+METRICS = LatencyRecorder()
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,209 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+from parso import split_lines
+
+
+class BufferOutOfSync(Exception):
+    """Raised when buffer edits can't be applied because the mirrored lines are missing or
+    stale. The full buffer text has to be sent instead.
+    """
+    pass
+
+
+def get_changed_range(edits):
+    """Get the lines changed by buffer edits.
+
+    Parameters
+    ----------
+    edits : list
+        A list of ``(row_a, col_a, row_b, col_b, text)`` tuples.
+
+    Returns
+    -------
+    tuple
+        The changed lines as ``(start, old_end, new_end)``: the old lines ``[start:old_end]``
+        were replaced by the new lines ``[start:new_end]``.
+    """
+    start = old_end = new_end = None
+
+    for row_a, _, row_b, _, text in edits:
+        end = row_b + 1
+        added = text.count("\n") - (row_b - row_a)
+
+        if start is None:
+            start, old_end, new_end = row_a, end, end + added
+        else:
+            # Lines outside of the range changed so far are the same in the old lines.
+            old_end += max(0, end - new_end)
+            new_end = max(new_end, end) + added
+            start = min(start, row_a)
+
+    if start is None:
+        return 0, 0, 0
+
+    return start, old_end, new_end
+
+
+class BufferState():
+    """The content of a buffer sent with a request.
+
+    Either the full ``text`` of the buffer or the ``edits`` made since ``base_change_count``.
+    Edits come with the resulting text of the changed lines and the line count, so that a
+    mirror can verify it applied them correctly.
+
+    Attributes
+    ----------
+    base_change_count : int, None
+        The change count the edits are relative to.
+    buffer_id : int
+        The Sublime Text buffer ID.
+    change_count : int
+        The buffer change count after the edits.
+    changed_text : str, None
+        The text of the lines changed by the edits (see :py:func:`get_changed_range`).
+    edits : list, None
+        A list of ``(row_a, col_a, row_b, col_b, text)`` tuples, applied in order. Each one
+        replaces the text between the two (0 based) positions with ``text``.
+    line_count : int, None
+        The number of lines after the edits.
+    text : str, None
+        The full buffer text.
+    """
+
+    def __init__(self, buffer_id, change_count, text=None, edits=None, base_change_count=None,
+                 changed_text=None, line_count=None):
+        """Initialization.
+
+        Parameters
+        ----------
+        buffer_id : int
+            The Sublime Text buffer ID.
+        change_count : int
+            The buffer change count after the edits.
+        text : str, None, optional
+            The full buffer text.
+        edits : list, None, optional
+            The edits made since ``base_change_count``.
+        base_change_count : int, None, optional
+            The change count the edits are relative to.
+        changed_text : str, None, optional
+            The text of the lines changed by the edits.
+        line_count : int, None, optional
+            The number of lines after the edits.
+        """
+        self.buffer_id = buffer_id
+        self.change_count = change_count
+        self.text = text
+        self.edits = edits
+        self.base_change_count = base_change_count
+        self.changed_text = changed_text
+        self.line_count = line_count
+
+    def as_dict(self):
+        """Convert to a dictionary (to pickle it without referencing this module).
+
+        Returns
+        -------
+        dict
+            The buffer state.
+        """
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create from a dictionary created by :py:meth:`as_dict`.
+
+        Parameters
+        ----------
+        data : dict
+            The buffer state.
+
+        Returns
+        -------
+        BufferState
+            The buffer state.
+        """
+        return cls(**data)
+
+
+class LineMirror():
+    """Mirrored lines of a buffer.
+
+    The lines follow ``parso.split_lines(code, keepends=True)`` conventions, so they can be
+    handed to the parser as they are. Applying edits creates a new list, the previous one
+    is left untouched for the diff parser to compare against.
+
+    Attributes
+    ----------
+    change_count : int
+        The buffer change count the lines correspond to.
+    lines : list
+        The buffer lines.
+    """
+
+    def __init__(self, text, change_count):
+        """Initialization.
+
+        Parameters
+        ----------
+        text : str
+            The buffer text.
+        change_count : int
+            The buffer change count.
+        """
+        self.lines = split_lines(text, keepends=True)
+        self.change_count = change_count
+
+    def apply(self, state):
+        """Apply the edits of a buffer state.
+
+        Parameters
+        ----------
+        state : BufferState
+            The buffer edits.
+
+        Returns
+        -------
+        tuple
+            The changed lines (see :py:func:`get_changed_range`).
+
+        Raises
+        ------
+        BufferOutOfSync
+            If the edits don't apply to the mirrored lines or their result doesn't match
+            the buffer.
+        """
+        if self.change_count != state.base_change_count:
+            raise BufferOutOfSync("Mirror of buffer {0} is at change {1}, not {2}.".format(
+                state.buffer_id, self.change_count, state.base_change_count))
+
+        lines = list(self.lines)
+
+        for row_a, col_a, row_b, col_b, text in state.edits:
+            if row_b >= len(lines) or (row_a, col_a) > (row_b, col_b):
+                raise BufferOutOfSync("Edit out of range: {0}".format((row_a, col_a, row_b, col_b)))
+
+            replacement = split_lines(lines[row_a][:col_a] + text + lines[row_b][col_b:],
+                                      keepends=True)
+
+            if row_b < len(lines) - 1:
+                # Every line but the last one ends with a newline, which leaves an empty
+                # line after splitting.
+                replacement.pop()
+
+            lines[row_a:row_b + 1] = replacement
+
+        start, old_end, new_end = get_changed_range(state.edits)
+
+        if (len(lines) != state.line_count or
+                "".join(lines[start:new_end]) != state.changed_text):
+            raise BufferOutOfSync("Edits of buffer {0} didn't apply.".format(state.buffer_id))
+
+        self.lines = lines
+        self.change_count = state.change_count
+
+        return start, old_end, new_end
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+from functools import partial
+
+import sublime
+import sublime_plugin
+
+from .daemon import ask_daemon_sync
+
+__all__ = [
+    "SublimePythonJediForkNameIndexStatisticsCommand",
+    "SublimePythonJediForkRebuildNameIndexCommand"
+]
+
+_panel_name = "SublimePythonJediFork-name-index"
+_status_key = "SublimePythonJediFork-name-index"
+
+
+def format_statistics(statistics):
+    """Format the statistics of a name index.
+
+    Parameters
+    ----------
+    statistics : dict, None
+        The ``path``, ``files``, ``names`` and ``size`` of the index, None if they are
+        unknown.
+
+    Returns
+    -------
+    str
+        The report.
+    """
+    if statistics is None:
+        return "No answer from Jedi.\n"
+
+    return (
+        "{path}\n"
+        "  {files} files, {names} names, {0:.1f} MB on disk\n"
+    ).format(statistics["size"] / (1024.0 * 1024.0), **statistics)
+
+
+class _NameIndexCommand(sublime_plugin.WindowCommand):
+
+    rebuild = False
+
+    def run(self):
+        view = self.window.active_view()
+        # The whole project may be read, don't wait for it on the UI thread.
+        sublime.set_timeout_async(partial(self._ask, view), 0)
+
+    def _ask(self, view):
+        return ask_daemon_sync(view, "name_index", {"rebuild": self.rebuild}, location=0)
+
+    def is_enabled(self):
+        view = self.window.active_view()
+        return view is not None and view.match_selector(0, "source.python")
+
+
+class SublimePythonJediForkNameIndexStatisticsCommand(_NameIndexCommand):
+    """Show the statistics of the name index of the Jedi project of the active view in
+    an output panel.
+
+    The index maps the identifiers to the files that contain them, references are only
+    searched in these files.
+    """
+
+    def _ask(self, view):
+        report = format_statistics(super()._ask(view))
+        sublime.set_timeout(lambda: self._show(report), 0)
+
+    def _show(self, report):
+        panel = self.window.create_output_panel(_panel_name)
+        panel.run_command("append", {"characters": report})
+        self.window.run_command("show_panel", {"panel": "output." + _panel_name})
+
+    def description(self):
+        return "Jedi name index statistics"
+
+
+class SublimePythonJediForkRebuildNameIndexCommand(_NameIndexCommand):
+    """Index all the files of the Jedi project of the active view again.
+
+    The index is kept up to date while searching references, rebuilding it drops the
+    files that were deleted or moved.
+    """
+
+    rebuild = True
+
+    def _ask(self, view):
+        view.set_status(_status_key, "Jedi: indexing the project...")
+
+        try:
+            statistics = super()._ask(view)
+        finally:
+            view.erase_status(_status_key)
+
+        if statistics is None:
+            sublime.status_message("Jedi: the name index rebuild failed, see the console.")
+        else:
+            sublime.status_message(
+                "Jedi: {files} files and {names} names indexed.".format(**statistics))
+
+    def description(self):
+        return "Jedi rebuild the name index"
+
+
+if __name__ == "__main__":
+    pass
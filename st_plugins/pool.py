@@ -0,0 +1,256 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+import threading
+
+from collections import OrderedDict
+
+from . import logger
+
+
+class _Entry():
+    def __init__(self, item):
+        self.item = item
+        self.owners = set()
+
+
+class SharedPool():
+    """Reference-counted pool of expensive objects shared by several owners.
+
+    Owners (e.g. windows) acquire the item for a key (e.g. a resolved interpreter path).
+    Items are kept after their last owner released them, so they can be reused, until they
+    are evicted: least recently used first, unowned before owned.
+
+    Attributes
+    ----------
+    max_size : int
+        Maximum number of live items. 0 for no limit.
+    """
+
+    def __init__(self, dispose, max_size=0):
+        """Initialization.
+
+        Parameters
+        ----------
+        dispose : callable
+            Called with the evicted items.
+        max_size : int, optional
+            Maximum number of live items. 0 for no limit.
+        """
+        self.max_size = max_size
+        self._dispose = dispose
+        self._entries = OrderedDict()  # Key -> _Entry, least recently used first.
+        self._owners = {}  # Owner -> key.
+        self._lock = threading.RLock()
+
+    def get(self, owner):
+        """Get the item an owner acquired.
+
+        Parameters
+        ----------
+        owner : hashable
+            The owner.
+
+        Returns
+        -------
+        object
+            The item. None if the owner has none.
+        """
+        with self._lock:
+            key = self._owners.get(owner)
+
+            if key is None:
+                return None
+
+            self._entries.move_to_end(key)
+
+            return self._entries[key].item
+
+    def get_key(self, owner):
+        """Get the key of the item an owner acquired.
+
+        Parameters
+        ----------
+        owner : hashable
+            The owner.
+
+        Returns
+        -------
+        hashable
+            The key. None if the owner has no item.
+        """
+        with self._lock:
+            return self._owners.get(owner)
+
+    def acquire(self, owner, key, factory):
+        """Get the item for a key, creating it if needed, and make an owner share it.
+
+        An item previously acquired by the owner for another key is released. The item is
+        created without holding the pool lock, the other owners can still use theirs.
+
+        Parameters
+        ----------
+        owner : hashable
+            The owner.
+        key : hashable
+            The item key.
+        factory : callable
+            Creates the item if there is none for ``key``.
+
+        Returns
+        -------
+        object
+            The item.
+        """
+        evicted = []
+        created = None
+
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+
+                if entry is None and created is not None:
+                    entry = self._entries[key] = _Entry(created)
+                    created = None
+
+                if entry is not None:
+                    if self._owners.get(owner) != key:
+                        evicted.extend(self._release(owner, keep=key))
+
+                    self._entries.move_to_end(key)
+                    entry.owners.add(owner)
+                    self._owners[owner] = key
+                    evicted.extend(self._evict(keep=key))
+                    break
+
+            created = factory()
+
+        if created is not None:
+            # Another owner created an item for the key in the meantime.
+            evicted.append(created)
+
+        for item in evicted:
+            self._dispose(item)
+
+        return entry.item
+
+    def release(self, owner):
+        """Stop an owner sharing its item.
+
+        The item is evicted if it isn't used anymore and the pool is over its size.
+
+        Parameters
+        ----------
+        owner : hashable
+            The owner.
+        """
+        with self._lock:
+            evicted = self._release(owner)
+
+        for item in evicted:
+            self._dispose(item)
+
+    def discard(self, owner):
+        """Release the item of an owner and evict it if nobody else shares it.
+
+        Parameters
+        ----------
+        owner : hashable
+            The owner.
+        """
+        evicted = []
+
+        with self._lock:
+            key = self._owners.get(owner)
+
+            if key is None:
+                return
+
+            self._release(owner)
+
+            if not self._entries[key].owners:
+                evicted.append(self._entries.pop(key).item)
+
+        for item in evicted:
+            self._dispose(item)
+
+    def owners(self):
+        """Get the owners that acquired an item.
+
+        Returns
+        -------
+        list
+            The owners.
+        """
+        with self._lock:
+            return list(self._owners)
+
+    def items(self):
+        """Get the live items.
+
+        Returns
+        -------
+        list
+            The items, least recently used first.
+        """
+        with self._lock:
+            return [entry.item for entry in self._entries.values()]
+
+    def resize(self, max_size):
+        """Change the maximum number of live items.
+
+        Parameters
+        ----------
+        max_size : int
+            Maximum number of live items. 0 for no limit.
+        """
+        with self._lock:
+            self.max_size = max_size
+            evicted = self._evict()
+
+        for item in evicted:
+            self._dispose(item)
+
+    def clear(self):
+        """Evict all the items.
+        """
+        with self._lock:
+            evicted = [entry.item for entry in self._entries.values()]
+            self._entries.clear()
+            self._owners.clear()
+
+        for item in evicted:
+            self._dispose(item)
+
+    def _release(self, owner, keep=None):
+        key = self._owners.pop(owner, None)
+
+        if key is not None:
+            self._entries[key].owners.discard(owner)
+
+        return self._evict(keep=keep)
+
+    def _evict(self, keep=None):
+        evicted = []
+
+        while self.max_size and len(self._entries) > self.max_size:
+            candidates = [k for k in self._entries if k != keep]
+
+            if not candidates:
+                break
+
+            unowned = [k for k in candidates if not self._entries[k].owners]
+            key = (unowned or candidates)[0]
+            entry = self._entries.pop(key)
+            logger.debug("Evicting pooled entry: {0}".format(key))
+
+            # Owners acquire a new item on their next use.
+            for owner in entry.owners:
+                self._owners.pop(owner, None)
+
+            evicted.append(entry.item)
+
+        return evicted
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+from functools import partial
+
+import sublime
+import sublime_plugin
+
+from . import is_repl
+from . import logger
+from . import settings
+from .daemon import ask_daemon
+from .scheduler import PRIORITY_BACKGROUND
+from python_utils.sublime_text_utils import events
+
+__all__ = [
+    "SublimePythonJediForkPrewarm"
+]
+
+_prewarmed = {}  # Buffer ID -> change count
+
+
+def prewarm(view):
+    """Load builtins, typing and the imports of a view in the background.
+
+    Nothing is done if the buffer was already pre-warmed and hasn't changed since.
+
+    Parameters
+    ----------
+    view : sublime.View
+        A Sublime Text view.
+    """
+    if (not settings.get("prewarm", True) or
+            view is None or view.window() is None or
+            not view.match_selector(0, "source.python") or
+            (is_repl(view) and not settings.get("enable_in_sublime_repl"))):
+        return
+
+    buffer_id = view.buffer_id()
+    change_count = view.change_count()
+
+    if _prewarmed.get(buffer_id) == change_count:
+        return
+
+    ask_daemon(
+        view,
+        partial(_on_prewarmed, buffer_id, change_count),
+        "prewarm",
+        location=0,
+        priority=PRIORITY_BACKGROUND,
+        status="Jedi: indexing...",
+        # Typing right after opening a file would otherwise drop it until the next
+        # activation.
+        requeue=True
+    )
+
+
+def _on_prewarmed(buffer_id, change_count, view, count):
+    if count is not None:
+        logger.debug("Pre-warmed {0} imported names.".format(count))
+        _prewarmed[buffer_id] = change_count
+
+
+@events.on("plugin_loaded")
+def on_plugin_loaded():
+    def _prewarm_active_views():
+        for window in sublime.windows():
+            prewarm(window.active_view())
+
+    sublime.set_timeout_async(_prewarm_active_views, 0)
+
+
+class SublimePythonJediForkPrewarm(sublime_plugin.EventListener):
+    """Pre-warms the Jedi session when a view is activated."""
+
+    def on_activated_async(self, view):
+        prewarm(view)
+
+    def on_close(self, view):
+        _prewarmed.pop(view.buffer_id(), None)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+
+def _fuzzy_match(prefix, name):
+    position = 0
+
+    for char in prefix:
+        position = name.find(char, position) + 1
+
+        if not position:
+            return False
+
+    return True
+
+
+def rank_completions(completions, prefix, fuzzy=False, get_name=lambda completion: completion):
+    """Filter and rank completions by the typed part of an identifier.
+
+    This is the order the completions are shown in, the completion server uses it to
+    choose the ones that get a precise type.
+
+    Parameters
+    ----------
+    completions : iterable
+        The completions, in the order of Jedi.
+    prefix : str
+        The typed part of the identifier.
+    fuzzy : bool, optional
+        Whether the typed characters only have to appear in order, instead of being
+        a prefix.
+    get_name : callable, optional
+        Returns the name of a completion.
+
+    Returns
+    -------
+    list
+        The matching completions. Those matching case-sensitively come first, the
+        order of ``completions`` is kept otherwise.
+    """
+    lower_prefix = prefix.lower()
+    matches = []
+
+    for completion in completions:
+        name = get_name(completion)
+        lower_name = name.lower()
+
+        if fuzzy:
+            if not _fuzzy_match(lower_prefix, lower_name):
+                continue
+        elif not lower_name.startswith(lower_prefix):
+            continue
+
+        matches.append((not name.startswith(prefix), completion))
+
+    matches.sort(key=lambda match: match[0])
+
+    return [completion for _, completion in matches]
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+from itertools import count
+
+import sublime
+import sublime_plugin
+
+from .daemon import ask_daemon
+from .scheduler import PRIORITY_BACKGROUND
+
+__all__ = [
+    "SublimePythonJediForkFindReferencesCommand"
+]
+
+_panel_name = "SublimePythonJediFork-references"
+_searches = {}  # Window ID -> ID of the last search
+_search_ids = count()
+
+
+def format_references(batch):
+    """Format references as the lines of the output panel.
+
+    Parameters
+    ----------
+    batch : list of (str, int, int, str)
+        The path, line (1 based), column (0 based) and code line of each reference.
+
+    Returns
+    -------
+    str
+        One line per reference, ``path:line:column: code``.
+    """
+    return "".join(
+        "{0}:{1}:{2}: {3}\n".format(path or "<unsaved>", line, column + 1, code)
+        for path, line, column, code in batch
+    )
+
+
+class SublimePythonJediForkFindReferencesCommand(sublime_plugin.TextCommand):
+    """Find the references of the name under the cursor, listed in an output panel.
+
+    The references are added to the panel as they are found: the ones of the buffer
+    first, then the ones of each module that contains the name. A new search stops the
+    previous one of the window.
+
+    The search runs as background requests of a fraction of a second each, the
+    completions of the window are answered in between.
+    """
+
+    def run(self, edit, limit=1000):
+        window = self.view.window()
+        search_id = _searches[window.id()] = next(_search_ids)
+        word = self.view.substr(self.view.word(self.view.sel()[0]))
+
+        panel = window.create_output_panel(_panel_name)
+        panel.settings().set("result_file_regex", r"^(.+):(\d+):(\d+): ")
+        panel.run_command("append", {"characters": "References of '{0}':\n".format(word)})
+        window.run_command("show_panel", {"panel": "output." + _panel_name})
+
+        self._search(window, panel, search_id, limit, [0])
+
+    def _search(self, window, panel, search_id, limit, found):
+        def is_cancelled():
+            return _searches.get(window.id()) != search_id
+
+        def append(characters):
+            sublime.set_timeout(
+                lambda: panel.run_command("append", {"characters": characters}), 0)
+
+        def add(batch):
+            # Counted as they are shown, the answer of a preempted request is dropped.
+            found[0] += len(batch)
+            append(format_references(batch))
+
+        def receive(view, answer):
+            if is_cancelled():
+                return
+
+            if answer is None:
+                append("The search failed, see the console.\n")
+            elif not answer[1]:
+                self._search(window, panel, search_id, limit, found)
+            elif found[0] == limit:
+                append("The first {0} references.\n".format(limit))
+            else:
+                append("{0} references.\n".format(found[0]))
+
+        ask_daemon(
+            self.view,
+            receive,
+            "references",
+            {"limit": limit, "search": search_id},
+            priority=PRIORITY_BACKGROUND,
+            requeue=True,
+            cancellation_check=is_cancelled,
+            progress=add,
+        )
+
+    def is_enabled(self):
+        return self.view.match_selector(self.view.sel()[0].begin(), "source.python")
+
+    def description(self):
+        return "Jedi find references"
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,230 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+import heapq
+import itertools
+import threading
+
+from . import logger
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+
+class Request():
+    """A scheduled request.
+
+    Attributes
+    ----------
+    callback : callable, None
+        Called with the answer, unless the request was cancelled in the meantime.
+    func : callable
+        The work to do. Called with the request as its only argument.
+    key : tuple
+        Requests with the same key supersede each other (e.g. ``(view_id, "autocomplete")``).
+    priority : int
+        Lower values are run first.
+    requeue : bool
+        Run the request again when it was preempted by a request with a higher priority.
+    """
+
+    def __init__(self, key, func, callback=None, priority=PRIORITY_INTERACTIVE,
+                 requeue=False):
+        """Initialization.
+
+        Parameters
+        ----------
+        key : tuple
+            Requests with the same key supersede each other.
+        func : callable
+            The work to do.
+        callback : callable, None, optional
+            Called with the answer.
+        priority : int, optional
+            Lower values are run first.
+        requeue : bool, optional
+            Run the request again when it was preempted.
+        """
+        self.key = key
+        self.func = func
+        self.callback = callback
+        self.priority = priority
+        self.requeue = requeue
+        self.preempted = False
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Mark the request as obsolete.
+        """
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        """Check if the request is obsolete.
+
+        Jedi calls this method at its cancellation checkpoints.
+
+        Returns
+        -------
+        bool
+            Whether the request was cancelled.
+        """
+        return self._cancelled.is_set()
+
+
+class Scheduler():
+    """Latest-wins request scheduler.
+
+    Requests are run one at a time in a worker thread, ordered by priority. Submitting
+    a request cancels the pending or running request with the same key, and the running
+    request if it has a lower priority (background work never delays interactive requests).
+    Preempted requests submitted with ``requeue`` are queued again, so they run once the
+    requests with a higher priority are done.
+    """
+
+    def __init__(self, name="SublimePythonJediFork-Scheduler"):
+        """Initialization.
+
+        Parameters
+        ----------
+        name : str, optional
+            The name of the worker thread.
+        """
+        self._name = name
+        self._queue = []
+        self._counter = itertools.count()
+        self._latest = {}  # Key -> Request
+        self._condition = threading.Condition()
+        self._thread = None
+        self._shutdown = False
+        self._running = None
+
+    def submit(self, key, func, callback=None, priority=PRIORITY_INTERACTIVE, requeue=False):
+        """Schedule a request, superseding the previous one with the same key.
+
+        Parameters
+        ----------
+        key : tuple
+            Requests with the same key supersede each other.
+        func : callable
+            The work to do. Called with the request as its only argument.
+        callback : callable, None, optional
+            Called with the answer, unless the request was cancelled in the meantime.
+        priority : int, optional
+            Lower values are run first.
+        requeue : bool, optional
+            Run the request again when it is preempted by a request with a higher
+            priority, instead of dropping it.
+
+        Returns
+        -------
+        Request
+            The scheduled request.
+        """
+        request = Request(key, func, callback=callback, priority=priority, requeue=requeue)
+
+        with self._condition:
+            previous = self._latest.get(key)
+
+            if previous is not None:
+                logger.debug("Superseding request: {0}".format(key))
+                previous.cancel()
+
+            running = self._running
+
+            if running is not None and running.priority > priority:
+                logger.debug("Preempting request: {0}".format(running.key))
+                running.preempted = True
+                running.cancel()
+
+            self._push(request)
+
+        return request
+
+    def cancel(self, key):
+        """Cancel the pending or running request with the given key.
+
+        Parameters
+        ----------
+        key : tuple
+            The request key.
+        """
+        with self._condition:
+            request = self._latest.pop(key, None)
+
+            if request is not None:
+                request.cancel()
+
+    def shutdown(self):
+        """Cancel all requests and stop the worker thread.
+        """
+        with self._condition:
+            self._shutdown = True
+
+            for request in self._latest.values():
+                request.cancel()
+
+            self._latest.clear()
+            self._queue = []
+            self._condition.notify()
+
+    def _push(self, request):
+        self._latest[request.key] = request
+        heapq.heappush(self._queue, (request.priority, next(self._counter), request))
+        self._ensure_thread()
+        self._condition.notify()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self._name)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _next_request(self):
+        with self._condition:
+            while not self._shutdown:
+                while self._queue:
+                    request = heapq.heappop(self._queue)[2]
+
+                    if not request.is_cancelled():
+                        self._running = request
+                        return request
+
+                self._condition.wait()
+
+    def _run(self):
+        while True:
+            request = self._next_request()
+
+            if request is None:
+                return
+
+            try:
+                answer = request.func(request)
+            except Exception:
+                logger.exception("Request {0} failed".format(request.key))
+                answer = None
+
+            with self._condition:
+                self._running = None
+
+                if self._latest.get(request.key) is request:
+                    if request.preempted and request.requeue and not self._shutdown:
+                        # Not superseded, only interrupted: run it from the start later.
+                        logger.debug("Requeuing preempted request: {0}".format(request.key))
+                        self._push(Request(request.key, request.func, callback=request.callback,
+                                           priority=request.priority, requeue=True))
+                    else:
+                        del self._latest[request.key]
+
+            if request.is_cancelled():
+                logger.debug("Dropping answer of cancelled request: {0}".format(request.key))
+                continue
+
+            if request.callback is not None:
+                try:
+                    request.callback(answer)
+                except Exception:
+                    logger.exception("Callback of request {0} failed".format(request.key))
+
+
+if __name__ == "__main__":
+    pass
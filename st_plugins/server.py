@@ -0,0 +1,361 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""Out-of-process Jedi completion server.
+
+Run as a script, not imported by the plugin::
+
+    python server.py <dependencies directory> <host Python version>
+
+Messages are pickled tuples (the same framing used by ``jedi.inference.compiled.subprocess``)
+exchanged through stdin/stdout.
+
+Client to server: ``(request_id, command, payload)``. Commands:
+
+- ``configure``: ``{"environment": str, "extra_packages": list}``.
+- ``request``: ``{"type": str, "kwargs": dict, "filename": str, "source": dict, "line": int,
+  "column": int, "settings": dict}``. ``source`` is a ``mirror.BufferState`` dictionary.
+  Answered with ``(answer, timings)``, ``timings`` being the seconds spent in each stage.
+  Streaming requests (``references``) send their partial results in ``progress`` messages
+  first, as ``(batch,)``.
+- ``warm_cache``: ``{"processes": int or None, "settings": dict}``. Parses the modules of
+  the ``sys.path`` to the on-disk parser cache in the background, requests are still
+  answered meanwhile. ``progress`` messages with ``(done, total)`` are sent until the
+  answer, the number of ``parsed``, ``cached`` and ``error`` files.
+- ``cancel``: payload is the ID of the request to cancel.
+- ``ping``: health check, answered immediately, even while a request is running.
+- ``shutdown``: exit.
+
+Server to client: ``(request_id, status, result, rss)``. ``status`` is one of ``ok``,
+``error``, ``cancelled``, ``out_of_sync`` (the buffer edits couldn't be applied, the full
+text has to be sent) or ``progress`` (the request is still running). ``rss`` is the resident memory in bytes (0 if unknown). A first
+message with ``None`` as ID and the server information as result is sent on start-up.
+"""
+import logging
+import os
+import sys
+import threading
+import traceback
+import types
+
+from queue import Queue
+
+_settings = {}
+# Returned by the handlers answering from another thread.
+_ANSWERED_LATER = object()
+
+
+def _bootstrap():
+    # Remove this directory from sys.path. Its modules must only be imported as part of
+    # the package stand-in below.
+    del sys.path[0]
+    sys.path.insert(0, sys.argv[1])
+
+    # The plugin package can't be imported outside Sublime Text. Provide the few attributes
+    # the Jedi related modules need from it.
+    package = types.ModuleType("st_plugins")
+    package.__path__ = [os.path.dirname(os.path.abspath(__file__))]
+    package.logger = logging.getLogger("SublimePythonJediFork")
+    package.settings = _settings
+    sys.modules["st_plugins"] = package
+
+
+def get_rss():
+    """Get the resident memory of the current process.
+
+    Returns
+    -------
+    int
+        Resident memory in bytes. 0 if it can't be determined.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (IOError, OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return 0
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class Server():
+    """Completion server.
+
+    Requests are answered one at a time by the main thread. A reader thread handles
+    cancellations and health checks while a request is running.
+    """
+
+    def __init__(self, stdin, stdout, pickle_protocol):
+        """Initialization.
+
+        Parameters
+        ----------
+        stdin : file
+            Binary stream to read requests from.
+        stdout : file
+            Binary stream to write answers to.
+        pickle_protocol : int
+            The pickle protocol used for the answers.
+        """
+        self._stdin = stdin
+        self._stdout = stdout
+        self._pickle_protocol = pickle_protocol
+        self._requests = Queue()
+        self._unanswered = set()  # IDs of the requests queued or running.
+        self._cancelled = set()
+        self._lock = threading.Lock()
+        self._session = None
+        self._warm_up = None
+
+    def send(self, request_id, status, result):
+        """Send an answer.
+
+        Parameters
+        ----------
+        request_id : int, None
+            The ID of the answered request.
+        status : str
+            ``ok``, ``error``, ``cancelled``, ``out_of_sync`` or ``progress``.
+        result : object
+            The answer.
+        """
+        from jedi._compatibility import pickle_dump
+
+        with self._lock:
+            pickle_dump((request_id, status, result, get_rss()),
+                        self._stdout, self._pickle_protocol)
+
+    def is_cancelled(self, request_id):
+        """Check if a request was cancelled.
+
+        Parameters
+        ----------
+        request_id : int
+            The request ID.
+
+        Returns
+        -------
+        bool
+            Whether the request was cancelled.
+        """
+        with self._lock:
+            return request_id in self._cancelled
+
+    def serve(self):
+        """Answer requests until the client goes away or asks to shut down.
+        """
+        reader = threading.Thread(target=self._read)
+        reader.daemon = True
+        reader.start()
+
+        self.send(None, "ok", {
+            "pid": os.getpid(),
+            "version": tuple(sys.version_info[:3]),
+        })
+
+        while True:
+            message = self._requests.get()
+
+            if message is None:
+                return
+
+            request_id, command, payload = message
+
+            try:
+                answered = self._answer(request_id, command, payload)
+            except (IOError, OSError):
+                # The plugin host went away.
+                return
+
+            if answered:
+                self._forget(request_id)
+
+    def _forget(self, request_id):
+        # Cancels that arrive later are ignored.
+        with self._lock:
+            self._unanswered.discard(request_id)
+            self._cancelled.discard(request_id)
+
+    def _answer(self, request_id, command, payload):
+        if self.is_cancelled(request_id):
+            self.send(request_id, "cancelled", None)
+            return True
+
+        from st_plugins.mirror import BufferOutOfSync
+
+        try:
+            result = getattr(self, "_handle_" + command)(request_id, payload)
+        except BufferOutOfSync as err:
+            self.send(request_id, "out_of_sync", str(err))
+        except Exception:
+            self.send(request_id, "error", traceback.format_exc())
+        else:
+            if result is _ANSWERED_LATER:
+                return False
+            elif self.is_cancelled(request_id):
+                self.send(request_id, "cancelled", None)
+            else:
+                self.send(request_id, "ok", result)
+
+        return True
+
+    def _read(self):
+        from jedi._compatibility import pickle_load
+
+        while True:
+            try:
+                request_id, command, payload = pickle_load(self._stdin)
+            except EOFError:
+                # The plugin host went away.
+                self._requests.put(None)
+                return
+
+            if command == "cancel":
+                with self._lock:
+                    if payload in self._unanswered:
+                        self._cancelled.add(payload)
+            elif command == "ping":
+                try:
+                    self.send(request_id, "ok", {"pid": os.getpid()})
+                except (IOError, OSError):
+                    self._requests.put(None)
+                    return
+            elif command == "shutdown":
+                self._requests.put(None)
+                return
+            else:
+                with self._lock:
+                    self._unanswered.add(request_id)
+
+                self._requests.put((request_id, command, payload))
+
+    def _handle_configure(self, request_id, payload):
+        import jedi
+
+        from st_plugins.session import JediSession
+
+        if payload["environment"]:
+            env = jedi.create_environment(payload["environment"], safe=False)
+        else:
+            env = jedi.get_default_environment()
+
+        sys_path = list(payload["extra_packages"]) + env.get_sys_path()
+        self._session = JediSession(env, sys_path)
+
+    def _handle_close_buffer(self, request_id, payload):
+        if self._session is not None:
+            with self._session.lock:
+                self._session.close_buffer(payload)
+
+    def _handle_cache_statistics(self, request_id, payload):
+        from jedi import settings
+        from parso.cache import get_disk_statistics
+        from parso.cache import get_statistics
+
+        return {"memory": get_statistics(),
+                "disk": get_disk_statistics(settings.cache_directory)}
+
+    def _handle_warm_cache(self, request_id, payload):
+        if self._warm_up is not None and self._warm_up.is_alive():
+            raise RuntimeError("The parser cache is already being warmed up.")
+
+        _apply_settings(payload["settings"])
+        session = self._session
+
+        def warm_up():
+            try:
+                result = session.warm_cache(
+                    processes=payload["processes"],
+                    progress=lambda done, total: self.send(request_id, "progress",
+                                                           (done, total)),
+                    cancellation_check=lambda: self.is_cancelled(request_id),
+                )
+            except Exception:
+                status, result = "error", traceback.format_exc()
+            else:
+                status = "ok"
+
+            if self.is_cancelled(request_id):
+                status, result = "cancelled", None
+
+            self._forget(request_id)
+
+            try:
+                self.send(request_id, status, result)
+            except (IOError, OSError):
+                # The plugin host went away.
+                pass
+
+        self._warm_up = threading.Thread(target=warm_up)
+        self._warm_up.daemon = True
+        self._warm_up.start()
+
+        return _ANSWERED_LATER
+
+    def _handle_request(self, request_id, payload):
+        from st_plugins.facade import JediFacade
+        from st_plugins.metrics import RequestTimer
+        from st_plugins.mirror import BufferState
+
+        _apply_settings(payload["settings"])
+        timer = RequestTimer(payload["type"])
+
+        with self._session.lock:
+            facade = JediFacade(
+                env=self._session.env,
+                complete_funcargs=_settings.get("auto_complete_function_params"),
+                source=BufferState.from_dict(payload["source"]),
+                line=payload["line"],
+                column=payload["column"],
+                filename=payload["filename"],
+                sys_path=self._session.sys_path,
+                session=self._session,
+                cancellation_check=lambda: self.is_cancelled(request_id),
+                timer=timer,
+            )
+
+            answer = facade.get(
+                payload["type"],
+                payload["kwargs"],
+                progress=lambda batch: self.send(request_id, "progress", (batch,)),
+            )
+
+            return answer, dict(timer.timings)
+
+
+def _apply_settings(settings):
+    import jedi
+    from parso.cache import set_content_validation
+    from parso.cache import set_disk_budget
+    from parso.cache import set_memory_budget
+
+    _settings.clear()
+    _settings.update(settings)
+    set_memory_budget(_settings.get("parser_cache_memory_limit", 500) * 1024 * 1024)
+    set_disk_budget(_settings.get("parser_disk_cache_limit", 500) * 1024 * 1024)
+    set_content_validation(_settings.get("parser_cache_content_validation", True))
+    jedi.settings.reference_search_processes = _settings.get("reference_search_processes")
+
+
+def main():
+    _bootstrap()
+
+    from jedi._compatibility import highest_pickle_protocol
+
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+    # Nobody else should write to stdout, it's used for IPC.
+    sys.stdout = sys.stderr
+
+    host_version = [int(x) for x in sys.argv[2].split(".")]
+    pickle_protocol = highest_pickle_protocol([sys.version_info, host_version])
+    Server(stdin, stdout, pickle_protocol).serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+import os
+import threading
+
+from collections import OrderedDict
+
+import jedi
+
+from jedi.api.project import get_default_project
+from jedi.inference import InferenceState
+from parso.cache import forget_document
+from parso.cache import warm_up
+
+from . import logger
+from .mirror import BufferOutOfSync
+from .mirror import BufferState
+from .mirror import LineMirror
+
+# Reference searches kept between their requests, the oldest one is dropped first.
+_MAX_SEARCHES = 8
+
+
+class JediSession():
+    """Long-lived Jedi inference state.
+
+    Everything Jedi infers about library modules (builtins, typing, stubs, site-packages,
+    etc.) is kept between requests. Only what was inferred from a buffer is forgotten
+    when that buffer is sent again.
+
+    The lines of the buffers are mirrored, so requests only need to carry the edits made
+    since the previous request (see :py:class:`mirror.BufferState`).
+
+    Attributes
+    ----------
+    env : jedi.api.environment.Environment
+        The Jedi environment.
+    lock : threading.RLock
+        Jedi is not thread safe. Hold this lock while using a script created by the session.
+    sys_path : list
+        The ``sys.path`` used for the analysis.
+    """
+
+    def __init__(self, env, sys_path):
+        """Initialization.
+
+        Parameters
+        ----------
+        env : jedi.api.environment.Environment
+            The Jedi environment.
+        sys_path : list
+            The ``sys.path`` used for the analysis.
+        """
+        self.env = env
+        self.sys_path = sys_path
+        self.lock = threading.RLock()
+        self._projects = {}  # Directory -> project path.
+        self._inference_states = {}  # Project path -> InferenceState.
+        self._buffers = {}  # Buffer key -> (InferenceState, module node).
+        self._mirrors = {}  # Buffer ID -> LineMirror.
+        self._searches = OrderedDict()  # Search ID -> iterator of reference batches.
+
+    def get_inference_state(self, filename):
+        """Get the inference state for the project a file belongs to.
+
+        Parameters
+        ----------
+        filename : str
+            The path to a file. An empty string for unsaved buffers.
+
+        Returns
+        -------
+        jedi.inference.InferenceState
+            The inference state.
+        """
+        directory = os.path.dirname(filename) if filename else os.getcwd()
+
+        if directory not in self._projects:
+            self._projects[directory] = get_default_project(directory)
+
+        project = self._projects[directory]
+        project_path = project._path
+
+        if project_path not in self._inference_states:
+            logger.debug("Creating inference state for project: {0}".format(project_path))
+            project._sys_path = self.sys_path
+            self._inference_states[project_path] = InferenceState(
+                project,
+                environment=self.env,
+                script_path=filename or None
+            )
+
+        return self._inference_states[project_path]
+
+    def script(self, source, line, column, filename="", encoding="utf-8",
+               cancellation_check=None):
+        """Create a Jedi script that reuses the session inference state.
+
+        Parameters
+        ----------
+        source : str, BufferState
+            The buffer content.
+        line : int
+            Line number (1 based).
+        column : int
+            Column number (0 based).
+        filename : str, optional
+            The path to the file. An empty string for unsaved buffers.
+        encoding : str, optional
+            The buffer encoding.
+        cancellation_check : callable, None, optional
+            Returns True once the request became obsolete. Jedi then aborts the inference
+            raising ``jedi.api.exceptions.InferenceCancelled``.
+
+        Returns
+        -------
+        jedi.Script
+            A Jedi script.
+
+        Raises
+        ------
+        BufferOutOfSync
+            If ``source`` only contains edits that can't be applied to the mirrored lines.
+        """
+        code_lines = None
+        diff_hint = None
+        buffer_id = None
+
+        if isinstance(source, BufferState):
+            buffer_id = source.buffer_id
+            code_lines, diff_hint = self._sync_buffer(source)
+            source = None
+
+        key = filename if buffer_id is None else buffer_id
+        inference_state = self.get_inference_state(filename)
+        self.forget_buffer(key)
+        # Other modules might have been edited and saved since the last request.
+        inference_state.invalidate_changed_modules()
+
+        script = jedi.Script(
+            source=source,
+            line=line,
+            column=column,
+            path=filename or None,
+            encoding=encoding,
+            _inference_state=inference_state,
+            _code_lines=code_lines,
+            _diff_hint=diff_hint,
+            # Diff parse unsaved buffers too, each one on its own.
+            _document_id=buffer_id,
+        )
+        self._buffers[key] = (inference_state, script._module_node)
+        inference_state.cancellation_check = cancellation_check
+
+        return script
+
+    def _sync_buffer(self, state):
+        if state.text is not None:
+            mirror = self._mirrors[state.buffer_id] = LineMirror(state.text, state.change_count)
+            return mirror.lines, None
+
+        mirror = self._mirrors.get(state.buffer_id)
+
+        if mirror is None:
+            raise BufferOutOfSync("Buffer {0} is not mirrored.".format(state.buffer_id))
+
+        old_lines = mirror.lines
+
+        try:
+            changed_range = mirror.apply(state)
+        except BufferOutOfSync:
+            del self._mirrors[state.buffer_id]
+            raise
+
+        return mirror.lines, (old_lines,) + changed_range
+
+    def forget_buffer(self, key):
+        """Forget everything inferred from a buffer.
+
+        Parameters
+        ----------
+        key : int, str
+            The buffer key (its buffer ID, or its file name if the request had no
+            ``BufferState``).
+        """
+        try:
+            inference_state, module_node = self._buffers.pop(key)
+        except KeyError:
+            return
+
+        inference_state.invalidate_module(module_node)
+
+    def close_buffer(self, buffer_id):
+        """Forget a closed buffer: its mirrored lines, what was inferred from it and its
+        diff parser cache.
+
+        Parameters
+        ----------
+        buffer_id : int
+            The Sublime Text buffer ID.
+        """
+        self._mirrors.pop(buffer_id, None)
+        self.forget_buffer(buffer_id)
+        forget_document(buffer_id)
+
+    def get_search(self, search_id):
+        """Get a reference search started by a previous request.
+
+        Parameters
+        ----------
+        search_id : int
+            The search ID.
+
+        Returns
+        -------
+        iterator, None
+            The batches of references not found yet. None if there is no such search.
+        """
+        return self._searches.get(search_id)
+
+    def add_search(self, search_id, batches):
+        """Keep a reference search for the next requests.
+
+        Searches run in several requests, so that other requests are answered in between.
+
+        Parameters
+        ----------
+        search_id : int
+            The search ID.
+        batches : iterator
+            The batches of references, e.g. ``jedi.Script.iter_references``. Finished
+            searches are kept as well, until they are dropped for newer ones.
+        """
+        self._searches[search_id] = batches
+
+        while len(self._searches) > _MAX_SEARCHES:
+            _, dropped = self._searches.popitem(last=False)
+            close = getattr(dropped, "close", None)
+
+            if close is not None:
+                close()
+
+    def get_module_paths(self):
+        """Find the modules and stubs in the ``sys.path`` directories.
+
+        Returns
+        -------
+        list
+            The paths of the ``.py`` and ``.pyi`` files.
+        """
+        paths = set()
+
+        for directory in self.sys_path:
+            if not os.path.isdir(directory):
+                # Zipped eggs and missing directories.
+                continue
+
+            for root, dirnames, filenames in os.walk(directory):
+                dirnames[:] = [d for d in dirnames
+                               if d != "__pycache__" and not d.startswith(".")]
+                paths.update(os.path.join(root, f) for f in filenames
+                             if f.endswith((".py", ".pyi")))
+
+        return sorted(paths)
+
+    def warm_cache(self, processes=None, progress=None, cancellation_check=None):
+        """Parse the modules of the ``sys.path`` to the on-disk parser cache.
+
+        The pickles are only loaded by an interpreter of the same version, run this in the
+        process that uses them. Files with a valid pickle are skipped.
+
+        Parameters
+        ----------
+        processes : int, None, optional
+            The number of parser processes, the number of CPUs by default. The files are
+            parsed in this process if it's 0.
+        progress : callable, None, optional
+            Called with the number of files done and the total every few files.
+        cancellation_check : callable, None, optional
+            Returns True once the warm-up should stop.
+
+        Returns
+        -------
+        dict
+            The number of ``parsed`` and ``cached`` files and of ``error`` (files that
+            couldn't be read).
+        """
+        paths = self.get_module_paths()
+        counts = {"parsed": 0, "cached": 0, "error": 0}
+        results = warm_up(
+            paths,
+            version="{0}.{1}".format(*self.env.version_info[:2]),
+            cache_path=jedi.settings.cache_directory,
+            processes=processes,
+            skeleton=jedi.settings.skeleton_parser,
+        )
+
+        try:
+            for done, (_, status) in enumerate(results, 1):
+                counts[status] += 1
+
+                if cancellation_check is not None and cancellation_check():
+                    break
+
+                if progress is not None and (done % 50 == 0 or done == len(paths)):
+                    progress(done, len(paths))
+        finally:
+            results.close()
+
+        return counts
+
+    def clear(self):
+        """Drop all the inference states.
+        """
+        for buffer_id in self._mirrors:
+            forget_document(buffer_id)
+
+        self._projects.clear()
+        self._inference_states.clear()
+        self._buffers.clear()
+        self._mirrors.clear()
+        self._searches.clear()
+
+
+if __name__ == "__main__":
+    pass
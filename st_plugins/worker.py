@@ -0,0 +1,444 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+import itertools
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from jedi._compatibility import GeneralizedPopen
+from jedi._compatibility import highest_pickle_protocol
+from jedi._compatibility import pickle_dump
+from jedi._compatibility import pickle_load
+
+from . import logger
+from . import root_folder
+from .mirror import BufferOutOfSync
+
+_server_path = os.path.join(os.path.dirname(__file__), "server.py")
+_dependencies_path = os.path.join(root_folder, "dependencies")
+
+
+class WorkerError(Exception):
+    """Raised when the completion server fails to answer a request.
+    """
+    pass
+
+
+class _Pending():
+    def __init__(self):
+        self.event = threading.Event()
+        self.status = None
+        self.result = None
+        self.progress = None
+
+
+class WorkerProcess():
+    """Client of the out-of-process Jedi completion server (see ``server.py``).
+
+    The server is started on the first request and restarted automatically if it dies, if
+    its memory usage exceeds ``memory_limit`` or if it hangs: a request that isn't answered
+    for ``timeout`` seconds, or a cancelled one that isn't acknowledged in that time, makes
+    the client ping the server and restart it if the ping isn't answered either.
+
+    Attributes
+    ----------
+    environment : str
+        Path to the virtualenv or interpreter Jedi analyses code for. Empty for the default one.
+    executable : str
+        The Python interpreter that runs the server.
+    extra_packages : list
+        Paths prepended to the environment ``sys.path``.
+    memory_limit : int
+        Maximum resident memory of the server in megabytes. 0 disables the limit.
+    timeout : float
+        Seconds without an answer after which the server is pinged.
+    """
+
+    def __init__(self, executable, environment="", extra_packages=None, memory_limit=0,
+                 timeout=5.0):
+        """Initialization.
+
+        Parameters
+        ----------
+        executable : str
+            The Python interpreter that runs the server.
+        environment : str, optional
+            Path to the virtualenv or interpreter Jedi analyses code for.
+        extra_packages : list, optional
+            Paths prepended to the environment ``sys.path``.
+        memory_limit : int, optional
+            Maximum resident memory of the server in megabytes. 0 disables the limit.
+        timeout : float, optional
+            Seconds without an answer after which the server is pinged.
+        """
+        self.executable = executable
+        self.environment = environment
+        self.extra_packages = list(extra_packages or [])
+        self.memory_limit = memory_limit
+        self.timeout = timeout
+        self._process = None
+        self._pickle_protocol = 2
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._cancelled = {}  # Request ID -> time of the cancel, until acknowledged.
+        self._lock = threading.RLock()
+        self._over_memory_limit = False
+
+    def request(self, request_type, request_kwargs, filename, source, line, column,
+                settings, cancellation_check=None, timer=None, progress=None):
+        """Send a completion request and wait for the answer.
+
+        Parameters
+        ----------
+        request_type : str
+            ``autocomplete`` or ``funcargs``.
+        request_kwargs : dict
+            Keyword arguments of the request.
+        filename : str
+            The file name. An empty string for unsaved buffers.
+        source : dict
+            The buffer content (see :py:meth:`mirror.BufferState.as_dict`).
+        line : int
+            Line number (1 based).
+        column : int
+            Column number (0 based).
+        settings : dict
+            The plugin settings used by the request.
+        cancellation_check : callable, None, optional
+            Returns True once the request became obsolete.
+        timer : metrics.RequestTimer, None, optional
+            Collects the timings measured by the server.
+        progress : callable, None, optional
+            Called with the partial results streamed by the request, e.g. the batches of
+            ``references``.
+
+        Returns
+        -------
+        object
+            The answer. None if the request was cancelled.
+
+        Raises
+        ------
+        BufferOutOfSync
+            If ``source`` only contains edits that the server can't apply.
+        WorkerError
+            If the server failed to answer.
+        """
+        request_id, pending = self._send("request", {
+            "type": request_type,
+            "kwargs": request_kwargs,
+            "filename": filename,
+            "source": source,
+            "line": line,
+            "column": column,
+            "settings": settings,
+        }, progress=progress)
+        waiting_since = time.time()
+
+        while not pending.event.wait(0.01):
+            if cancellation_check is not None and cancellation_check():
+                self._cancel(request_id)
+                return None
+
+            if self._is_overdue(waiting_since):
+                self._check_health()
+                waiting_since = time.time()
+
+        if pending.status == "error":
+            raise WorkerError(pending.result)
+
+        if pending.status == "out_of_sync":
+            raise BufferOutOfSync(pending.result)
+
+        if pending.status != "ok":
+            return None
+
+        answer, timings = pending.result
+
+        if timer is not None:
+            timer.update(timings)
+
+        return answer
+
+    def close_buffer(self, buffer_id):
+        """Make the server forget a closed buffer. Nothing is sent if it isn't running.
+
+        Parameters
+        ----------
+        buffer_id : int
+            The Sublime Text buffer ID.
+        """
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                return
+
+            try:
+                self._send("close_buffer", buffer_id, expect_answer=False)
+            except WorkerError as err:
+                logger.debug(err)
+
+    def ping(self, timeout=2.0):
+        """Health check.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Seconds to wait for the answer.
+
+        Returns
+        -------
+        bool
+            Whether the server answered in time.
+        """
+        try:
+            _, pending = self._send("ping", None)
+        except WorkerError:
+            return False
+
+        return pending.event.wait(timeout) and pending.status == "ok"
+
+    def get_cache_statistics(self, timeout=5.0):
+        """Get the parser cache statistics of the server.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Seconds to wait for the answer. The server answers between requests.
+
+        Returns
+        -------
+        dict, None
+            The ``memory`` and ``disk`` statistics. None if the server isn't running or
+            didn't answer in time.
+        """
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                return None
+
+        try:
+            _, pending = self._send("cache_statistics", None)
+        except WorkerError:
+            return None
+
+        if pending.event.wait(timeout) and pending.status == "ok":
+            return pending.result
+
+        return None
+
+    def warm_cache(self, settings, processes=None, progress=None, cancellation_check=None):
+        """Parse the modules of the environment to the on-disk parser cache of the server.
+
+        Requests are still answered while the server warms the cache.
+
+        Parameters
+        ----------
+        settings : dict
+            The plugin settings used by the parser cache.
+        processes : int, None, optional
+            The number of parser processes, the number of CPUs by default.
+        progress : callable, None, optional
+            Called with the number of files done and the total every few files.
+        cancellation_check : callable, None, optional
+            Returns True once the warm-up should stop.
+
+        Returns
+        -------
+        dict, None
+            The number of ``parsed``, ``cached`` and ``error`` files. None if the warm-up
+            was cancelled.
+
+        Raises
+        ------
+        WorkerError
+            If the server failed to answer.
+        """
+        request_id, pending = self._send("warm_cache", {
+            "processes": processes,
+            "settings": settings,
+        }, progress=progress)
+        cancelled = False
+
+        while not pending.event.wait(0.1):
+            if not cancelled and cancellation_check is not None and cancellation_check():
+                self._cancel(request_id)
+                cancelled = True
+
+        if pending.status == "error":
+            raise WorkerError(pending.result)
+
+        if pending.status != "ok":
+            return None
+
+        return pending.result
+
+    def _cancel(self, request_id):
+        with self._lock:
+            self._cancelled[request_id] = time.time()
+
+        self._send("cancel", request_id, expect_answer=False)
+
+    def _is_overdue(self, waiting_since):
+        deadline = time.time() - self.timeout
+
+        with self._lock:
+            return waiting_since < deadline or any(
+                cancelled_at < deadline for cancelled_at in self._cancelled.values())
+
+    def _check_health(self):
+        # Long requests are fine as long as the server reads and answers pings.
+        with self._lock:
+            # The cancels checked now aren't waited for again.
+            self._cancelled.clear()
+
+            if self._process is None or self._process.poll() is not None:
+                return
+
+        if not self.ping(self.timeout):
+            logger.error("The completion server doesn't answer.")
+            self.restart()
+
+    def restart(self):
+        """Stop the server. A new one is started on the next request.
+        """
+        logger.info("Restarting completion server.")
+        self.stop()
+
+    def stop(self):
+        """Stop the server.
+        """
+        with self._lock:
+            process = self._process
+            self._process = None
+
+        if process is None:
+            return
+
+        try:
+            pickle_dump((0, "shutdown", None), process.stdin, self._pickle_protocol)
+        except (IOError, OSError):
+            pass
+
+        try:
+            process.stdin.close()
+            process.wait(timeout=1)
+        except Exception:
+            process.kill()
+
+        self._fail_pending("The completion server was stopped.")
+
+    def _start(self):
+        logger.info("Starting completion server: {0}".format(self.executable))
+        process = GeneralizedPopen(
+            (self.executable, _server_path, _dependencies_path,
+             ".".join(str(x) for x in sys.version_info[:3])),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            bufsize=-1
+        )
+
+        try:
+            _, status, info, _ = pickle_load(process.stdout)
+        except Exception as err:
+            process.kill()
+            raise WorkerError("The completion server failed to start: {0}".format(err))
+
+        logger.debug("Completion server started: {0}".format(info))
+        self._pickle_protocol = highest_pickle_protocol([sys.version_info, info["version"]])
+        self._process = process
+
+        reader = threading.Thread(target=self._read, args=(process,))
+        reader.daemon = True
+        reader.start()
+
+        self._send("configure", {
+            "environment": self.environment,
+            "extra_packages": self.extra_packages,
+        }, expect_answer=False)
+
+    def _send(self, command, payload, expect_answer=True, progress=None):
+        with self._lock:
+            if self._over_memory_limit and not self._pending:
+                # Recycle the server between requests.
+                self._over_memory_limit = False
+                self.restart()
+
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+
+            request_id = next(self._ids)
+            pending = None
+
+            if expect_answer:
+                pending = self._pending[request_id] = _Pending()
+                # Set before sending, the first results may come back right away.
+                pending.progress = progress
+
+            try:
+                pickle_dump((request_id, command, payload),
+                            self._process.stdin, self._pickle_protocol)
+            except (IOError, OSError) as err:
+                self._pending.pop(request_id, None)
+                self._process = None
+                raise WorkerError("The completion server died: {0}".format(err))
+
+        return request_id, pending
+
+    def _read(self, process):
+        while True:
+            try:
+                request_id, status, result, rss = pickle_load(process.stdout)
+            except Exception:
+                break
+
+            with self._lock:
+                if status == "progress":
+                    pending = self._pending.get(request_id)
+                else:
+                    pending = self._pending.pop(request_id, None)
+                    self._cancelled.pop(request_id, None)
+
+            if status == "error":
+                logger.error("Completion server error: {0}".format(result))
+
+            if pending is None:
+                pass
+            elif status == "progress":
+                if pending.progress is not None:
+                    pending.progress(*result)
+            else:
+                pending.status = status
+                pending.result = result
+                pending.event.set()
+
+            if self.memory_limit and rss > self.memory_limit * 1024 * 1024:
+                if not self._over_memory_limit:
+                    logger.info("Completion server uses {0} MB.".format(rss // (1024 * 1024)))
+
+                self._over_memory_limit = True
+
+        with self._lock:
+            if self._process is not process:
+                # Stopped or replaced in the meantime.
+                return
+
+            logger.info("Completion server exited.")
+            self._process = None
+
+        self._fail_pending("The completion server exited.")
+
+    def _fail_pending(self, message):
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._cancelled.clear()
+
+        for p in pending:
+            p.status = "error"
+            p.result = message
+            p.event.set()
+
+
+if __name__ == "__main__":
+    pass